@@ -1,10 +1,13 @@
 from django.contrib import admin
-from .models import Product, LikedProduct, Order, OrderItem,PerformanceMetric
+from .models import Product, LikedProduct, Order, OrderItem,PerformanceMetric, ProductTag, ProductImportJob, VectorIndexTask
 
 admin.site.register(Product)
 admin.site.register(LikedProduct)
 admin.site.register(Order)
 admin.site.register(OrderItem)
+admin.site.register(ProductTag)
+admin.site.register(ProductImportJob)
+admin.site.register(VectorIndexTask)
 
 @admin.register(PerformanceMetric)
 class PerformanceMetricAdmin(admin.ModelAdmin):
@@ -0,0 +1,48 @@
+# api/background.py
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+
+
+def release_worker_connection():
+    """
+    Closes the calling worker thread's DB connection if it's stale. Worker
+    threads hold their own connection, which the request/response cycle that
+    normally cleans connections up never sees.
+    """
+    close_old_connections()
+
+
+def _run_and_release(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        release_worker_connection()
+
+
+class BackgroundExecutor:
+    """
+    A thread pool for work moved off the request path, started on first use.
+    `max_workers` may be a callable so it's read from settings at that point.
+    """
+
+    def __init__(self, thread_name_prefix, max_workers=1):
+        self.thread_name_prefix = thread_name_prefix
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                max_workers = self.max_workers() if callable(self.max_workers) else self.max_workers
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix=self.thread_name_prefix
+                )
+            return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs), releasing the worker's DB connection when it finishes."""
+        return self._get_executor().submit(_run_and_release, fn, *args, **kwargs)
@@ -0,0 +1,136 @@
+# api/bestsellers.py
+
+import datetime
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .models import OrderItem, Product, ProductTag
+from .sampling import take_ranked_sample
+
+logger = logging.getLogger(__name__)
+
+# Supported sales windows in days; None means all-time
+BESTSELLER_WINDOWS = {'7': 7, '30': 30, 'all': None}
+
+# How long a request that lost the rebuild race waits for the winner's snapshot
+SNAPSHOT_WAIT_SECONDS = 5
+
+
+def compute_bestseller_ids(window_days):
+    """
+    Computes the bestseller list as an ordered list of product IDs.
+
+    1. Identify the top 5 products by units sold within the window.
+    2. Collect all unique AI tags from these top 5 products.
+    3. Find other products (up to 10) that share these "trending" tags,
+       ranked by how many they share.
+    4. Return the bestsellers first, followed by the tag-related products.
+    """
+    # 1. Identify the top 5 best-selling products by quantity sold
+    if window_days is None:
+        top_product_ids = list(
+            Product.objects.filter(total_sold__gt=0).order_by('-total_sold', '-id').values_list('id', flat=True)[:5]
+        )
+    else:
+        since = timezone.now() - datetime.timedelta(days=window_days)
+        top_product_ids = list(
+            OrderItem.objects.filter(order__created_at__gte=since)
+            .values('product_id')
+            .annotate(sold=Sum('quantity'))
+            .order_by('-sold', '-product_id')
+            .values_list('product_id', flat=True)[:5]
+        )
+
+    # 2. Collect unique AI tags from these bestsellers
+    trending_tags = set(
+        ProductTag.objects.filter(product_id__in=top_product_ids).values_list('name', flat=True)
+    )
+    if not trending_tags:
+        return top_product_ids
+
+    # 3. Other products sharing these trending tags, ranked by how many they share
+    related_products = take_ranked_sample(
+        Product.objects.filter(tags__name__in=trending_tags)
+        .exclude(id__in=top_product_ids)
+        .annotate(relevance_score=Count('tags'))
+        .only('id'),
+        10,
+    )
+    related_ids = [product.id for product in related_products]
+
+    # 4. Combine, de-duplicate and cap the list
+    return list(dict.fromkeys(top_product_ids + related_ids))[:12]
+
+
+def _snapshot_key(window):
+    return f'bestsellers:snapshot:{window}'
+
+
+def _lock_key(window):
+    return f'bestsellers:lock:{window}'
+
+
+def refresh_bestseller_snapshot(window):
+    """Recomputes and stores the snapshot for a window. Returns the new snapshot."""
+    snapshot = {
+        'ids': compute_bestseller_ids(BESTSELLER_WINDOWS[window]),
+        'fresh_until': time.time() + settings.BESTSELLER_SNAPSHOT_TTL,
+    }
+    # Kept well past its freshness so readers can be served stale data while one
+    # worker rebuilds it, instead of every worker rebuilding at once.
+    cache.set(_snapshot_key(window), snapshot, timeout=settings.BESTSELLER_SNAPSHOT_TTL * 10)
+    return snapshot
+
+
+def _refresh_single_flight(window):
+    """
+    Rebuilds the snapshot only if no other worker is already doing so.
+    Returns the new snapshot, or None if another worker holds the lock.
+    """
+    if not cache.add(_lock_key(window), True, timeout=60):
+        return None
+    try:
+        return refresh_bestseller_snapshot(window)
+    finally:
+        cache.delete(_lock_key(window))
+
+
+def get_bestseller_ids(window):
+    """
+    Returns the bestseller product IDs for a window from the cached snapshot.
+    A stale snapshot is served while a single worker refreshes it; on a cold
+    cache, requests that lose the race wait briefly for the winner's result.
+    """
+    snapshot = cache.get(_snapshot_key(window))
+    if snapshot is not None:
+        if snapshot['fresh_until'] < time.time():
+            snapshot = _refresh_single_flight(window) or snapshot
+        return snapshot['ids']
+
+    snapshot = _refresh_single_flight(window)
+    deadline = time.time() + SNAPSHOT_WAIT_SECONDS
+    while snapshot is None and time.time() < deadline:
+        time.sleep(0.05)
+        snapshot = cache.get(_snapshot_key(window))
+    if snapshot is None:
+        raise TimeoutError(f"Bestseller snapshot for window '{window}' was not built in time.")
+    return snapshot['ids']
+
+
+def bestseller_etag_version(request):
+    """
+    Identifies the requested window's current list for the bestsellers ETag.
+    The snapshot changes as the window slides and it's rebuilt, with no
+    catalog edit to bump the catalog version.
+    """
+    window = request.query_params.get('window', settings.BESTSELLER_WINDOW)
+    if window not in BESTSELLER_WINDOWS:
+        return ''
+    ids = ','.join(str(product_id) for product_id in get_bestseller_ids(window))
+    return hashlib.md5(ids.encode('utf-8')).hexdigest()
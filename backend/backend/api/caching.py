@@ -0,0 +1,204 @@
+# api/caching.py
+
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_STATS_KEYS = {'hits': 'recs:stats:hits', 'misses': 'recs:stats:misses'}
+
+
+def _hashed(value):
+    """Short stable token for values (like category names) that aren't safe in cache keys."""
+    return hashlib.md5((value or '').encode('utf-8')).hexdigest()[:12]
+
+
+def _incr(key, delta=1):
+    """Atomically increments a counter, creating it on first use."""
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # The key expired or was evicted between add() and incr()
+        cache.set(key, delta, timeout=None)
+        return delta
+
+
+# ==========================================================
+# --- RECOMMENDATION CACHE ---
+# ==========================================================
+# Entries hold the ordered list of recommended product IDs, not serialized
+# data, so per-user fields like `is_liked` stay correct. Each key embeds a
+# per-category version: bumping it when a product's category or tags change
+# invalidates every cached list in that category at once. The TTL is a
+# backstop for cross-category tag overlap.
+
+def _category_version_key(category):
+    return f'recs:category:{_hashed(category)}:version'
+
+
+def _recommendation_key(product, mode):
+    version = cache.get(_category_version_key(product.category)) or 0
+    return f'recs:{mode}:{product.pk}:{_hashed(product.category)}:v{version}'
+
+
+def get_cached_recommendation_ids(product, mode='hybrid'):
+    """Returns the cached recommendation IDs for a product, or None on a miss."""
+    try:
+        ids = cache.get(_recommendation_key(product, mode))
+        _incr(RECOMMENDATION_STATS_KEYS['hits' if ids is not None else 'misses'])
+        return ids
+    except Exception as e:
+        logger.warning(f"Recommendation cache read failed for product {product.pk}: {e}")
+        return None
+
+
+def set_cached_recommendation_ids(product, ids, mode='hybrid'):
+    try:
+        cache.set(_recommendation_key(product, mode), list(ids), timeout=settings.RECOMMENDATION_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Recommendation cache write failed for product {product.pk}: {e}")
+
+
+def invalidate_recommendations(*categories):
+    """Drops every cached recommendation list for products in the given categories."""
+    for category in set(categories):
+        try:
+            _incr(_category_version_key(category))
+        except Exception as e:
+            logger.warning(f"Recommendation cache invalidation failed for category '{category}': {e}")
+
+
+def get_recommendation_cache_stats():
+    try:
+        hits = cache.get(RECOMMENDATION_STATS_KEYS['hits']) or 0
+        misses = cache.get(RECOMMENDATION_STATS_KEYS['misses']) or 0
+    except Exception as e:
+        logger.warning(f"Recommendation cache stats unavailable: {e}")
+        hits = misses = 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else 0.0,
+    }
+
+
+# ==========================================================
+# --- CATEGORY MEMBERSHIP CACHE ---
+# ==========================================================
+# The IDs of every product in a category, used to draw random samples without
+# ORDER BY RANDOM(). Shares the per-category version above, which is bumped
+# whenever a product joins or leaves the category.
+
+def _category_ids_key(category):
+    version = cache.get(_category_version_key(category)) or 0
+    return f'category:ids:{_hashed(category)}:v{version}'
+
+
+def get_cached_category_ids(category):
+    try:
+        return cache.get(_category_ids_key(category))
+    except Exception as e:
+        logger.warning(f"Category ID cache read failed for '{category}': {e}")
+        return None
+
+
+def set_cached_category_ids(category, ids):
+    try:
+        cache.set(_category_ids_key(category), list(ids), timeout=settings.RECOMMENDATION_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Category ID cache write failed for '{category}': {e}")
+
+
+# ==========================================================
+# --- CATALOG VERSIONS ---
+# ==========================================================
+# Opaque counters behind the catalog's ETags (see api/conditional.py): one for
+# the whole catalog, one per product, and one per user for their likes. A
+# missing counter starts from the current time rather than 0, so an evicted
+# key can never repeat a version a client already holds. Each counter also
+# records when it last moved, which is what Last-Modified reports; a missing
+# timestamp reads as "now" for the same reason.
+
+def _catalog_version_key():
+    return 'catalog:version'
+
+
+def _product_version_key(product_id):
+    return f'catalog:product:{product_id}:version'
+
+
+def _likes_version_key(user_id):
+    return f'likes:user:{user_id}:version'
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _get_modified(key):
+    key = f'{key}:modified'
+    modified = cache.get(key)
+    if modified is None:
+        cache.add(key, time.time(), timeout=None)
+        modified = cache.get(key)
+    return modified
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+    cache.set(f'{key}:modified', time.time(), timeout=None)
+
+
+def get_catalog_version():
+    return _get_version(_catalog_version_key())
+
+
+def get_product_version(product_id):
+    return _get_version(_product_version_key(product_id))
+
+
+def get_likes_version(user_id):
+    return _get_version(_likes_version_key(user_id))
+
+
+def get_catalog_modified():
+    """Unix time of the last catalog change."""
+    return _get_modified(_catalog_version_key())
+
+
+def get_product_modified(product_id):
+    return _get_modified(_product_version_key(product_id))
+
+
+def get_likes_modified(user_id):
+    return _get_modified(_likes_version_key(user_id))
+
+
+def bump_catalog_version(*product_ids):
+    """Marks the catalog, and the given products, as changed."""
+    try:
+        _bump_version(_catalog_version_key())
+        for product_id in set(product_ids):
+            _bump_version(_product_version_key(product_id))
+    except Exception as e:
+        logger.warning(f"Catalog version bump failed: {e}")
+
+
+def bump_likes_version(user_id):
+    try:
+        _bump_version(_likes_version_key(user_id))
+    except Exception as e:
+        logger.warning(f"Likes version bump failed for user {user_id}: {e}")
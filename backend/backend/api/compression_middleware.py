@@ -0,0 +1,17 @@
+# api/compression_middleware.py
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+
+class ThresholdGZipMiddleware(GZipMiddleware):
+    """
+    Gzips responses whose body is at least RESPONSE_COMPRESSION_MIN_BYTES.
+    Smaller payloads aren't worth the CPU; streaming responses are always
+    compressed since their size isn't known up front.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.RESPONSE_COMPRESSION_MIN_BYTES:
+            return response
+        return super().process_response(request, response)
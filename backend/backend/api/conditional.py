@@ -0,0 +1,127 @@
+# api/conditional.py
+
+import functools
+import hashlib
+import logging
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .caching import (
+    get_catalog_modified,
+    get_catalog_version,
+    get_likes_modified,
+    get_likes_version,
+    get_product_modified,
+    get_product_version,
+)
+from .serializers import is_public_request
+
+logger = logging.getLogger(__name__)
+
+
+def catalog_etag(request, version):
+    """
+    Strong ETag for a catalog response: the data version, who is asking (their
+    likes change `is_liked`), the full path with its query string, and the
+    negotiated media type.
+    """
+    user = request.user
+    if user.is_authenticated and not is_public_request(request):
+        viewer = f'user:{user.pk}:{get_likes_version(user.pk)}'
+    else:
+        viewer = 'anon'
+    raw = f'{version}|{viewer}|{request.get_full_path()}|{request.accepted_media_type}'
+    return f'"{hashlib.md5(raw.encode("utf-8")).hexdigest()}"'
+
+
+def catalog_last_modified(request, modified):
+    """
+    Last-Modified for a catalog response, in whole seconds: when its version
+    last moved, or the viewer's likes did if those are part of the response.
+    """
+    user = request.user
+    if user.is_authenticated and not is_public_request(request):
+        modified = max(modified, get_likes_modified(user.pk))
+    return int(modified)
+
+
+def etag_matches(request, etag):
+    if_none_match = request.headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, so a W/ prefix added by a proxy still matches
+    candidates = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+    return '*' in candidates or etag in candidates
+
+
+def not_modified_since(request, last_modified):
+    # If-Modified-Since is only evaluated when the request has no If-None-Match
+    if last_modified is None or request.headers.get('If-None-Match'):
+        return False
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since') or '')
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def conditional_catalog_get(view_method=None, *, per_product=False, extra_version=None):
+    """
+    Decorates a read-only view method with ETag / If-None-Match and
+    Last-Modified / If-Modified-Since handling. The version is read before the
+    handler runs, so a client that gets a 304 skips both the queries and the
+    serialization. With `per_product=True` the validators follow the product
+    named by the `pk` URL kwarg instead of the whole catalog.
+    `extra_version(request)`, if given, is mixed into the version for responses
+    that also change without a catalog edit; those carry no Last-Modified,
+    since the catalog's timestamp doesn't see such changes.
+
+    Last-Modified comes from the catalog versions rather than Product.updated_at,
+    which doesn't move for reviews, deletions or the sales rollup.
+
+    `?public=true` responses are the same for every user, so successful ones
+    (200 and 304) are marked `Cache-Control: public` for shared caches and
+    CDNs; all others vary on the Authorization header.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return method(self, request, *args, **kwargs)
+            try:
+                if per_product:
+                    version, modified = get_product_version(kwargs['pk']), get_product_modified(kwargs['pk'])
+                else:
+                    version, modified = get_catalog_version(), get_catalog_modified()
+                last_modified = None
+                if extra_version:
+                    version = f'{version}:{extra_version(request)}'
+                else:
+                    last_modified = catalog_last_modified(request, modified)
+                etag = catalog_etag(request, version)
+            except Exception as e:
+                # Without the cache there is no version to compare against; just serve the data
+                logger.warning(f"Catalog version unavailable, skipping conditional GET: {e}")
+                return method(self, request, *args, **kwargs)
+
+            validators = {'ETag': etag}
+            if last_modified is not None:
+                validators['Last-Modified'] = http_date(last_modified)
+
+            if etag_matches(request, etag) or not_modified_since(request, last_modified):
+                response = Response(status=status.HTTP_304_NOT_MODIFIED, headers=validators)
+            else:
+                response = method(self, request, *args, **kwargs)
+                if response.status_code == status.HTTP_200_OK:
+                    for header, value in validators.items():
+                        response[header] = value
+            if not is_public_request(request):
+                patch_vary_headers(response, ['Authorization'])
+            elif response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+                # Errors (a bad filter, a missing product) are never shared
+                patch_cache_control(response, public=True, max_age=settings.PUBLIC_CATALOG_MAX_AGE)
+            return response
+        return wrapper
+
+    return decorator(view_method) if view_method else decorator
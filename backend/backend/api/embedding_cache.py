@@ -0,0 +1,194 @@
+# api/embedding_cache.py
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps bound parameters per statement; look keys up in chunks of this many
+LOOKUP_CHUNK_SIZE = 500
+
+
+class EmbeddingCache:
+    """
+    Embeddings keyed by a SHA-256 of the exact text they were computed from,
+    stored as float32 blobs in a local SQLite file. Text that hasn't changed
+    since it was last embedded (e.g. a product whose stock moved) is served
+    from disk instead of going through the model again.
+    """
+
+    def __init__(self, path, namespace):
+        self.path = path
+        # The model name: a different model must never reuse these vectors
+        self.namespace = namespace
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)')
+            self._local.connection = connection
+        return connection
+
+    def key(self, text):
+        return hashlib.sha256(f'{self.namespace}\0{text}'.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        found = {}
+        connection = self._connection()
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            rows = connection.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            found.update((key, np.frombuffer(vector, dtype=np.float32)) for key, vector in rows)
+        return found
+
+    def set_many(self, vectors):
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)',
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in vectors.items()],
+            )
+
+    def encode(self, model, texts):
+        """
+        model.encode(texts) for a list of texts, as a 2-D array, where only
+        texts missing from the cache reach the model (in one call).
+        """
+        keys = [self.key(text) for text in texts]
+        try:
+            cached = self.get_many(list(set(keys)))
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            cached = {}
+
+        missing = {key: text for text, key in zip(texts, keys) if key not in cached}
+        if missing:
+            computed = dict(zip(missing, model.encode(list(missing.values()))))
+            try:
+                self.set_many(computed)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+            cached.update(computed)
+
+        # A miss is a text that went through the model; repeats within a call are hits
+        with self._stats_lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return np.array([cached[key] for key in keys], dtype=np.float32)
+
+    def stats(self):
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.hits = self.misses = 0
+
+
+def encode_documents(model, texts, namespace):
+    """
+    Embeds documents through the shared on-disk cache, or straight through the
+    model when EMBEDDING_CACHE_PATH is empty.
+    """
+    cache = get_embedding_cache(namespace)
+    if cache is None:
+        return model.encode(texts)
+    return cache.encode(model, texts)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(namespace):
+    """The process-wide cache for one embedding model, or None if caching is disabled."""
+    if not settings.EMBEDDING_CACHE_PATH:
+        return None
+    with _caches_lock:
+        if namespace not in _caches:
+            _caches[namespace] = EmbeddingCache(settings.EMBEDDING_CACHE_PATH, namespace)
+        return _caches[namespace]
+
+
+def normalize_query(query):
+    """Cache key for a search query: case and whitespace don't change what the (uncased) model sees."""
+    return ' '.join((query or '').split()).lower()
+
+
+class QueryEmbeddingCache:
+    """
+    A bounded, thread-safe LRU of search-query embeddings keyed by normalized
+    query text. Concurrent lookups of the same uncached query wait for a
+    single encode instead of each running the model.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._vectors = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, model, query):
+        key = normalize_query(query)
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is not None:
+                self._vectors.move_to_end(key)
+                self.hits += 1
+                return list(vector)
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            return list(future.result())
+        try:
+            vector = tuple(model.encode(key).tolist())
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._in_flight.pop(key, None)
+            self._vectors[key] = vector
+            while len(self._vectors) > self.max_size:
+                self._vectors.popitem(last=False)
+        future.set_result(vector)
+        return list(vector)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._vectors),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            }
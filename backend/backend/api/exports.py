@@ -0,0 +1,122 @@
+# api/exports.py
+
+import csv
+import io
+import json
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Order, OrderItem, Product
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up, as in api/renderers.py
+    orjson = None
+
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+# Rows fetched per round trip (a server-side cursor on PostgreSQL), and
+# written to the output as one chunk
+EXPORT_CHUNK_SIZE = 2000
+
+# Each dataset is exported from a flat values_list() query, so no model
+# instances are built and memory stays flat whatever the table size.
+# Columns: (output name, ORM lookup)
+EXPORT_DATASETS = {
+    'products': (Product, [
+        ('id', 'id'), ('name', 'name'), ('category', 'category'), ('price', 'price'),
+        ('stock_quantity', 'stock_quantity'), ('total_sold', 'total_sold'),
+        ('description', 'description'), ('seo_keywords', 'seo_keywords'), ('ai_tags', 'ai_tags'),
+        ('image_url', 'image_url'), ('image_file', 'image_file'),
+    ]),
+    'orders': (Order, [
+        ('id', 'id'), ('user_id', 'user_id'), ('username', 'user__username'),
+        ('created_at', 'created_at'), ('total_amount', 'total_amount'),
+        ('payment_method', 'payment_method'), ('shipping_info', 'shipping_info'),
+    ]),
+    'order_items': (OrderItem, [
+        ('id', 'id'), ('order_id', 'order_id'), ('order_created_at', 'order__created_at'),
+        ('product_id', 'product_id'), ('product_name', 'product__name'),
+        ('quantity', 'quantity'), ('price', 'price'),
+    ]),
+}
+
+class _ExportEncoder(JSONEncoder):
+    """DRF's encoder, but Decimals stay exact strings as the serializers render them."""
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+_encoder = _ExportEncoder()
+
+
+def _dumps(record):
+    """One record as compact JSON, with Decimals and datetimes encoded as the API does."""
+    if orjson is not None:
+        return orjson.dumps(record, default=_encoder.default, option=orjson.OPT_PASSTHROUGH_DATETIME).decode()
+    return json.dumps(record, cls=_ExportEncoder, ensure_ascii=False, separators=(',', ':'))
+
+
+def _csv_value(value):
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, (dict, list)):
+        return _dumps(value)
+    # Decimal, datetime, ...
+    return _encoder.default(value)
+
+
+def export_rows(dataset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Returns (column names, iterator of value tuples) for a dataset, streamed in primary key order."""
+    model, columns = EXPORT_DATASETS[dataset]
+    rows = model.objects.order_by('pk').values_list(*[lookup for _, lookup in columns])
+    return [name for name, _ in columns], rows.iterator(chunk_size=chunk_size)
+
+
+def iter_export(dataset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the dataset as NDJSON or CSV text, one chunk of `chunk_size` rows
+    at a time, for a StreamingHttpResponse or a file.
+    """
+    names, rows = export_rows(dataset, chunk_size)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    if writer:
+        writer.writerow(names)
+
+    for count, row in enumerate(rows, start=1):
+        if writer:
+            writer.writerow([_csv_value(value) for value in row])
+        else:
+            buffer.write(_dumps(dict(zip(names, row))))
+            buffer.write('\n')
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def aiter_export(dataset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    iter_export() for ASGI servers. StreamingHttpResponse collects a sync
+    iterator into a list before sending it from an async handler, so each
+    chunk is pulled here as it's sent instead, on Django's sync thread where
+    the query's cursor lives.
+    """
+    chunks = iter_export(dataset, export_format, chunk_size)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        # Releases the cursor if the client disconnects mid-export
+        await sync_to_async(chunks.close, thread_sensitive=True)()
@@ -0,0 +1,74 @@
+# api/facets.py
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Q
+from rest_framework import serializers
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+FACETS_CACHE_KEY = 'catalog:category-facets'
+
+
+def compute_category_facets():
+    """
+    Builds the category index in a single GROUP BY over Product:
+    one entry per category with its product count, in-stock count and price range.
+    Prices are formatted as the product serializers render them.
+    """
+    price_field = Product._meta.get_field('price')
+    price = serializers.DecimalField(max_digits=price_field.max_digits, decimal_places=price_field.decimal_places)
+    rows = (
+        Product.objects.values('category')
+        .annotate(
+            product_count=Count('id'),
+            in_stock_count=Count('id', filter=Q(stock_quantity__gt=0)),
+            min_price=Min('price'),
+            max_price=Max('price'),
+        )
+        .order_by('category')
+    )
+    return [
+        {
+            'category': row['category'],
+            'product_count': row['product_count'],
+            'in_stock_count': row['in_stock_count'],
+            # Aggregates come back unquantized on SQLite (e.g. 15.9900000000000)
+            'min_price': price.to_representation(row['min_price']),
+            'max_price': price.to_representation(row['max_price']),
+        }
+        for row in rows
+    ]
+
+
+def get_category_facets():
+    """Returns the cached category index, rebuilding it on a miss."""
+    try:
+        facets = cache.get(FACETS_CACHE_KEY)
+    except Exception as e:
+        logger.warning(f"Category facet cache read failed: {e}")
+        return compute_category_facets()
+
+    if facets is None:
+        facets = compute_category_facets()
+        try:
+            cache.set(FACETS_CACHE_KEY, facets, timeout=settings.CATEGORY_FACETS_TTL)
+        except Exception as e:
+            logger.warning(f"Category facet cache write failed: {e}")
+    return facets
+
+
+def get_category_names():
+    """Sorted category names, as served by the old DISTINCT query."""
+    return [facet['category'] for facet in get_category_facets()]
+
+
+def invalidate_category_facets():
+    try:
+        cache.delete(FACETS_CACHE_KEY)
+    except Exception as e:
+        logger.warning(f"Category facet cache invalidation failed: {e}")
@@ -0,0 +1,73 @@
+# api/filters.py
+
+from decimal import Decimal, InvalidOperation
+
+from rest_framework.exceptions import NotAuthenticated, ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import LikedProduct
+from .serializers import is_public_request
+
+TRUE_VALUES = {'1', 'true', 'yes'}
+
+
+def _parse_price(request, name):
+    raw = request.query_params.get(name)
+    if raw in (None, ''):
+        return None
+    try:
+        price = Decimal(raw)
+    except InvalidOperation:
+        raise ValidationError({name: 'Must be a number.'})
+    if not price.is_finite() or price < 0:
+        raise ValidationError({name: 'Must be a non-negative number.'})
+    return price
+
+
+def _parse_flag(request, name):
+    return request.query_params.get(name, '').lower() in TRUE_VALUES
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    """
+    Server-side catalog filters, all optional and combinable:
+
+        ?category=Books,Apparel   one or more categories
+        ?min_price=10&max_price=50
+        ?in_stock=true            only products with stock left
+        ?liked=true               only the current user's liked products
+
+    Each filter maps onto an index on Product (see Product.Meta.indexes) so the
+    work scales with the number of matches, not the size of the catalog.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        categories = [c.strip() for c in request.query_params.get('category', '').split(',') if c.strip()]
+        if len(categories) == 1:
+            queryset = queryset.filter(category=categories[0])
+        elif categories:
+            queryset = queryset.filter(category__in=categories)
+
+        min_price = _parse_price(request, 'min_price')
+        max_price = _parse_price(request, 'max_price')
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise ValidationError({'min_price': 'Must not be greater than max_price.'})
+        if min_price is not None:
+            queryset = queryset.filter(price__gte=min_price)
+        if max_price is not None:
+            queryset = queryset.filter(price__lte=max_price)
+
+        if _parse_flag(request, 'in_stock'):
+            # Must stay `> 0` to match the partial index's condition
+            queryset = queryset.filter(stock_quantity__gt=0)
+
+        if _parse_flag(request, 'liked'):
+            if is_public_request(request):
+                raise ValidationError({'liked': 'Cannot be combined with public=true.'})
+            if not request.user.is_authenticated:
+                raise NotAuthenticated('Log in to filter by liked products.')
+            queryset = queryset.filter(
+                id__in=LikedProduct.objects.filter(user=request.user).values('product_id')
+            )
+
+        return queryset
@@ -0,0 +1,87 @@
+# api/images.py
+
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .background import BackgroundExecutor
+from .caching import bump_catalog_version
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+# Longest edge (px) of each derivative; images are never upscaled
+VARIANT_SIZES = {'thumbnail': 320, 'medium': 800, 'large': 1600}
+
+# Encoder settings per output format
+VARIANT_FORMATS = {
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+}
+
+_executor = BackgroundExecutor('image-variants', max_workers=lambda: settings.IMAGE_PIPELINE_WORKERS)
+
+
+def variant_name(source_name, size, fmt):
+    """Storage name of one derivative, e.g. products/variants/lamp-thumbnail.webp"""
+    directory, filename = os.path.split(source_name)
+    stem = os.path.splitext(filename)[0]
+    extension = 'jpg' if fmt == 'jpeg' else fmt
+    return f'{directory}/variants/{stem}-{size}.{extension}'
+
+
+def generate_image_variants(product_id):
+    """
+    Renders every size/format derivative of a product's uploaded image and
+    records their storage names in Product.image_variants. Returns the stored
+    variants, or None if the product has no uploaded image.
+    """
+    product = Product.objects.only('id', 'image_file', 'image_variants').filter(pk=product_id).first()
+    if product is None or not product.image_file:
+        return None
+    source_name = product.image_file.name
+    storage = product.image_file.storage
+
+    with storage.open(source_name, 'rb') as source:
+        original = Image.open(source)
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ('RGB', 'L'):
+            original = original.convert('RGB')
+        original.load()
+
+    variants = {'source': source_name}
+    for size, max_edge in VARIANT_SIZES.items():
+        resized = original.copy()
+        resized.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        variants[size] = {}
+        for fmt, (pil_format, options) in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, **options)
+            name = variant_name(source_name, size, fmt)
+            if storage.exists(name):
+                storage.delete(name)
+            variants[size][fmt] = storage.save(name, ContentFile(buffer.getvalue()))
+
+    # update() rather than save(): only this column changes, and it must not
+    # re-run the product signals (AI tags, search and vector indexing). The
+    # image_file condition drops the result if the image was replaced meanwhile.
+    updated = Product.objects.filter(pk=product_id, image_file=source_name).update(image_variants=variants)
+    if updated:
+        bump_catalog_version(product_id)
+    return variants
+
+
+def _run_image_variants(product_id):
+    try:
+        generate_image_variants(product_id)
+    except Exception as e:
+        logger.error(f"Failed to generate image variants for product {product_id}: {e}", exc_info=True)
+
+
+def schedule_image_variants(product_id):
+    """Queues derivative generation on the worker pool, off the request path."""
+    return _executor.submit(_run_image_variants, product_id)
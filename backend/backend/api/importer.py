@@ -0,0 +1,269 @@
+# api/importer.py
+
+import csv
+import itertools
+import json
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+
+from .background import BackgroundExecutor
+from .caching import bump_catalog_version, invalidate_recommendations
+from .facets import invalidate_category_facets
+from .indexing import enqueue_vector_index
+from .models import Product, ProductImportJob
+from .search import refresh_search_vectors
+from .serializers import ProductImportRowSerializer
+from .tags import generate_ai_tags, sync_tags_for_products
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+
+DEFAULT_BATCH_SIZE = 500
+
+# Rejected rows kept on the job for reporting; the rest are only counted
+MAX_RECORDED_ERRORS = 100
+
+# One import at a time, so concurrent uploads don't fight over the same rows
+_executor = BackgroundExecutor('product-import', max_workers=1)
+
+
+def import_storage():
+    """Private storage for uploaded import files (PRODUCT_IMPORT_ROOT, outside MEDIA_ROOT)."""
+    return FileSystemStorage(location=settings.PRODUCT_IMPORT_ROOT)
+
+
+def save_import_upload(upload):
+    """Stores an uploaded import file and returns the absolute path to give its job."""
+    storage = import_storage()
+    return storage.path(storage.save(upload.name, upload))
+
+
+def discard_import_upload(path):
+    """Deletes a finished job's file, if it's an upload stored by save_import_upload."""
+    storage = import_storage()
+    root = Path(storage.location).resolve()
+    path = Path(path).resolve()
+    if root in path.parents:
+        storage.delete(str(path.relative_to(root)))
+
+
+def infer_format(path):
+    """'csv' or 'jsonl' from a file name, or None if the extension isn't recognised."""
+    extension = path.rsplit('.', 1)[-1].lower() if '.' in path else ''
+    return {'csv': 'csv', 'jsonl': 'jsonl', 'ndjson': 'jsonl'}.get(extension)
+
+
+def iter_import_rows(stream, file_format):
+    """
+    Yields one dict per source row, reading the text stream incrementally.
+    Blank CSV cells are dropped so the model defaults apply; a JSON Lines row
+    that isn't an object is yielded as None so it's counted as a failure.
+    """
+    if file_format == 'csv':
+        for row in csv.DictReader(stream):
+            yield {key.strip(): value for key, value in row.items() if key and value not in (None, '')}
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+
+def _validate_row(row):
+    """Returns (product_id, validated_data, errors) for one source row."""
+    if row is None:
+        return None, None, {'row': ['Not a valid JSON object.']}
+    product_id = row.get('id')
+    if product_id not in (None, ''):
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            return None, None, {'id': ['A valid integer is required.']}
+    else:
+        product_id = None
+    # Rows with an `id` update that product and may carry only the changed columns
+    serializer = ProductImportRowSerializer(data=row, partial=product_id is not None)
+    if not serializer.is_valid():
+        # Plain strings rather than ErrorDetail, as they'll read back from the JSONField
+        return product_id, None, json.loads(json.dumps(serializer.errors))
+    return product_id, serializer.validated_data, None
+
+
+def _write_batch(job, batch, first_row_number):
+    """
+    Validates and writes one batch with bulk_create/bulk_update, which skip the
+    per-row Product signals. The writes, the job's counters and its checkpoint
+    are committed together, so a resumed import never applies a row twice.
+    Returns the IDs of the products written.
+    """
+    to_create, updates, errors = [], {}, []
+    update_rows = {}
+    for row_number, row in enumerate(batch, start=first_row_number):
+        product_id, data, row_errors = _validate_row(row)
+        if row_errors:
+            errors.append({'row': row_number, 'errors': row_errors})
+        elif product_id is None:
+            to_create.append(Product(**data))
+        else:
+            # A later row for the same product wins, as it would row by row
+            updates.setdefault(product_id, {}).update(data)
+            update_rows.setdefault(product_id, []).append(row_number)
+
+    existing = Product.objects.defer('search_vector').in_bulk(list(updates))
+    to_update = []
+    update_fields = set()
+    previous_categories = set()
+    for product_id, data in updates.items():
+        product = existing.get(product_id)
+        if product is None:
+            errors.extend(
+                {'row': row_number, 'errors': {'id': [f'Product {product_id} does not exist.']}}
+                for row_number in update_rows[product_id]
+            )
+            continue
+        previous_categories.add(product.category)
+        for field, value in data.items():
+            setattr(product, field, value)
+        update_fields.update(data)
+        to_update.append(product)
+
+    with transaction.atomic():
+        created = Product.objects.bulk_create(to_create)
+        if to_update:
+            # bulk_update() doesn't apply auto_now, so stamp updated_at ourselves
+            now = timezone.now()
+            for product in to_update:
+                product.updated_at = now
+            Product.objects.bulk_update(to_update, sorted(update_fields | {'updated_at'}))
+        written_ids = [product.id for product in created] + [product.id for product in to_update]
+
+        job.rows_processed += len(batch)
+        job.created_count += len(created)
+        job.updated_count += len(to_update)
+        job.failed_count += len(errors)
+        job.errors = (job.errors + errors)[:MAX_RECORDED_ERRORS]
+        job.pending_followup_ids = written_ids
+        job.save(update_fields=[
+            'rows_processed', 'created_count', 'updated_count', 'failed_count',
+            'errors', 'pending_followup_ids', 'updated_at',
+        ])
+    # Products moved out of a category drop its cached recommendations too
+    if previous_categories:
+        invalidate_recommendations(*previous_categories)
+    return written_ids
+
+
+def run_import_followups(product_ids):
+    """
+    The side effects the Product post_save signal would have run per row,
+    done once per batch instead: AI tags for untagged products, search
+    vectors, ProductTag rows, queueing for the vector index, and cache invalidation.
+    A failing step is logged and doesn't stop the others.
+    """
+    if not product_ids:
+        return
+    products = list(Product.objects.defer('search_vector').filter(id__in=product_ids))
+
+    untagged = [product for product in products if not product.ai_tags]
+    if untagged:
+        try:
+            tags_by_id = generate_ai_tags(untagged)
+            tagged = []
+            for product in untagged:
+                if product.id in tags_by_id:
+                    product.ai_tags = tags_by_id[product.id]
+                    tagged.append(product)
+            Product.objects.bulk_update(tagged, ['ai_tags'])
+        except Exception as e:
+            logger.error(f"Failed to generate AI tags for {len(untagged)} imported products: {e}")
+
+    try:
+        refresh_search_vectors(Product.objects.filter(id__in=product_ids))
+    except Exception as e:
+        logger.error(f"Failed to refresh search vectors for imported products: {e}")
+    try:
+        sync_tags_for_products(products)
+    except Exception as e:
+        logger.error(f"Failed to sync tags for imported products: {e}")
+    try:
+        # Embedded by the vector-index worker (api/indexing.py), like any other product save
+        enqueue_vector_index('product', product_ids)
+    except Exception as e:
+        logger.error(f"Failed to queue imported products for vector indexing: {e}")
+
+    invalidate_recommendations(*{product.category for product in products})
+    invalidate_category_facets()
+    bump_catalog_version(*product_ids)
+
+
+def run_import(job, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Runs (or resumes) an import job. Rows before the job's checkpoint are
+    skipped, and follow-ups left over from an interrupted batch run first.
+    `progress`, if given, is called with the job after every batch.
+    """
+    job.status = 'running'
+    job.save(update_fields=['status', 'updated_at'])
+    try:
+        if job.pending_followup_ids:
+            run_import_followups(job.pending_followup_ids)
+            job.pending_followup_ids = []
+            job.save(update_fields=['pending_followup_ids', 'updated_at'])
+
+        with open(job.source_path, encoding='utf-8-sig', newline='') as stream:
+            rows = itertools.islice(iter_import_rows(stream, job.file_format), job.rows_processed, None)
+            while True:
+                batch = list(itertools.islice(rows, batch_size))
+                if not batch:
+                    break
+                # Row numbers are 1-based, counting data rows only
+                written_ids = _write_batch(job, batch, job.rows_processed + 1)
+                run_import_followups(written_ids)
+                job.pending_followup_ids = []
+                job.save(update_fields=['pending_followup_ids', 'updated_at'])
+                if progress:
+                    progress(job)
+    except Exception as e:
+        logger.error(f"Product import {job.id} failed after {job.rows_processed} rows: {e}", exc_info=True)
+        job.status = 'failed'
+        job.errors = (job.errors + [{'row': None, 'errors': {'import': [str(e)]}}])[:MAX_RECORDED_ERRORS + 1]
+        job.save(update_fields=['status', 'errors', 'updated_at'])
+        raise
+
+    job.status = 'completed'
+    job.save(update_fields=['status', 'updated_at'])
+    # A failed job keeps its file so it can be resumed; a completed one can't be
+    try:
+        discard_import_upload(job.source_path)
+    except OSError as e:
+        logger.warning(f"Could not delete the upload for product import {job.id}: {e}")
+    return job
+
+
+def _run_import_in_background(job_id, batch_size):
+    try:
+        # Queued imports run one at a time, so a job resumed while it was still
+        # running is picked up again only after the first run has finished
+        job = ProductImportJob.objects.get(pk=job_id)
+        if job.status != 'completed':
+            run_import(job, batch_size)
+    except ProductImportJob.DoesNotExist:
+        logger.error(f"Product import {job_id} no longer exists.")
+    except Exception:
+        # Already logged and recorded on the job by run_import
+        pass
+
+
+def schedule_import(job, batch_size=DEFAULT_BATCH_SIZE):
+    """Queues the import on the background worker, off the request path."""
+    return _executor.submit(_run_import_in_background, job.pk, batch_size)
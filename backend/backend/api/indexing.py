@@ -0,0 +1,171 @@
+# api/indexing.py
+
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import vector_db
+from .background import release_worker_connection
+from .models import Order, Product, VectorIndexTask
+
+logger = logging.getLogger(__name__)
+
+# Columns _product_document() reads; nothing else is loaded for indexing
+PRODUCT_INDEX_COLUMNS = ('id', 'name', 'category', 'price', 'description')
+
+
+def enqueue_vector_index(kind, object_ids, action='upsert'):
+    """
+    Records that these products/orders need (re)indexing or removing from the
+    vector DB, and wakes the in-process worker. Objects already queued are
+    coalesced into their existing row, with the latest action winning. A row
+    a worker is processing keeps its claim: the worker sees the new token,
+    leaves the row queued and releases it for the next pass.
+    Called from transaction.on_commit, so workers never see uncommitted data.
+    """
+    now = timezone.now()
+    VectorIndexTask.objects.bulk_create(
+        [
+            VectorIndexTask(kind=kind, object_id=object_id, action=action, token=uuid.uuid4(), enqueued_at=now)
+            for object_id in set(object_ids)
+        ],
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['action', 'token', 'enqueued_at', 'attempts', 'last_error'],
+    )
+    if settings.VECTOR_INDEX_IN_PROCESS:
+        _wake_worker()
+
+
+def _index_products(upsert_ids, delete_ids):
+    products = list(Product.objects.only(*PRODUCT_INDEX_COLUMNS).filter(id__in=upsert_ids))
+    # Deleted since they were queued
+    delete_ids = set(delete_ids) | (set(upsert_ids) - {product.id for product in products})
+    vector_db.index_products(products)
+    vector_db.delete_products_from_index(sorted(delete_ids))
+
+
+def _index_orders(upsert_ids, delete_ids):
+    orders = list(Order.objects.filter(id__in=upsert_ids).prefetch_related('items__product'))
+    delete_ids = set(delete_ids) | (set(upsert_ids) - {order.id for order in orders})
+    vector_db.index_orders(orders)
+    vector_db.delete_orders_from_index(sorted(delete_ids))
+
+
+INDEXERS = {'product': _index_products, 'order': _index_orders}
+
+
+def process_vector_index_batch(tasks):
+    """
+    Embeds and upserts (or deletes) one batch of queued tasks, one model call
+    and one Chroma request per kind. Processed rows are removed unless they
+    were re-queued meanwhile; failed ones are kept for a later retry.
+    """
+    for kind, indexer in INDEXERS.items():
+        kind_tasks = [task for task in tasks if task.kind == kind]
+        if not kind_tasks:
+            continue
+        tokens = [task.token for task in kind_tasks]
+        try:
+            indexer(
+                [task.object_id for task in kind_tasks if task.action == 'upsert'],
+                [task.object_id for task in kind_tasks if task.action == 'delete'],
+            )
+        except Exception as e:
+            logger.error(f"Vector indexing failed for {len(kind_tasks)} queued {kind}s: {e}")
+            VectorIndexTask.objects.filter(token__in=tokens).update(
+                attempts=F('attempts') + 1, last_error=str(e)[:1000]
+            )
+            continue
+        VectorIndexTask.objects.filter(token__in=tokens).delete()
+
+
+def claim_vector_index_batch(batch_size, after_id=0):
+    """
+    Claims up to `batch_size` unclaimed tasks after `after_id`, oldest first,
+    in a short transaction: the rows are locked (skipping any another worker is
+    claiming) only long enough to stamp them with a claim ID. Embedding then
+    runs with no locks held, so enqueue_vector_index() never waits on it.
+    Returns (claim ID, tasks).
+    """
+    claim = uuid.uuid4()
+    now = timezone.now()
+    expired = now - timedelta(seconds=settings.VECTOR_INDEX_CLAIM_TIMEOUT)
+    with transaction.atomic():
+        tasks = list(
+            VectorIndexTask.objects.select_for_update(skip_locked=True)
+            .filter(id__gt=after_id, attempts__lt=settings.VECTOR_INDEX_MAX_ATTEMPTS)
+            .filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired))
+            .order_by('id')[:batch_size]
+        )
+        VectorIndexTask.objects.filter(id__in=[task.id for task in tasks]).update(claimed_at=now, claimed_by=claim)
+    return claim, tasks
+
+
+def release_vector_index_claim(claim):
+    """Makes rows still held by a claim (failed or re-queued meanwhile) available to workers again."""
+    VectorIndexTask.objects.filter(claimed_by=claim).update(claimed_at=None, claimed_by=None)
+
+
+def drain_vector_index(batch_size=None):
+    """
+    Processes every queued task once, oldest first, in batches of `batch_size`.
+    Every web process drains the outbox, so each batch is claimed first and
+    other drainers skip it. Tasks that have failed VECTOR_INDEX_MAX_ATTEMPTS
+    times are left for inspection. Returns the number of tasks processed.
+    """
+    batch_size = batch_size or settings.VECTOR_INDEX_BATCH_SIZE
+    processed, last_id = 0, 0
+    while True:
+        claim, tasks = claim_vector_index_batch(batch_size, last_id)
+        if not tasks:
+            return processed
+        try:
+            process_vector_index_batch(tasks)
+        finally:
+            release_vector_index_claim(claim)
+        processed += len(tasks)
+        last_id = tasks[-1].id
+
+
+# ==========================================================
+# --- IN-PROCESS WORKER ---
+# ==========================================================
+# The embedded Chroma store can't be shared between processes, so by default
+# each web process drains the outbox on a daemon thread. Deployments that run
+# `run_vector_indexer` as the only writer set VECTOR_INDEX_IN_PROCESS=False.
+
+_wakeup = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _worker_loop():
+    while True:
+        # Also wakes periodically to retry failures and pick up tasks left by a restart
+        _wakeup.wait(timeout=settings.VECTOR_INDEX_POLL_SECONDS)
+        # Let a burst of saves land first so they share one batch
+        time.sleep(settings.VECTOR_INDEX_COALESCE_SECONDS)
+        _wakeup.clear()
+        try:
+            drain_vector_index()
+        except Exception as e:
+            logger.error(f"Vector index worker failed: {e}", exc_info=True)
+        finally:
+            release_worker_connection()
+
+
+def _wake_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_worker_loop, name='vector-indexer', daemon=True)
+            _worker.start()
+    _wakeup.set()
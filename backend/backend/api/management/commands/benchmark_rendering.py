@@ -0,0 +1,72 @@
+# api/management/commands/benchmark_rendering.py
+
+import gzip
+import random
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from api.models import Product
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import ProductReadSerializer
+
+CATEGORIES = ['Electronics', 'Apparel', 'Books', 'Home Goods', 'Sports & Outdoors', 'Groceries']
+
+
+class Command(BaseCommand):
+    help = """
+    Benchmarks rendering a large ProductReadSerializer payload: DRF's stdlib
+    JSONRenderer against the orjson-backed FastJSONRenderer, plus gzipped size.
+    Products are built in memory; the database is not touched.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=5000, help='Products in the payload.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per renderer (best is reported).')
+
+    def handle(self, *args, **options):
+        random.seed(42)
+        request = Request(APIRequestFactory().get('/api/products/'))
+        products = [
+            Product(
+                id=i,
+                name=f'Product {i}',
+                category=random.choice(CATEGORIES),
+                price=Decimal(random.randint(100, 50_000)) / 100,
+                description='A dependable everyday product. ' * random.randint(2, 12),
+                stock_quantity=random.randint(0, 200),
+                image_url=f'https://cdn.example.com/products/{i}.jpg',
+                seo_keywords='quality, value, bestseller',
+            )
+            for i in range(1, options['products'] + 1)
+        ]
+
+        start = time.perf_counter()
+        data = ProductReadSerializer(products, many=True, context={'request': request}).data
+        self.stdout.write(self.style.HTTP_INFO(
+            f"--- {len(products):,} products (serialized in {(time.perf_counter() - start) * 1000:.1f} ms) ---"
+        ))
+        if orjson is None:
+            self.stdout.write(self.style.NOTICE("orjson is not installed; FastJSONRenderer falls back to the stdlib."))
+
+        results = {}
+        for label, renderer in [('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())]:
+            best = None
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                body = renderer.render(data, 'application/json')
+                elapsed = (time.perf_counter() - start) * 1000
+                best = elapsed if best is None else min(best, elapsed)
+            results[label] = (best, body)
+            self.stdout.write(
+                f"  {label:<17} {best:8.1f} ms | {len(body):>10,} bytes | gzip {len(gzip.compress(body)):>9,} bytes"
+            )
+
+        baseline, fast = results['JSONRenderer'], results['FastJSONRenderer']
+        if baseline[1] != fast[1]:
+            self.stdout.write(self.style.WARNING("  Rendered bodies differ between renderers."))
+        self.stdout.write(self.style.SUCCESS(
+            f"  Render speedup {baseline[0] / fast[0] if fast[0] else float('inf'):.1f}x"
+        ))
@@ -0,0 +1,93 @@
+# api/management/commands/benchmark_search.py
+
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from api.models import Product
+from api.search import (
+    full_text_search_available,
+    keyword_search_products,
+    refresh_search_vectors,
+    search_products,
+)
+
+WORDS = [
+    'wireless', 'bluetooth', 'cotton', 'leather', 'organic', 'running', 'waterproof', 'ergonomic',
+    'portable', 'vintage', 'premium', 'compact', 'gaming', 'travel', 'kitchen', 'outdoor',
+    'headphones', 'jacket', 'sneakers', 'backpack', 'lamp', 'blender', 'mouse', 'tent',
+    'coffee', 'chocolate', 'yoga', 'camera', 'charger', 'bottle', 'blanket', 'keyboard',
+]
+CATEGORIES = ['Electronics', 'Apparel', 'Books', 'Home Goods', 'Sports & Outdoors', 'Groceries']
+QUERIES = ['wireless headphones', 'waterproof running jacket', 'organic coffee', 'ergonomic gaming keyboard']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = """
+    Benchmarks product search: the legacy icontains matcher against the full-text backend.
+    Synthetic products are inserted inside a transaction that is rolled back afterwards.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10_000, 100_000, 1_000_000],
+                            help='Catalog sizes to benchmark.')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed runs per query (best is reported).')
+
+    def handle(self, *args, **options):
+        if not full_text_search_available():
+            raise CommandError("Full-text search needs PostgreSQL; point DATABASE_URL at a PostgreSQL database.")
+
+        random.seed(42)
+        for size in sorted(options['sizes']):
+            try:
+                with transaction.atomic():
+                    self.stdout.write(self.style.HTTP_INFO(f"--- {size:,} products ---"))
+                    self.populate(size)
+                    self.run_queries(options['repeat'])
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+    def populate(self, size):
+        start = time.time()
+        batch = []
+        for i in range(size - Product.objects.count()):
+            batch.append(Product(
+                name=' '.join(random.sample(WORDS, 3)).title(),
+                category=random.choice(CATEGORIES),
+                price=random.randint(100, 50_000) / 100,
+                seo_keywords=', '.join(random.sample(WORDS, 3)),
+                ai_tags=', '.join(random.sample(WORDS, 8)),
+            ))
+            if len(batch) == 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Product.objects.bulk_create(batch)
+        refresh_search_vectors(Product.objects.all())
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE api_product')
+        self.stdout.write(f"  Seeded in {time.time() - start:.1f}s")
+
+    def time_query(self, build, query, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            # Fetch the first page, as the tag-search endpoint would
+            list(build(Product.objects.all(), query)[:24])
+            elapsed = (time.perf_counter() - start) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def run_queries(self, repeat):
+        for query in QUERIES:
+            legacy_ms = self.time_query(keyword_search_products, query, repeat)
+            fts_ms = self.time_query(search_products, query, repeat)
+            self.stdout.write(
+                f"  '{query}': icontains {legacy_ms:8.1f} ms | full-text {fts_ms:8.1f} ms "
+                f"| speedup {legacy_ms / fts_ms if fts_ms else float('inf'):.1f}x"
+            )
@@ -0,0 +1,65 @@
+# api/management/commands/benchmark_serialization.py
+
+import random
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from api.models import Product
+from api.serializers import ProductReadSerializer
+
+CATEGORIES = ['Electronics', 'Apparel', 'Books', 'Home Goods', 'Sports & Outdoors', 'Groceries']
+
+
+class Command(BaseCommand):
+    help = """
+    Benchmarks ProductReadSerializer against its .values()-style fast path
+    (ProductReadSerializer.fast_data) on in-memory products, and checks the
+    two produce identical output. The database is not touched.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=5000, help='Products per run.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per path (best is reported).')
+
+    def handle(self, *args, **options):
+        random.seed(42)
+        request = Request(APIRequestFactory().get('/api/products/'))
+        products = [
+            Product(
+                id=i,
+                name=f'Product {i}',
+                category=random.choice(CATEGORIES),
+                price=Decimal(random.randint(100, 50_000)) / 100,
+                description=random.choice(['', 'A dependable everyday product.']),
+                stock_quantity=random.randint(0, 200),
+                image_url=f'https://cdn.example.com/products/{i}.jpg' if i % 2 else None,
+                image_file=None if i % 2 else f'products/{i}.jpg',
+                seo_keywords='quality, value, bestseller',
+            )
+            for i in range(1, options['products'] + 1)
+        ]
+
+        paths = {
+            'ProductReadSerializer': lambda: ProductReadSerializer(products, many=True, context={'request': request}).data,
+            'fast_data': lambda: ProductReadSerializer.fast_data(products, request),
+        }
+        self.stdout.write(self.style.HTTP_INFO(f"--- {len(products):,} products ---"))
+        results = {}
+        for label, serialize in paths.items():
+            best = None
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                data = serialize()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results[label] = (best, data)
+            self.stdout.write(
+                f"  {label:<22} {best * 1000:8.1f} ms | {len(products) / best:>12,.0f} products/s"
+            )
+
+        baseline, fast = results['ProductReadSerializer'], results['fast_data']
+        if [dict(item) for item in baseline[1]] != fast[1]:
+            self.stdout.write(self.style.WARNING("  Outputs differ between the two paths."))
+        self.stdout.write(self.style.SUCCESS(f"  Speedup {baseline[0] / fast[0]:.1f}x"))
@@ -0,0 +1,120 @@
+# api/management/commands/build_copurchase_matrix.py
+
+import time
+import numpy as np
+from scipy import sparse
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api.caching import bump_catalog_version
+from api.models import OrderItem, ProductNeighbor
+
+# Order items are streamed from the database in chunks of this many rows
+CHUNK_SIZE = 50_000
+
+
+class Command(BaseCommand):
+    help = """
+    Builds the "frequently bought together" table (ProductNeighbor) from OrderItem.
+    Orders x products are loaded into a sparse binary matrix, the item-item
+    co-occurrence matrix is computed with one sparse product, normalized to
+    cosine similarity, and the top-K neighbours of every product are stored.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=10, help='Neighbours kept per product.')
+        parser.add_argument('--min-support', type=int, default=1,
+                            help='Minimum number of shared orders for a pair to count.')
+        parser.add_argument('--every', type=int, default=0,
+                            help='Rebuild every N minutes instead of running once.')
+
+    def handle(self, *args, **options):
+        while True:
+            self.build(options['top_k'], options['min_support'])
+            if not options['every']:
+                break
+            self.stdout.write(f"Sleeping {options['every']} minutes until the next rebuild...")
+            time.sleep(options['every'] * 60)
+
+    def load_order_items(self):
+        """Streams (order_id, product_id) pairs into two int64 arrays."""
+        rows = OrderItem.objects.values_list('order_id', 'product_id').order_by()
+        order_chunks, product_chunks = [], []
+        buffer = []
+        for pair in rows.iterator(chunk_size=CHUNK_SIZE):
+            buffer.append(pair)
+            if len(buffer) == CHUNK_SIZE:
+                chunk = np.array(buffer, dtype=np.int64)
+                order_chunks.append(chunk[:, 0])
+                product_chunks.append(chunk[:, 1])
+                buffer = []
+        if buffer:
+            chunk = np.array(buffer, dtype=np.int64)
+            order_chunks.append(chunk[:, 0])
+            product_chunks.append(chunk[:, 1])
+        if not order_chunks:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(order_chunks), np.concatenate(product_chunks)
+
+    def build(self, top_k, min_support):
+        start = time.time()
+        self.stdout.write(self.style.HTTP_INFO("--- Building co-purchase matrix ---"))
+
+        order_ids, product_ids = self.load_order_items()
+        if not len(order_ids):
+            self.stdout.write(self.style.NOTICE("No order items found."))
+            return
+
+        # Map database IDs onto dense row/column indices
+        _, order_index = np.unique(order_ids, return_inverse=True)
+        product_keys, product_index = np.unique(product_ids, return_inverse=True)
+
+        # Binary orders x products matrix (a product bought twice in one order counts once)
+        baskets = sparse.csr_matrix(
+            (np.ones(len(order_index), dtype=np.float32), (order_index, product_index)),
+            shape=(order_index.max() + 1, len(product_keys)),
+        )
+        baskets.sum_duplicates()
+        baskets.data[:] = 1
+
+        # Item-item co-occurrence counts, then cosine normalization
+        co_counts = (baskets.T @ baskets).tocsr()
+        co_counts.setdiag(0)
+        co_counts.eliminate_zeros()
+        if min_support > 1:
+            co_counts.data[co_counts.data < min_support] = 0
+            co_counts.eliminate_zeros()
+
+        # Number of orders containing each product; never zero for a column that exists
+        order_counts = np.asarray(baskets.sum(axis=0)).ravel()
+        norms = np.sqrt(order_counts)
+        similarity = sparse.diags(1 / norms) @ co_counts @ sparse.diags(1 / norms)
+        similarity = similarity.tocsr()
+
+        neighbors = []
+        for row in range(similarity.shape[0]):
+            start_ptr, end_ptr = similarity.indptr[row], similarity.indptr[row + 1]
+            if start_ptr == end_ptr:
+                continue
+            cols = similarity.indices[start_ptr:end_ptr]
+            scores = similarity.data[start_ptr:end_ptr]
+            # Best score first, ties broken by product ID, including at the top-K cut-off
+            order = np.lexsort((product_keys[cols], -scores))[:top_k]
+            for rank, position in enumerate(order):
+                neighbors.append(ProductNeighbor(
+                    product_id=int(product_keys[row]),
+                    neighbor_id=int(product_keys[cols[position]]),
+                    score=float(scores[position]),
+                    rank=rank,
+                ))
+
+        # Swap the whole table atomically so readers never see a half-built matrix
+        with transaction.atomic():
+            ProductNeighbor.objects.all().delete()
+            ProductNeighbor.objects.bulk_create(neighbors, batch_size=5000)
+        # `?mode=copurchase` recommendations changed, so their ETags must too
+        bump_catalog_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {len(neighbors)} neighbours for {len(product_keys)} products "
+            f"from {len(order_ids)} order items in {time.time() - start:.2f} seconds."
+        ))
@@ -0,0 +1,38 @@
+# api/management/commands/export_data.py
+
+import os
+import sys
+import time
+from django.core.management.base import BaseCommand
+from api.exports import EXPORT_CHUNK_SIZE, EXPORT_DATASETS, EXPORT_FORMATS, iter_export
+
+
+class Command(BaseCommand):
+    help = """
+    Exports products, orders or order items as NDJSON or CSV. Rows are streamed
+    from the database in chunks, so memory use doesn't grow with the table.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(EXPORT_DATASETS))
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--output', '-o', help='File to write; defaults to standard output.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Rows fetched from the database per round trip.')
+
+    def handle(self, *args, **options):
+        start = time.time()
+        chunks = iter_export(options['dataset'], options['format'], options['chunk_size'])
+        if not options['output']:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
+            return
+
+        with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        written = os.path.getsize(options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {options['dataset']} to {options['output']} "
+            f"({written / 1_048_576:.1f} MB) in {time.time() - start:.2f} seconds."
+        ))
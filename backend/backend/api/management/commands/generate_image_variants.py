@@ -0,0 +1,29 @@
+# api/management/commands/generate_image_variants.py
+
+from concurrent.futures import as_completed
+from django.core.management.base import BaseCommand
+from api.images import schedule_image_variants
+from api.models import Product
+
+class Command(BaseCommand):
+    help = 'Generates thumbnail/medium/large JPEG and WebP variants for uploaded product images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Regenerate every product, not only those missing up-to-date variants.')
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image_file='').exclude(image_file__isnull=True)
+        product_ids = [
+            product.id for product in products.only('id', 'image_file', 'image_variants')
+            if options['all'] or product.image_variants.get('source') != product.image_file.name
+        ]
+        self.stdout.write(self.style.NOTICE(f'Generating image variants for {len(product_ids)} products...'))
+
+        # Runs on the same worker pool as uploads; failures are logged per product
+        futures = [schedule_image_variants(product_id) for product_id in product_ids]
+        for done, _ in enumerate(as_completed(futures), start=1):
+            if done % 50 == 0:
+                self.stdout.write(f'  {done}/{len(futures)} done')
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {len(product_ids)} products.'))
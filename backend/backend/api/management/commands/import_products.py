@@ -0,0 +1,67 @@
+# api/management/commands/import_products.py
+
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from api.importer import DEFAULT_BATCH_SIZE, IMPORT_FORMATS, infer_format, run_import
+from api.models import ProductImportJob
+
+
+class Command(BaseCommand):
+    help = """
+    Imports products from a CSV or JSON Lines file in batches. Rows with an `id`
+    column update that product; the rest are created. Tagging, search and vector
+    indexing run once per batch instead of once per row. An interrupted import
+    can be continued with --resume.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', help='CSV or JSON Lines file to import.')
+        parser.add_argument('--format', choices=IMPORT_FORMATS,
+                            help='File format; inferred from the extension by default.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Rows written per transaction.')
+        parser.add_argument('--resume', type=int, metavar='JOB_ID',
+                            help='Continue an earlier import from its last committed batch.')
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            job = ProductImportJob.objects.filter(pk=options['resume']).first()
+            if job is None:
+                raise CommandError(f"Import job {options['resume']} does not exist.")
+            if job.status == 'completed':
+                raise CommandError(f"Import job {job.id} has already completed.")
+            self.stdout.write(self.style.NOTICE(
+                f"Resuming import #{job.id} from row {job.rows_processed + 1} of {job.source_path}"
+            ))
+        else:
+            if not options['path']:
+                raise CommandError("A file path is required unless --resume is given.")
+            path = os.path.abspath(options['path'])
+            if not os.path.isfile(path):
+                raise CommandError(f"File not found: {path}")
+            file_format = options['format'] or infer_format(path)
+            if not file_format:
+                raise CommandError("Can't tell the file format from its extension; pass --format.")
+            job = ProductImportJob.objects.create(source_path=path, file_format=file_format)
+            self.stdout.write(self.style.NOTICE(f"Started import #{job.id} of {path}"))
+
+        start = time.time()
+
+        def report(job):
+            self.stdout.write(
+                f"  {job.rows_processed} rows | {job.created_count} created, {job.updated_count} updated, "
+                f"{job.failed_count} failed | {time.time() - start:.1f}s"
+            )
+
+        try:
+            run_import(job, options['batch_size'], progress=report)
+        except Exception as e:
+            raise CommandError(f"Import #{job.id} failed: {e}. Re-run with --resume {job.id} to continue.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Import #{job.id} completed: {job.created_count} created, {job.updated_count} updated, "
+            f"{job.failed_count} failed in {time.time() - start:.2f} seconds."
+        ))
+        for error in job.errors[:10]:
+            self.stdout.write(self.style.WARNING(f"  row {error['row']}: {error['errors']}"))
@@ -0,0 +1,26 @@
+# api/management/commands/refresh_bestsellers.py
+
+import time
+from django.core.management.base import BaseCommand
+from api.bestsellers import BESTSELLER_WINDOWS, refresh_bestseller_snapshot
+
+class Command(BaseCommand):
+    help = 'Rebuilds the cached bestseller snapshots so storefront requests never have to.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--window', choices=list(BESTSELLER_WINDOWS), action='append',
+                            help='Window(s) to refresh. Defaults to all of them.')
+        parser.add_argument('--every', type=int, default=0,
+                            help='Refresh every N seconds instead of running once.')
+
+    def handle(self, *args, **options):
+        windows = options['window'] or list(BESTSELLER_WINDOWS)
+        while True:
+            for window in windows:
+                snapshot = refresh_bestseller_snapshot(window)
+                self.stdout.write(self.style.SUCCESS(
+                    f"Refreshed '{window}' bestsellers snapshot ({len(snapshot['ids'])} products)."
+                ))
+            if not options['every']:
+                break
+            time.sleep(options['every'])
@@ -1,14 +1,23 @@
+import datetime
+import json
+import os
 import time
 from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
-# Import the vector_db module itself so we can access its global variables
+# Import the vector_db module itself so we can reach its lazily created client
 from api import vector_db
+from api.embedding_cache import get_embedding_cache
 from api.models import PolicyDocument
 
 class Command(BaseCommand):
     help = """
     Manages the ChromaDB vector database. 
     Can be used to clear and re-index all documents from the Django database.
+    Orders and products are streamed and indexed in batches; progress is
+    checkpointed after every batch, so an interrupted run can be continued
+    with --resume, and --since limits a run to recently changed rows.
     """
 
     def add_arguments(self, parser):
@@ -20,77 +29,142 @@ class Command(BaseCommand):
         parser.add_argument('--orders', action='store_true', help='Only re-index orders.')
         parser.add_argument('--products', action='store_true', help='Only re-index products.')
         parser.add_argument('--documents', action='store_true', help='Only re-index policy documents.')
+        parser.add_argument('--batch-size', type=int, default=vector_db.DEFAULT_REINDEX_BATCH_SIZE,
+                            help='Rows embedded and upserted per batch.')
+        parser.add_argument('--since', type=self.parse_since, metavar='TIMESTAMP',
+                            help='Only index rows changed at or after this ISO date/datetime '
+                                 '(orders by creation, products and documents by last update).')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue each collection from the last batch checkpointed by an interrupted run.')
+        parser.add_argument('--checkpoint', default=os.path.join(vector_db.CHROMA_PATH, 'reindex_checkpoint.json'),
+                            help='File where batch progress is recorded.')
+
+    @staticmethod
+    def parse_since(value):
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"Not an ISO date or datetime: {value}")
+            moment = datetime.datetime.combine(day, datetime.time.min)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return moment
+
+    # --- Checkpoints: {"orders": {"last_id": 1234, "indexed": 1200, "since": null}, ...} ---
+
+    def load_checkpoints(self):
+        try:
+            with open(self.checkpoint_path) as handle:
+                return json.load(handle)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def save_checkpoint(self, kind, state):
+        checkpoints = self.load_checkpoints()
+        if state is None:
+            checkpoints.pop(kind, None)
+        else:
+            checkpoints[kind] = state
+        os.makedirs(os.path.dirname(os.path.abspath(self.checkpoint_path)), exist_ok=True)
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, 'w') as handle:
+            json.dump(checkpoints, handle)
+        # Atomic, so a crash mid-write never corrupts the previous checkpoint
+        os.replace(temporary, self.checkpoint_path)
+
+    def index_collection(self, kind, index_all, options):
+        """Streams one collection through its batch indexer, checkpointing and reporting each batch."""
+        since = options['since']
+        start_after, already_indexed = None, 0
+        if options['resume']:
+            state = self.load_checkpoints().get(kind)
+            if state:
+                start_after, already_indexed = state['last_id'], state['indexed']
+                since = since or (state['since'] and self.parse_since(state['since']))
+                self.stdout.write(self.style.NOTICE(
+                    f"  Resuming {kind} after ID {start_after} ({already_indexed} already indexed)."
+                ))
+
+        started = time.time()
+
+        def progress(last_id, indexed):
+            self.save_checkpoint(kind, {
+                'last_id': last_id,
+                'indexed': already_indexed + indexed,
+                'since': since.isoformat() if since else None,
+            })
+            elapsed = time.time() - started
+            self.stdout.write(
+                f"  {already_indexed + indexed:,} {kind} indexed | {indexed / elapsed if elapsed else 0:,.1f}/s "
+                f"| last ID {last_id}"
+            )
+
+        count = index_all(batch_size=options['batch_size'], since=since, start_after=start_after, progress=progress)
+        # Finished: the next run starts from scratch
+        self.save_checkpoint(kind, None)
+        return already_indexed + count
 
     def handle(self, *args, **options):
         start_time = time.time()
         
         run_all = not (options['orders'] or options['products'] or options['documents'])
 
+        self.checkpoint_path = options['checkpoint']
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        if options['clear'] and (options['resume'] or options['since']):
+            raise CommandError("--clear rebuilds everything; it can't be combined with --resume or --since.")
+
         if options['clear']:
             self.stdout.write(self.style.WARNING("--- Option --clear specified. Deleting all ChromaDB collections... ---"))
-            try:
-                vector_db.client.delete_collection(name=vector_db.COLLECTION_NAME)
-                self.stdout.write(self.style.SUCCESS(f"  > Successfully deleted '{vector_db.COLLECTION_NAME}' collection."))
-            except Exception as e:
-                self.stdout.write(self.style.NOTICE(f"  > Could not delete '{vector_db.COLLECTION_NAME}' collection (it may not exist): {e}"))
-            
-            try:
-                vector_db.client.delete_collection(name=vector_db.PRODUCTS_COLLECTION_NAME)
-                self.stdout.write(self.style.SUCCESS(f"  > Successfully deleted '{vector_db.PRODUCTS_COLLECTION_NAME}' collection."))
-            except Exception as e:
-                self.stdout.write(self.style.NOTICE(f"  > Could not delete '{vector_db.PRODUCTS_COLLECTION_NAME}' collection (it may not exist): {e}"))
-
-            try:
-                vector_db.client.delete_collection(name=vector_db.DOCUMENTS_COLLECTION_NAME)
-                self.stdout.write(self.style.SUCCESS(f"  > Successfully deleted '{vector_db.DOCUMENTS_COLLECTION_NAME}' collection."))
-            except Exception as e:
-                self.stdout.write(self.style.NOTICE(f"  > Could not delete '{vector_db.DOCUMENTS_COLLECTION_NAME}' collection (it may not exist): {e}"))
+            client = vector_db.get_client()
+            if client is None:
+                raise CommandError("ChromaDB is not available.")
+            for name in (vector_db.COLLECTION_NAME, vector_db.PRODUCTS_COLLECTION_NAME, vector_db.DOCUMENTS_COLLECTION_NAME):
+                try:
+                    client.delete_collection(name=name)
+                    self.stdout.write(self.style.SUCCESS(f"  > Successfully deleted '{name}' collection."))
+                except Exception as e:
+                    self.stdout.write(self.style.NOTICE(f"  > Could not delete '{name}' collection (it may not exist): {e}"))
             self.stdout.write("\n")
 
-            # --- THIS IS THE CRITICAL FIX ---
-            # After deleting the collections, the global variables in vector_db.py are now stale.
-            # We must re-initialize them by calling get_or_create_collection again.
-            self.stdout.write(self.style.HTTP_INFO("Re-initializing collection objects..."))
-            vector_db.collection = vector_db.client.get_or_create_collection(
-                name=vector_db.COLLECTION_NAME,
-                metadata={"hnsw:space": "cosine"}
-            )
-            vector_db.products_collection = vector_db.client.get_or_create_collection(
-                name=vector_db.PRODUCTS_COLLECTION_NAME
-            )
-            vector_db.documents_collection = vector_db.client.get_or_create_collection(
-                name=vector_db.DOCUMENTS_COLLECTION_NAME,
-                metadata={"hnsw:space": "cosine"}
-            )
-            self.stdout.write(self.style.SUCCESS("Collections re-initialized.\n"))
+            # The cached collection handles now point at deleted collections;
+            # drop them so the indexers below recreate them on first use.
+            vector_db.reset_collections()
+            self.stdout.write(self.style.SUCCESS("Collections reset.\n"))
 
 
         self.stdout.write(self.style.HTTP_INFO("--- Starting VectorDB Re-indexing Process ---"))
+        embedding_cache = get_embedding_cache(vector_db.EMBEDDING_MODEL_NAME)
+        if embedding_cache:
+            embedding_cache.reset_stats()
 
         # Re-index Orders
         if run_all or options['orders']:
             self.stdout.write(self.style.HTTP_INFO("Indexing all orders..."))
             try:
-                # We now call the function directly from the imported module
-                count = vector_db.index_all_orders()
+                count = self.index_collection('orders', vector_db.index_all_orders, options)
                 self.stdout.write(self.style.SUCCESS(f"Successfully indexed {count} orders.\n"))
             except Exception as e:
-                raise CommandError(f"Failed to index orders: {e}")
+                raise CommandError(f"Failed to index orders: {e}. Re-run with --resume to continue from the last batch.")
 
         # Re-index Products
         if run_all or options['products']:
             self.stdout.write(self.style.HTTP_INFO("Indexing all products..."))
             try:
-                count = vector_db.index_all_products()
+                count = self.index_collection('products', vector_db.index_all_products, options)
                 self.stdout.write(self.style.SUCCESS(f"Successfully indexed {count} products.\n"))
             except Exception as e:
-                raise CommandError(f"Failed to index products: {e}")
+                raise CommandError(f"Failed to index products: {e}. Re-run with --resume to continue from the last batch.")
 
         # Re-index Policy Documents
         if run_all or options['documents']:
             self.stdout.write(self.style.HTTP_INFO("Indexing all policy documents..."))
             try:
                 docs = PolicyDocument.objects.all()
+                if options['since']:
+                    docs = docs.filter(updated_at__gte=options['since'])
                 if not docs.exists():
                     self.stdout.write(self.style.NOTICE("No policy documents found to index."))
                 else:
@@ -101,5 +175,12 @@ class Command(BaseCommand):
             except Exception as e:
                 raise CommandError(f"Failed to index policy documents: {e}")
         
+        if embedding_cache:
+            stats = embedding_cache.stats()
+            self.stdout.write(
+                f"Embedding cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"(hit ratio {stats['hit_ratio']:.1%}); only misses were sent to the model."
+            )
+
         end_time = time.time()
         self.stdout.write(self.style.SUCCESS(f"--- Re-indexing complete in {end_time - start_time:.2f} seconds ---"))
\ No newline at end of file
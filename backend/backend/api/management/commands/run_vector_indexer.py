@@ -0,0 +1,41 @@
+# api/management/commands/run_vector_indexer.py
+
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from api.indexing import drain_vector_index
+from api.models import VectorIndexTask
+
+
+class Command(BaseCommand):
+    help = """
+    Drains the vector-index outbox: products and orders queued by the save
+    signals are embedded and upserted into ChromaDB in batches. Runs until
+    stopped, or once with --once. When this is the only writer to the vector
+    DB, set VECTOR_INDEX_IN_PROCESS=False for the web processes.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.VECTOR_INDEX_BATCH_SIZE,
+                            help='Tasks embedded per model call.')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to wait between polls when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit.')
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.time()
+            processed = drain_vector_index(options['batch_size'])
+            if processed:
+                failing = VectorIndexTask.objects.exclude(attempts=0).count()
+                self.stdout.write(self.style.SUCCESS(
+                    f"Processed {processed} queued tasks in {time.time() - start:.2f} seconds "
+                    f"({failing} failing)."
+                ))
+            if options['once']:
+                if not processed:
+                    self.stdout.write(self.style.NOTICE("Vector index queue is empty."))
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -2,6 +2,7 @@
 
 import random
 from datetime import timedelta
+from django.core.management import call_command
 from django.core.management.base import BaseCommand  # <-- Make sure this is imported
 from django.utils import timezone
 from api.models import Product, Order, OrderItem, User
@@ -67,4 +68,7 @@ class Command(BaseCommand):
                     order.total_amount = order_total
                     order.save(update_fields=['total_amount'])
 
+        # Order items were written directly, so resync the per-product sales rollup
+        call_command('rebuild_total_sold', stdout=self.stdout)
+
         self.stdout.write(self.style.SUCCESS('Successfully seeded the database with historical orders.'))
\ No newline at end of file
@@ -0,0 +1,24 @@
+# api/management/commands/sync_product_tags.py
+
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from api.models import Product
+from api.tags import sync_tags_for_products
+
+BATCH_SIZE = 500
+
+class Command(BaseCommand):
+    help = 'Backfills the normalized ProductTag table from every product\'s comma-separated ai_tags.'
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(self.style.NOTICE('Syncing product tags...'))
+
+        # One SELECT, DELETE and INSERT per batch rather than per product
+        products = Product.objects.only('id', 'ai_tags').iterator(chunk_size=BATCH_SIZE)
+        count = 0
+        while batch := list(islice(products, BATCH_SIZE)):
+            sync_tags_for_products(batch)
+            count += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully synced tags for {count} products.'))
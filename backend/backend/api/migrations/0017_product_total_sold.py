@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:27
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_total_sold(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    OrderItem = apps.get_model('api', 'OrderItem')
+    sales = OrderItem.objects.values('product_id').annotate(sold=Sum('quantity'))
+    for row in sales:
+        Product.objects.filter(pk=row['product_id']).update(total_sold=row['sold'] or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_performancemetric'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='total_sold',
+            field=models.PositiveIntegerField(default=0, help_text='Total units sold across all orders'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['-total_sold', '-id'], name='product_total_sold_idx'),
+        ),
+        migrations.RunPython(backfill_total_sold, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_product_tags(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    ProductTag = apps.get_model('api', 'ProductTag')
+    rows = []
+    for product_id, ai_tags in Product.objects.exclude(ai_tags__isnull=True).values_list('id', 'ai_tags'):
+        names = {tag.strip().lower()[:100] for tag in ai_tags.split(',')} - {''}
+        rows.extend(ProductTag(product_id=product_id, name=name) for name in names)
+    ProductTag.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0018_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tags', to='api.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name', 'product'], name='producttag_name_product_idx')],
+                'unique_together': {('product', 'name')},
+            },
+        ),
+        migrations.RunPython(backfill_product_tags, migrations.RunPython.noop),
+    ]
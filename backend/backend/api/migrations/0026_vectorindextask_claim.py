@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0025_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vectorindextask',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vectorindextask',
+            name='claimed_by',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -1,6 +1,11 @@
 # api/models.py
 
+import uuid
+
 from django.db import models
+from django.utils import timezone
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import User
 
 class Product(models.Model):
@@ -13,11 +18,37 @@ class Product(models.Model):
     # Support both URL and file upload for images
     image_url = models.URLField(max_length=500, blank=True, null=True, help_text="URL to product image")
     image_file = models.ImageField(upload_to='products/', blank=True, null=True, help_text="Upload product image file")
+    # Resized JPEG/WebP derivatives of image_file, written by api/images.py:
+    # {"source": <image_file name>, "thumbnail": {"jpeg": <name>, "webp": <name>}, "medium": ..., "large": ...}
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     # AI fields
     seo_keywords = models.CharField(max_length=255, blank=True, null=True, help_text="AI-generated comma-separated SEO keywords")
     ai_tags = models.TextField(blank=True, null=True, help_text="AI-generated comma-separated tags for smart searching")
-    
+
+    # Sales rollup, maintained by OrderCreateSerializer.create and rebuilt by `rebuild_total_sold`
+    total_sold = models.PositiveIntegerField(default=0, help_text="Total units sold across all orders")
+
+    # Weighted full-text document (name, category, SEO keywords, AI tags), see api/search.py.
+    # Only populated on PostgreSQL; other databases fall back to keyword matching.
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
+    # Lets `reindex_vectordb --since` pick up only recently edited products
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Backs the catalog's default "bestselling first" ordering
+            models.Index(fields=['-total_sold', '-id'], name='product_total_sold_idx'),
+            GinIndex(fields=['search_vector'], name='product_search_vector_gin'),
+            # Back the list filters in api/filters.py: category (+ price range,
+            # + in-stock), price range alone, and in-stock only in the default order
+            models.Index(fields=['category', 'price', 'stock_quantity'], name='product_cat_price_stock_idx'),
+            models.Index(fields=['price'], name='product_price_idx'),
+            models.Index(fields=['-total_sold', '-id'], condition=models.Q(stock_quantity__gt=0),
+                         name='product_in_stock_idx'),
+        ]
+
     def __str__(self):
         return self.name
     
@@ -28,6 +59,23 @@ class Product(models.Model):
             return self.image_file.url
         return self.image_url
 
+class ProductTag(models.Model):
+    """
+    One normalized AI tag of a product. Mirrors the comma-separated
+    Product.ai_tags string so tag overlap can be computed with an indexed join.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='tags')
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = ('product', 'name')
+        indexes = [
+            models.Index(fields=['name', 'product'], name='producttag_name_product_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.product.name}: {self.name}'
+
 class LikedProduct(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='liked_products')
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
@@ -60,6 +108,24 @@ class OrderItem(models.Model):
     
 
 
+class ProductNeighbor(models.Model):
+    """
+    A precomputed "frequently bought together" neighbour of a product, built
+    offline by the `build_copurchase_matrix` command from OrderItem co-occurrence.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='copurchase_neighbors')
+    neighbor = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(help_text="Cosine similarity of the two products' order vectors")
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['product', 'rank']
+        unique_together = ('product', 'rank')
+
+    def __str__(self):
+        return f'{self.product_id} -> {self.neighbor_id} ({self.score:.3f})'
+
+
 class ChatThread(models.Model):
     THREAD_TYPE_CHOICES = [
         ('LIVE_SUPPORT', 'Live Support'),
@@ -182,4 +248,72 @@ class PerformanceMetric(models.Model):
     user_agent = models.TextField(blank=True, null=True)
 
     class Meta:
-        ordering = ['-timestamp']
\ No newline at end of file
+        ordering = ['-timestamp']
+
+class ProductImportJob(models.Model):
+    """
+    A bulk product import from a CSV or JSON Lines file (see api/importer.py).
+    Progress is checkpointed per batch, so a failed or interrupted import can be
+    resumed from the first row that wasn't committed.
+    """
+    FORMAT_CHOICES = [('csv', 'CSV'), ('jsonl', 'JSON Lines')]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    source_path = models.CharField(max_length=500, help_text="Absolute path of the file being imported")
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='product_imports')
+
+    # Checkpoint: source rows consumed by committed batches
+    rows_processed = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    updated_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    # Products written by the last committed batch whose tagging/indexing hasn't run yet
+    pending_followup_ids = models.JSONField(default=list, blank=True)
+    # The first few rejected rows: [{"row": <n>, "errors": {...}}]
+    errors = models.JSONField(default=list, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Product import #{self.id} ({self.status})"
+
+class VectorIndexTask(models.Model):
+    """
+    Outbox of products and orders whose vector-index entry is stale (see
+    api/indexing.py). There is at most one row per object: enqueuing it again
+    before a worker gets to it just refreshes the row, so a burst of saves
+    costs one embedding.
+    """
+    KIND_CHOICES = [('product', 'Product'), ('order', 'Order')]
+    ACTION_CHOICES = [('upsert', 'Upsert'), ('delete', 'Delete')]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, default='upsert')
+    # Changes on every enqueue, so a worker only removes the row it actually processed
+    token = models.UUIDField(default=uuid.uuid4)
+    enqueued_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    # Set while a worker is processing the row; other workers skip it until the claim expires
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    claimed_by = models.UUIDField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='vector_index_task_object_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.kind} {self.object_id}"
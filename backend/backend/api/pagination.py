@@ -0,0 +1,147 @@
+# api/pagination.py
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over the queryset's own ORDER BY.
+
+    The cursor stores the ordering values of the last row on the page, and the
+    next page is fetched with a lexicographic WHERE on those values, e.g. for
+    ('-total_sold', '-id'):  total_sold < x OR (total_sold = x AND id < y).
+    Every page is therefore an index range scan, no matter how deep the client
+    has paged, unlike OFFSET which re-reads every skipped row.
+
+    Every request gets a page: PRODUCT_PAGE_SIZE rows unless the client asks
+    for `page_size`, which is capped at `max_page_size`, so no request reads
+    the whole catalog.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_default_page_size(self):
+        return getattr(settings, 'PRODUCT_PAGE_SIZE', 24)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.get_default_page_size()))
+        except (TypeError, ValueError):
+            page_size = self.get_default_page_size()
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_ordering(self, queryset):
+        ordering = [str(field) for field in queryset.query.order_by]
+        if not ordering:
+            raise ValueError("Keyset pagination requires an explicitly ordered queryset.")
+        return ordering
+
+    def encode_cursor(self, values):
+        raw = json.dumps(values, default=str).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    def decode_cursor(self, request, expected_length):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound("Invalid cursor")
+        if not isinstance(values, list) or len(values) != expected_length:
+            raise NotFound("Invalid cursor")
+        return values
+
+    def get_ordering_field(self, queryset, name):
+        """The model field or annotation output field an ordering name refers to, if any."""
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        try:
+            return queryset.model._meta.get_field(queryset.model._meta.pk.name if name == 'pk' else name)
+        except FieldDoesNotExist:
+            return None
+
+    def to_python_values(self, queryset, ordering, values):
+        """
+        Converts the cursor's values with each ordering field's to_python(), so
+        a malformed or tampered cursor is a 404 rather than a database error.
+        """
+        converted = []
+        for field, value in zip(ordering, values):
+            if value is None:
+                # Seek comparisons can't be made against NULL
+                raise NotFound("Invalid cursor")
+            model_field = self.get_ordering_field(queryset, field.lstrip('-'))
+            try:
+                converted.append(model_field.to_python(value) if model_field is not None else value)
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound("Invalid cursor")
+        return converted
+
+    def build_seek_filter(self, ordering, values):
+        """Builds the 'strictly after this row' condition for the given ordering."""
+        seek = Q()
+        equal_prefix = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            seek |= equal_prefix & Q(**{f'{name}__{lookup}': value})
+            equal_prefix &= Q(**{name: value})
+        return seek
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        values = self.decode_cursor(request, len(self.ordering))
+        if values is not None:
+            values = self.to_python_values(queryset, self.ordering, values)
+            queryset = queryset.filter(self.build_seek_filter(self.ordering, values))
+
+        # Fetch one extra row to find out whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        last = self.page[-1]
+        values = [getattr(last, field.lstrip('-')) for field in self.ordering]
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('first', self.get_first_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'first': {'type': 'string', 'format': 'uri'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,49 @@
+# api/sampling.py
+
+import random
+from itertools import groupby
+
+from .caching import get_cached_category_ids, set_cached_category_ids
+from .models import Product
+from .serializers import LIST_COLUMNS
+
+
+def get_category_product_ids(category):
+    """All product IDs in a category, served from the cache after the first lookup."""
+    ids = get_cached_category_ids(category)
+    if ids is None:
+        ids = list(Product.objects.filter(category=category).values_list('id', flat=True))
+        set_cached_category_ids(category, ids)
+    return ids
+
+
+def sample_category_products(category, k, exclude_ids=()):
+    """
+    Returns up to `k` random products from a category, loaded with the columns
+    the list serializer reads.
+    Samples from the cached ID list and fetches only the chosen rows by primary
+    key, instead of making the database randomly sort the whole category.
+    """
+    excluded = {int(pk) for pk in exclude_ids}
+    candidates = [pk for pk in get_category_product_ids(category) if pk not in excluded]
+    chosen = random.sample(candidates, min(k, len(candidates)))
+    products_by_id = Product.objects.only(*LIST_COLUMNS).in_bulk(chosen)
+    return [products_by_id[pk] for pk in chosen if pk in products_by_id]
+
+
+def take_ranked_sample(queryset, k, score_field='relevance_score', oversample=3):
+    """
+    Takes the top `k` rows of a queryset ordered by `-score_field`, shuffling rows
+    with equal scores so ties don't always resolve the same way.
+    Replaces order_by('-score', '?'): only k * oversample rows are read in index
+    order and the shuffling happens in Python.
+    """
+    rows = list(queryset.order_by(f'-{score_field}', 'id')[:k * oversample])
+    sampled = []
+    for _, group in groupby(rows, key=lambda row: getattr(row, score_field)):
+        group = list(group)
+        random.shuffle(group)
+        sampled.extend(group)
+        if len(sampled) >= k:
+            break
+    return sampled[:k]
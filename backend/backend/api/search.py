@@ -0,0 +1,75 @@
+# api/search.py
+
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import Cast
+
+SEARCH_CONFIG = 'english'
+
+# Words that carry no meaning for the legacy keyword matcher
+STOP_WORDS = {'a', 'an', 'the', 'is', 'in', 'it', 'of', 'for', 'on', 'i', 'want', 'with', 'and', 'best'}
+
+
+def full_text_search_available():
+    """PostgreSQL full-text search (tsvector + GIN index) is only available on PostgreSQL."""
+    return connection.vendor == 'postgresql'
+
+
+def product_search_vector():
+    """
+    The weighted document stored in Product.search_vector.
+    Name matches rank highest, then category and SEO keywords, then AI tags.
+    """
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('category', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('seo_keywords', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('ai_tags', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def refresh_search_vectors(queryset):
+    """Recomputes the stored search document for every product in the queryset, in one UPDATE."""
+    if not full_text_search_available():
+        return 0
+    return queryset.update(search_vector=product_search_vector())
+
+
+def search_products(queryset, query):
+    """
+    Filters and ranks `queryset` against a free-text query.
+    Returns a queryset annotated with `relevance_score` and ordered by
+    ('-relevance_score', 'id'), or None when the query has no usable terms.
+    """
+    if full_text_search_available():
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        # ts_rank returns float4; cast to float8 so the value round-trips exactly
+        # through a keyset pagination cursor
+        return queryset.filter(search_vector=search_query).annotate(
+            relevance_score=Cast(SearchRank(F('search_vector'), search_query), FloatField())
+        ).order_by('-relevance_score', 'id')
+    return keyword_search_products(queryset, query)
+
+
+def keyword_search_products(queryset, query):
+    """
+    Fallback matcher for databases without full-text search (SQLite in dev).
+    ORs an icontains per keyword over name and AI tags, ranking by AI tag hits.
+    """
+    keywords = [word for word in query.lower().split() if word not in STOP_WORDS]
+    if not keywords:
+        return None
+
+    query_filter = Q()
+    for keyword in keywords:
+        query_filter |= Q(name__icontains=keyword) | Q(ai_tags__icontains=keyword)
+
+    relevance_conditions = [Q(ai_tags__icontains=kw) for kw in keywords]
+    relevance = Count('id', filter=reduce(lambda a, b: a | b, relevance_conditions))
+
+    return queryset.filter(query_filter).annotate(
+        relevance_score=relevance
+    ).order_by('-relevance_score', 'id')
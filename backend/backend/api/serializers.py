@@ -1,13 +1,22 @@
 # api/serializers.py
 
+from decimal import Decimal
+
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F, QuerySet, prefetch_related_objects
+from django.db.models.functions import Left
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from .models import (
     CartItem, Product, LikedProduct, Order, OrderItem,
-    ChatMessage, ChatThread, ProductReview, UserCart
+    ChatMessage, ChatThread, ProductImportJob, ProductReview, UserCart
 )
+from .images import VARIANT_SIZES, schedule_image_variants
 
 
 # ==========================================================
@@ -78,26 +87,323 @@ class ProductWriteSerializer(serializers.ModelSerializer):
             
         return data
 
+    def create(self, validated_data):
+        product = super().create(validated_data)
+        if product.image_file:
+            transaction.on_commit(lambda: schedule_image_variants(product.pk))
+        return product
+
+    def update(self, instance, validated_data):
+        # A new (or cleared) upload makes the old derivatives stale
+        image_changed = 'image_file' in validated_data
+        if image_changed:
+            instance.image_variants = {}
+        product = super().update(instance, validated_data)
+        if image_changed and product.image_file:
+            transaction.on_commit(lambda: schedule_image_variants(product.pk))
+        return product
+
+class ProductImportRowSerializer(ProductWriteSerializer):
+    """
+    Validates one row of a bulk product import (see api/importer.py). Files
+    can't be uploaded through an import, but precomputed `ai_tags` can be.
+    """
+    class Meta:
+        model = Product
+        fields = [
+            "name", "category", "price", "description", "stock_quantity",
+            "image_url", "seo_keywords", "ai_tags"
+        ]
+
+class ProductImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ProductImportJob
+        fields = [
+            "id", "file_format", "status", "rows_processed", "created_count",
+            "updated_count", "failed_count", "errors", "created_at", "updated_at"
+        ]
+        read_only_fields = fields
+
+def get_liked_product_ids(request):
+    """
+    Returns the set of product IDs the requesting user has liked.
+    The set is loaded with a single query and cached on the request, so every
+    product serialized during the same request shares it.
+    """
+    user = request.user if request and hasattr(request, "user") else None
+    if not user or not user.is_authenticated:
+        return frozenset()
+    liked_ids = getattr(request, '_liked_product_ids', None)
+    if liked_ids is None:
+        liked_ids = frozenset(
+            LikedProduct.objects.filter(user=user).values_list('product_id', flat=True)
+        )
+        request._liked_product_ids = liked_ids
+    return liked_ids
+
+def is_public_request(request):
+    """
+    True when the client asked for the shared-cacheable catalog payload with
+    `?public=true`: no per-user fields, so one response can serve every user.
+    Per-user state comes from the overlay endpoint instead.
+    """
+    if not request or not hasattr(request, 'query_params'):
+        return False
+    return request.query_params.get('public', '').lower() in ('1', 'true', 'yes')
+
+def get_query_param_set(request, name):
+    """Parses a comma-separated query parameter (e.g. ?fields=id,name) into a set."""
+    if not request or not hasattr(request, 'query_params'):
+        return set()
+    raw = request.query_params.get(name, '')
+    return {part.strip() for part in raw.split(',') if part.strip()}
+
+# Shown for products without a description
+DEFAULT_DESCRIPTION = "Here is the product"
+
+# Model columns each ProductReadSerializer field reads
+FIELD_COLUMNS = {
+    'id': ('id',),
+    'name': ('name',),
+    'category': ('category',),
+    'price': ('price',),
+    'description': ('description',),
+    'stock_quantity': ('stock_quantity',),
+    'seo_keywords': ('seo_keywords',),
+    'is_liked': ('id',),
+    'image': ('image_file', 'image_url'),
+    'images': ('image_file', 'image_variants'),
+}
+# ProductReadSerializer's full output, in field order
+FAST_PATH_OUTPUT_FIELDS = [
+    'id', 'name', 'category', 'price', 'description', 'stock_quantity', 'seo_keywords', 'is_liked', 'image', 'images',
+]
+# Large columns that no product representation reads
+LIST_DEFERRED_COLUMNS = ('ai_tags', 'search_vector')
+# The columns ProductReadSerializer's full output reads, for .only()
+LIST_COLUMNS = tuple(dict.fromkeys(column for name in FAST_PATH_OUTPUT_FIELDS for column in FIELD_COLUMNS[name]))
+
+def wants_description_excerpt(request):
+    """True when a list client asked for short descriptions with `?excerpt=true`."""
+    if not request or not hasattr(request, 'query_params'):
+        return False
+    return request.query_params.get('excerpt', '').lower() in ('1', 'true', 'yes')
+
+def make_excerpt(text):
+    """
+    Shortens a description fetched as Left(description, length + 1): one extra
+    character tells whether it was cut, in which case an ellipsis is added.
+    """
+    length = settings.PRODUCT_DESCRIPTION_EXCERPT_LENGTH
+    if text and len(text) > length:
+        return text[:length].rstrip() + '…'
+    return text
+
+def _describe(text):
+    return text if text and text.strip() else DEFAULT_DESCRIPTION
+
+def _variant_urls(variants, image_name, url_for):
+    """
+    {size: {format: url}} for a product's image derivatives, or None while they
+    are missing or were rendered from a different upload than the current one.
+    """
+    if not variants or not image_name or variants.get('source') != image_name:
+        return None
+    return {
+        size: {fmt: url_for(name) for fmt, name in variants[size].items()}
+        for size in VARIANT_SIZES if size in variants
+    }
+
+def _product_row(product, columns):
+    """A loaded product as the dict .values(*columns) would return."""
+    row = {column: getattr(product, column) for column in columns}
+    if 'image_file' in row:
+        row['image_file'] = product.image_file.name
+    if hasattr(product, 'description_excerpt'):
+        row['description_excerpt'] = product.description_excerpt
+    return row
+
+def _fast_price(field):
+    """
+    DecimalField.to_representation with a shortcut for the common case: a
+    Decimal already at the field's scale renders as str() without quantizing.
+    """
+    exponent = -field.decimal_places
+
+    def to_representation(value):
+        if type(value) is Decimal and value.as_tuple().exponent == exponent:
+            return str(value)
+        return field.to_representation(value)
+    return to_representation
+
+def _fast_image_url(request):
+    """
+    Builds absolute image URLs the way `request.build_absolute_uri(file.url)`
+    does. For local file storage the absolute media prefix is resolved once and
+    each file name is appended to it, instead of urljoin-ing every row.
+    """
+    storage = Product._meta.get_field('image_file').storage
+    if isinstance(storage, FileSystemStorage) and storage.base_url and storage.base_url.endswith('/'):
+        prefix = request.build_absolute_uri(storage.base_url) if request else storage.base_url
+        return lambda name: prefix + filepath_to_uri(name).lstrip('/')
+    if request:
+        return lambda name: request.build_absolute_uri(storage.url(name))
+    return storage.url
+
 class ProductReadSerializer(serializers.ModelSerializer):
-    """Serializer for READING product data (displaying products)."""
+    """
+    Serializer for READING product data (displaying products).
+
+    The default representation is compact: nested reviews are left out unless
+    the client asks for them with `?expand=reviews`. `?fields=id,name,price`
+    further narrows the output to the listed fields. With `?public=true` the
+    per-user `is_liked` field is left out as well. List endpoints accept
+    `?excerpt=true` for shortened descriptions (see `list_queryset`).
+    """
     is_liked = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()  # Virtual field that returns the appropriate image
+    images = serializers.SerializerMethodField()  # Resized JPEG/WebP variants of the uploaded image
     description = serializers.SerializerMethodField()
     reviews = ProductReviewSerializer(many=True, read_only=True)
 
+    # Fields that are only serialized when explicitly requested
+    expandable_fields = ('reviews',)
+
     class Meta:
         model = Product
         fields = [
             "id", "name", "category", "price", "description", "stock_quantity",
-            "seo_keywords", "is_liked", "image", "reviews"
+            "seo_keywords", "is_liked", "image", "images", "reviews"
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        requested_fields = get_query_param_set(request, 'fields')
+        expanded = self.get_expanded_fields(request)
+
+        for field_name in self.expandable_fields:
+            if field_name not in expanded:
+                self.fields.pop(field_name, None)
+
+        if is_public_request(request):
+            self.fields.pop('is_liked', None)
+
+        # Unknown names are ignored; if none of the names is known, nothing is narrowed
+        requested_fields &= set(self.fields)
+        if requested_fields:
+            for field_name in set(self.fields) - requested_fields:
+                self.fields.pop(field_name)
+
+    @classmethod
+    def get_expanded_fields(cls, request):
+        """Expandable fields the request asked for, via ?expand= or an explicit ?fields= entry."""
+        requested = get_query_param_set(request, 'expand') | get_query_param_set(request, 'fields')
+        return requested.intersection(cls.expandable_fields)
+
+    @classmethod
+    def prefetch_for(cls, instance, request):
+        """
+        Eager-loads the relations needed by the requested expansions.
+        Accepts a queryset (returned with prefetch_related applied), a list of
+        products or a single product (prefetched in place).
+        """
+        if 'reviews' not in cls.get_expanded_fields(request) or instance is None:
+            return instance
+        if isinstance(instance, QuerySet):
+            return instance.prefetch_related('reviews__author')
+        objects = instance if isinstance(instance, (list, tuple)) else [instance]
+        prefetch_related_objects(objects, 'reviews__author')
+        return instance
+
+    @classmethod
+    def list_columns(cls, fields):
+        """The model columns needed to render the given serializer fields."""
+        columns = {'id'}
+        for name in fields:
+            columns.update(FIELD_COLUMNS.get(name, ()))
+        return columns
+
+    @classmethod
+    def list_queryset(cls, queryset, request):
+        """
+        Narrows a list queryset to the columns the requested representation
+        reads, so long text isn't sent over the DB connection for nothing.
+        With `?excerpt=true` only the start of each description is fetched
+        (Left() in SQL) and rendered shortened.
+        """
+        fields = cls(context={'request': request}).fields
+        if 'reviews' in fields:
+            return queryset.defer(*LIST_DEFERRED_COLUMNS)
+
+        columns = cls.list_columns(fields)
+        if 'description' in fields and wants_description_excerpt(request):
+            columns.discard('description')
+            queryset = queryset.annotate(
+                description_excerpt=Left('description', settings.PRODUCT_DESCRIPTION_EXCERPT_LENGTH + 1)
+            )
+        # Keyset pagination reads the ordering values back from each row
+        model_columns = {field.attname for field in Product._meta.concrete_fields}
+        columns.update(
+            name.lstrip('-') for name in queryset.query.order_by
+            if isinstance(name, str) and name.lstrip('-') in model_columns
+        )
+        return queryset.only(*columns)
+
+    @classmethod
+    def fast_data(cls, products, request):
+        """
+        Read-only fast path producing the same output as
+        `cls(products, many=True).data` without per-product serializer and
+        method-field calls. A queryset is read with a single .values() query;
+        a list of products (e.g. a keyset page) is read from attributes.
+        Expanded reviews need the nested serializer, so they take the normal path.
+        """
+        template = cls(context={'request': request})
+        fields = list(template.fields)
+        if 'reviews' in fields:
+            products = cls.prefetch_for(products, request)
+            return cls(products, many=True, context={'request': request}).data
+
+        columns = cls.list_columns(fields)
+        if isinstance(products, QuerySet):
+            if 'description_excerpt' in products.query.annotations:
+                columns.discard('description')
+                columns.add('description_excerpt')
+            rows = products.values(*columns)
+        else:
+            rows = (_product_row(product, columns) for product in products)
+
+        price = _fast_price(template.fields['price']) if 'price' in fields else None
+        image_url = _fast_image_url(request)
+        liked_ids = get_liked_product_ids(request) if 'is_liked' in fields else frozenset()
+        narrowed = fields != FAST_PATH_OUTPUT_FIELDS
+
+        data = []
+        for row in rows:
+            if 'description_excerpt' in row:
+                description = make_excerpt(row['description_excerpt'])
+            else:
+                description = row.get('description')
+            image_file = row.get('image_file')
+            item = {
+                'id': row['id'],
+                'name': row.get('name'),
+                'category': row.get('category'),
+                'price': price(row['price']) if price else None,
+                'description': _describe(description),
+                'stock_quantity': row.get('stock_quantity'),
+                'seo_keywords': row.get('seo_keywords'),
+                'is_liked': row['id'] in liked_ids,
+                'image': image_url(image_file) if image_file else row.get('image_url'),
+                'images': _variant_urls(row.get('image_variants'), image_file, image_url),
+            }
+            data.append({name: item[name] for name in fields} if narrowed else item)
+        return data
+
     def get_is_liked(self, obj):
         request = self.context.get('request')
-        user = request.user if request and hasattr(request, "user") else None
-        if user and user.is_authenticated:
-            return LikedProduct.objects.filter(user=user, product=obj).exists()
-        return False
+        return obj.id in get_liked_product_ids(request)
 
     def get_image(self, obj):
         """Returns the appropriate image URL - prioritizes uploaded file over URL"""
@@ -106,10 +412,19 @@ class ProductReadSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image_file.url) if request else obj.image_file.url
         return obj.image_url
 
+    def get_images(self, obj):
+        """URLs of the thumbnail/medium/large derivatives, or None until they've been generated."""
+        request = self.context.get('request')
+        storage = obj.image_file.storage
+
+        def url_for(name):
+            return request.build_absolute_uri(storage.url(name)) if request else storage.url(name)
+        return _variant_urls(obj.image_variants, obj.image_file.name, url_for)
+
     def get_description(self, obj):
-        if obj.description and obj.description.strip():
-            return obj.description
-        return "Here is the product"
+        if hasattr(obj, 'description_excerpt'):
+            return _describe(make_excerpt(obj.description_excerpt))
+        return _describe(obj.description)
     
 class ProductDetailSerializer(serializers.ModelSerializer):
     """A minimal serializer for product details inside an order."""
@@ -143,8 +458,6 @@ class OrderItemCreateSerializer(serializers.ModelSerializer):
         fields = ("product", "quantity")
 
 
-from django.db import transaction
-
 class OrderCreateSerializer(serializers.ModelSerializer):
     items = OrderItemCreateSerializer(many=True, write_only=True)
     
@@ -203,6 +516,10 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                 product.stock_quantity -= quantity
                 product.save(update_fields=['stock_quantity'])
 
+                # Keep the catalog's sales rollup in step with the new line item.
+                # F() makes the increment atomic under concurrent checkouts.
+                Product.objects.filter(pk=product.pk).update(total_sold=F('total_sold') + quantity)
+
                 total_amount += product.price * quantity
 
             # Update the order's final total amount
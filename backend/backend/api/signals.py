@@ -1,18 +1,22 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from django.db import transaction
+from decimal import Decimal
 import logging
 
 # --- Import models and vector DB functions ---
-from .models import Product, Order, PolicyDocument
+from .models import Product, Order, PolicyDocument, ProductReview, LikedProduct
 from .vector_db import (
-    index_single_order,
     index_document,
     delete_document_from_index,
-    index_single_product,
-    delete_product_from_index,
 )
+from .indexing import enqueue_vector_index
+
+from .search import refresh_search_vectors
+from .tags import sync_product_tags
+from .caching import invalidate_recommendations, bump_catalog_version, bump_likes_version
+from .facets import invalidate_category_facets
 
 # --- Import for Gemini ---
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -24,11 +28,10 @@ logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=Order)
 def on_order_saved(sender, instance, **kwargs):
-    logger.info(f"Order {instance.id} saved. Indexing for chatbot...")
-    try:
-        index_single_order(instance)
-    except Exception as e:
-        logger.error(f"Failed to automatically index order {instance.id}: {e}")
+    # Queued for the vector-index worker (api/indexing.py), so checkout doesn't
+    # wait on the embedding model; by commit time the order's items exist too
+    order_id = instance.id
+    transaction.on_commit(lambda: enqueue_vector_index('order', [order_id]))
 
 
 @receiver(post_save, sender=PolicyDocument)
@@ -51,12 +54,54 @@ def on_document_delete(sender, instance, **kwargs):
 
 # --- Consolidated Product Signals ---
 
+# Fields whose changes alter which products get recommended alongside this one
+RECOMMENDATION_FIELDS = ('category', 'ai_tags')
+
+# Fields the cached category facets (counts, in-stock counts, price ranges) are built from
+FACET_FIELDS = ('category', 'price', 'stock_quantity')
+
+TRACKED_FIELDS = tuple(dict.fromkeys(RECOMMENDATION_FIELDS + FACET_FIELDS))
+
+
+@receiver(pre_save, sender=Product)
+def on_product_pre_save(sender, instance, update_fields=None, **kwargs):
+    """
+    Remembers the product's stored category, tags, price and stock so the
+    post_save handler can tell whether cached recommendations and category
+    facets need invalidating.
+    """
+    instance._previous_tracked_fields = None
+    if not instance.pk:
+        return
+    if update_fields and not set(update_fields) & set(TRACKED_FIELDS):
+        return
+    instance._previous_tracked_fields = (
+        Product.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+    )
+
+
+def _facets_changed(previous, instance, update_fields=None):
+    """Whether a save moved the product between categories, changed its price or its in-stock status."""
+    fields = set(update_fields) if update_fields else set(FACET_FIELDS)
+    return (
+        ('category' in fields and previous['category'] != instance.category)
+        or ('price' in fields and previous['price'] != Decimal(str(instance.price)))
+        or ('stock_quantity' in fields
+            and (previous['stock_quantity'] > 0) != (int(instance.stock_quantity) > 0))
+    )
+
+
 @receiver(post_save, sender=Product)
 def on_product_save(sender, instance, created, **kwargs):
     """
     Consolidated signal for Product model.
     1. Generates AI tags ONLY for newly created products.
-    2. Indexes the product in the vector DB on every save (create or update).
+    2. Refreshes the product's full-text search document and ProductTag rows
+       when its text may have changed.
+    3. Invalidates cached recommendations when the category or tags change,
+       the category facets when the category, price or in-stock status
+       changes, and the catalog ETag versions on every save.
+    4. Queues the product for vector indexing on every save (create or update).
     """
     # --- 1. AI Tag Generation for NEW products ---
     # This block runs only when a new product is created and has no AI tags.
@@ -105,22 +150,61 @@ def on_product_save(sender, instance, created, **kwargs):
         except Exception as e:
             logger.error(f"Error generating AI tags for {instance.name}: {e}")
 
-    # --- 2. Index the product in the vector DB ---
-    # This runs on every save (create and update) to keep the index fresh.
-    logger.info(f"Product saved (ID: {instance.id}). Indexing in vector database...")
-    try:
-        index_single_product(instance)
-    except Exception as e:
-        logger.error(f"Failed to automatically index product {instance.id} on save: {e}")
+    # --- 2. Refresh the full-text search document and normalized tags ---
+    # Stock-only saves (e.g. from checkout) don't touch any searchable text.
+    update_fields = kwargs.get('update_fields')
+    if not update_fields or not set(update_fields) <= {'stock_quantity'}:
+        try:
+            refresh_search_vectors(Product.objects.filter(pk=instance.pk))
+        except Exception as e:
+            logger.error(f"Failed to refresh search vector for product {instance.id}: {e}")
+        try:
+            sync_product_tags(instance)
+        except Exception as e:
+            logger.error(f"Failed to sync tags for product {instance.id}: {e}")
+
+    # --- 3. Invalidate cached recommendations if category or tags changed ---
+    previous = getattr(instance, '_previous_tracked_fields', None)
+    if created:
+        invalidate_recommendations(instance.category)
+    elif previous and any(previous[field] != getattr(instance, field) for field in RECOMMENDATION_FIELDS):
+        invalidate_recommendations(previous['category'], instance.category)
+    # Checkout's stock-only saves leave the facets alone unless a product sells out.
+    # Dropped after commit so the next read can't rebuild from uncommitted data.
+    if created or (previous and _facets_changed(previous, instance, update_fields)):
+        transaction.on_commit(invalidate_category_facets)
+    transaction.on_commit(lambda: bump_catalog_version(instance.pk))
+
+    # --- 4. Queue the product for the vector-index worker ---
+    # Embedding happens off the request path; repeated saves coalesce into one task.
+    product_id = instance.pk
+    transaction.on_commit(lambda: enqueue_vector_index('product', [product_id]))
 
 
 @receiver(post_delete, sender=Product)
 def on_product_delete(sender, instance, **kwargs):
     """
-    Signal to remove the product from the vector index when it's deleted.
+    Signal to queue the product's removal from the vector index and drop cached
+    recommendations, category facets and catalog ETag versions when it's deleted.
     """
-    logger.info(f"Product deleted (ID: {instance.id}). Removing from vector index...")
-    try:
-        delete_product_from_index(instance.id)
-    except Exception as e:
-        logger.error(f"Failed to delete product {instance.id} from index: {e}")
\ No newline at end of file
+    invalidate_recommendations(instance.category)
+    transaction.on_commit(invalidate_category_facets)
+    product_id = instance.pk
+    transaction.on_commit(lambda: bump_catalog_version(product_id))
+    transaction.on_commit(lambda: enqueue_vector_index('product', [product_id], action='delete'))
+
+
+# --- Review and Like Signals (catalog ETag versions, see api/conditional.py) ---
+
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def on_review_changed(sender, instance, **kwargs):
+    product_id = instance.product_id
+    transaction.on_commit(lambda: bump_catalog_version(product_id))
+
+
+@receiver(post_save, sender=LikedProduct)
+@receiver(post_delete, sender=LikedProduct)
+def on_like_changed(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_likes_version(user_id))
@@ -0,0 +1,134 @@
+# api/tags.py
+
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+from .models import ProductTag
+
+logger = logging.getLogger(__name__)
+
+MAX_TAG_LENGTH = ProductTag._meta.get_field('name').max_length
+
+# Products described to Gemini per tagging request
+AI_TAG_BATCH_SIZE = 25
+
+
+def parse_tags(raw_tags):
+    """Splits a comma-separated AI tag string into a de-duplicated list of normalized tags."""
+    if not raw_tags:
+        return []
+    seen = {}
+    for tag in raw_tags.split(','):
+        tag = tag.strip().lower()[:MAX_TAG_LENGTH]
+        if tag:
+            seen.setdefault(tag, None)
+    return list(seen)
+
+
+def sync_product_tags(product):
+    """
+    Makes the product's ProductTag rows match its ai_tags string.
+    Only the difference is written, so re-saving unchanged tags costs one SELECT.
+    """
+    wanted = set(parse_tags(product.ai_tags))
+    existing = set(ProductTag.objects.filter(product=product).values_list('name', flat=True))
+    if wanted == existing:
+        return
+
+    with transaction.atomic():
+        stale = existing - wanted
+        if stale:
+            ProductTag.objects.filter(product=product, name__in=stale).delete()
+        ProductTag.objects.bulk_create(
+            [ProductTag(product=product, name=name) for name in wanted - existing],
+            ignore_conflicts=True,
+        )
+
+
+def sync_tags_for_products(products):
+    """
+    Bulk version of sync_product_tags for many products at once: one SELECT of
+    their current tags, then one DELETE and one INSERT for the differences.
+    """
+    products = list(products)
+    if not products:
+        return
+    existing = {}
+    for product_id, name in ProductTag.objects.filter(
+        product_id__in=[product.id for product in products]
+    ).values_list('product_id', 'name'):
+        existing.setdefault(product_id, set()).add(name)
+
+    stale, to_create = Q(pk__in=[]), []
+    for product in products:
+        wanted = set(parse_tags(product.ai_tags))
+        current = existing.get(product.id, set())
+        if current - wanted:
+            stale |= Q(product_id=product.id, name__in=current - wanted)
+        to_create.extend(ProductTag(product_id=product.id, name=name) for name in wanted - current)
+
+    with transaction.atomic():
+        ProductTag.objects.filter(stale).delete()
+        ProductTag.objects.bulk_create(to_create, ignore_conflicts=True, batch_size=1000)
+
+
+def parse_ai_tag_response(content):
+    """
+    Reads Gemini's {"<product id>": "comma, separated, tags"} reply.
+    Entries with a non-integer key or an empty/non-string value are skipped
+    rather than failing the whole batch.
+    """
+    json_string = content.strip().replace("```json", "").replace("```", "")
+    tags_by_id = {}
+    for product_id, tags in json.loads(json_string).items():
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            logger.warning(f"Skipping Gemini tags for unrecognized product ID {product_id!r}")
+            continue
+        if isinstance(tags, str) and tags.strip():
+            tags_by_id[product_id] = tags.strip().lower()
+    return tags_by_id
+
+
+def generate_ai_tags(products):
+    """
+    Asks Gemini for search/recommendation tags for many products, in requests of
+    AI_TAG_BATCH_SIZE products rather than one call per product.
+    Returns {product_id: "comma, separated, tags"} for the products it could tag.
+    """
+    model = ChatGoogleGenerativeAI(
+        model="gemini-2.5-flash",
+        google_api_key=settings.GEMINI_API_KEY,
+        temperature=0.4,
+    )
+    products = list(products)
+    tags_by_id = {}
+    for start in range(0, len(products), AI_TAG_BATCH_SIZE):
+        batch = products[start:start + AI_TAG_BATCH_SIZE]
+        product_details = "\n".join(
+            f"- ID {product.id}: Product Name: {product.name}. Category: {product.category}. "
+            f"Description: {product.description or 'N/A'}. SEO Keywords: {product.seo_keywords or 'N/A'}"
+            for product in batch
+        )
+        prompt = f"""
+        You are an e-commerce intelligence engine. For each product below, generate a rich set of tags for internal system use (search and recommendations).
+        Generate 8 to 12 diverse, detailed keywords per product.
+
+        Your response MUST be a valid JSON object and nothing else. The keys are the product IDs (as strings) and each value is a single string of comma-separated tags.
+        For example: {{"12": "wireless, bluetooth, noise-cancelling, over-ear headphones, audio gear, travel, comfortable fit"}}
+
+        Products:
+        {product_details}
+        """
+        try:
+            response = model.invoke(prompt)
+            tags_by_id.update(parse_ai_tag_response(response.content))
+        except Exception as e:
+            logger.error(f"Gemini batch tagging failed for {len(batch)} products: {e}")
+    return tags_by_id
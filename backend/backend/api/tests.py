@@ -1,3 +1,1206 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Case, Value, When
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import numpy as np
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import bestsellers
+from .caching import get_cached_recommendation_ids
+from .embedding_cache import EmbeddingCache, QueryEmbeddingCache
+from .exports import aiter_export
+from .facets import FACETS_CACHE_KEY, get_category_facets
+from .filters import ProductFilterBackend
+from .images import generate_image_variants
+from .importer import run_import
+from .indexing import drain_vector_index
+from .models import (
+    CartItem, LikedProduct, Order, OrderItem, Product, ProductImportJob, ProductNeighbor, ProductTag, UserCart,
+    VectorIndexTask,
+)
+from .renderers import FastJSONRenderer
+from .sampling import sample_category_products, take_ranked_sample
+from .search import full_text_search_available, keyword_search_products, refresh_search_vectors, search_products
+from .serializers import ProductReadSerializer
+from .tags import MAX_TAG_LENGTH, parse_ai_tag_response, parse_tags, sync_product_tags, sync_tags_for_products
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class ProductFilterIndexTests(TestCase):
+    """
+    Every filter combination on the product list must be answerable from an
+    index rather than a full scan of api_product.
+    """
+    FILTER_INDEXES = {
+        'product_cat_price_stock_idx', 'product_price_idx', 'product_in_stock_idx',
+    }
+    COMBINATIONS = [
+        {'category': 'Books'},
+        {'category': 'Books,Apparel'},
+        {'min_price': '10', 'max_price': '50'},
+        {'in_stock': 'true'},
+        {'category': 'Books', 'min_price': '10', 'max_price': '50'},
+        {'category': 'Books', 'in_stock': 'true'},
+        {'min_price': '10', 'in_stock': 'true'},
+        {'category': 'Books', 'min_price': '10', 'max_price': '50', 'in_stock': 'true'},
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='shopper', password='pass')
+        Product.objects.bulk_create([
+            Product(name=f'Product {i}', category=category, price=5 + i, stock_quantity=i % 3)
+            for i, category in enumerate(['Books', 'Apparel', 'Electronics'] * 10)
+        ])
+
+    def filtered(self, params, user=None):
+        request = Request(APIRequestFactory().get('/api/products/', params))
+        if user:
+            request.user = user
+        return ProductFilterBackend().filter_queryset(request, Product.objects.order_by('-total_sold', '-id'), None)
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # A 30-row table is cheaper to seq scan; ask whether an index *can* serve the query
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute(f'EXPLAIN {sql}', params)
+            else:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+    def test_each_filter_combination_uses_an_index(self):
+        for params in self.COMBINATIONS:
+            with self.subTest(params=params):
+                plan = self.query_plan(self.filtered(params))
+                self.assertTrue(
+                    any(index in plan for index in self.FILTER_INDEXES),
+                    f'No filter index used for {params}:\n{plan}',
+                )
+
+    def test_liked_filter_looks_up_the_users_likes_by_index(self):
+        LikedProduct.objects.create(user=self.user, product=Product.objects.first())
+        queryset = self.filtered({'liked': 'true'}, user=self.user)
+        plan = self.query_plan(queryset)
+        self.assertNotIn('SCAN api_likedproduct\n', plan + '\n')
+        self.assertNotIn('Seq Scan on api_likedproduct', plan)
+        self.assertEqual(queryset.count(), 1)
+
+    def test_filters_match_expected_products(self):
+        queryset = self.filtered({'category': 'Books', 'min_price': '10', 'in_stock': 'true'})
+        for product in queryset:
+            self.assertEqual(product.category, 'Books')
+            self.assertGreaterEqual(product.price, 10)
+            self.assertGreater(product.stock_quantity, 0)
+        self.assertEqual(
+            queryset.count(),
+            Product.objects.filter(category='Books', price__gte=10, stock_quantity__gt=0).count(),
+        )
+
+    def test_invalid_filters_are_rejected(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/products/', {'min_price': 'cheap'}).status_code, 400)
+        self.assertEqual(client.get('/api/products/', {'min_price': '50', 'max_price': '10'}).status_code, 400)
+        self.assertEqual(client.get('/api/products/', {'liked': 'true'}).status_code, 401)
+
+    def test_filters_do_not_apply_to_single_product_lookups(self):
+        client = APIClient()
+        product = Product.objects.exclude(category='Books').first()
+        for params in [{'category': 'Books'}, {'liked': 'true'}, {'min_price': 'cheap'}]:
+            with self.subTest(params=params):
+                self.assertEqual(client.get(f'/api/products/{product.pk}/', params).status_code, 200)
+                self.assertEqual(client.get(f'/api/products/{product.pk}/reviews/', params).status_code, 200)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, VECTOR_INDEX_IN_PROCESS=False)
+class SalesRollupTests(TestCase):
+    """Product.total_sold follows checkouts and is rebuilt from the order lines."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='buyer', password='pass')
+        # AI tags are preset so the save signal doesn't call out to Gemini
+        cls.lamp = Product.objects.create(name='Lamp', category='Home Goods', price=20, stock_quantity=5,
+                                          ai_tags='lamp')
+        cls.rug = Product.objects.create(name='Rug', category='Home Goods', price=90, stock_quantity=5,
+                                         total_sold=7, ai_tags='rug')
+
+    def test_checkout_increments_total_sold(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch('api.vector_db.index_products'), self.captureOnCommitCallbacks(execute=True):
+            response = client.post('/api/orders/', {
+                'shipping_info': {}, 'payment_method': 'card',
+                'items': [{'product': self.lamp.pk, 'quantity': 2}],
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.lamp.refresh_from_db()
+        self.assertEqual((self.lamp.total_sold, self.lamp.stock_quantity), (2, 3))
+
+    def test_rebuild_sums_order_lines(self):
+        order = Order.objects.create(user=self.user, total_amount=60, shipping_info={})
+        OrderItem.objects.create(order=order, product=self.lamp, quantity=1, price=20)
+        OrderItem.objects.create(order=order, product=self.lamp, quantity=2, price=20)
+        call_command('rebuild_total_sold', stdout=io.StringIO())
+        self.assertEqual(
+            dict(Product.objects.filter(pk__in=[self.lamp.pk, self.rug.pk]).values_list('pk', 'total_sold')),
+            {self.lamp.pk: 3, self.rug.pk: 0},
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES, BESTSELLER_SNAPSHOT_TTL=60)
+@mock.patch('api.bestsellers.compute_bestseller_ids')
+class BestsellerSnapshotTests(TestCase):
+    """Bestseller snapshots are rebuilt by one worker at a time; the rest serve or wait for its result."""
+
+    def setUp(self):
+        cache.clear()
+
+    def store_snapshot(self, ids, fresh_for):
+        cache.set(bestsellers._snapshot_key('30'), {'ids': ids, 'fresh_until': time.time() + fresh_for})
+
+    def test_concurrent_cold_reads_compute_once(self, compute):
+        def slow_compute(window_days):
+            time.sleep(0.2)
+            return [1, 2, 3]
+        compute.side_effect = slow_compute
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: bestsellers.get_bestseller_ids('30'), range(8)))
+        self.assertEqual(results, [[1, 2, 3]] * 8)
+        compute.assert_called_once_with(30)
+
+    def test_stale_snapshot_is_served_while_another_worker_refreshes(self, compute):
+        self.store_snapshot([4, 5], fresh_for=-1)
+        cache.add(bestsellers._lock_key('30'), True)
+        self.assertEqual(bestsellers.get_bestseller_ids('30'), [4, 5])
+        compute.assert_not_called()
+
+        cache.delete(bestsellers._lock_key('30'))
+        compute.return_value = [6]
+        self.assertEqual(bestsellers.get_bestseller_ids('30'), [6])
+        self.assertEqual(bestsellers.get_bestseller_ids('30'), [6])
+        compute.assert_called_once_with(30)
+
+    def test_cold_read_waits_for_the_rebuilding_worker(self, compute):
+        cache.add(bestsellers._lock_key('30'), True)
+        timer = threading.Timer(0.2, self.store_snapshot, args=([7, 8], 60))
+        timer.start()
+        try:
+            self.assertEqual(bestsellers.get_bestseller_ids('30'), [7, 8])
+        finally:
+            timer.join()
+        compute.assert_not_called()
+
+        cache.delete(bestsellers._snapshot_key('30'))
+        with mock.patch.object(bestsellers, 'SNAPSHOT_WAIT_SECONDS', 0.1):
+            with self.assertRaises(TimeoutError):
+                bestsellers.get_bestseller_ids('30')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class KeysetPaginationTests(TestCase):
+    """Following `next` visits every product once, in the order of one page holding them all."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Repeated total_sold values and search ranks exercise the tie-break on id
+        Product.objects.bulk_create([
+            Product(name=f'Desk {"Lamp" if i % 2 else "Light"} {i}', category='Home Goods', price=20 + i,
+                    total_sold=i % 4, ai_tags='lamp')
+            for i in range(11)
+        ])
+        refresh_search_vectors(Product.objects.all())
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def walk(self, url, params):
+        ids = []
+        response = self.client.get(url, {**params, 'page_size': 3})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            ids += [product['id'] for product in page['results']]
+            if not page['next']:
+                return ids
+            response = self.client.get(page['next'])
+
+    def test_pages_cover_the_unpaginated_list(self):
+        for url, params in [
+            ('/api/products/', {}),
+            ('/api/products/tag-search/', {'query': 'lamp'}),
+            ('/api/products/tag-search/', {}),
+        ]:
+            with self.subTest(url=url, params=params):
+                everything = self.client.get(url, {**params, 'page_size': 100}).json()
+                self.assertIsNone(everything['next'])
+                expected = [product['id'] for product in everything['results']]
+                self.assertGreater(len(expected), 3)
+                self.assertEqual(self.walk(url, params), expected)
+
+    @override_settings(PRODUCT_PAGE_SIZE=4)
+    def test_requests_without_page_params_get_one_capped_page(self):
+        for url in ['/api/products/', '/api/products/tag-search/']:
+            with self.subTest(url=url):
+                page = self.client.get(url).json()
+                self.assertEqual(len(page['results']), 4)
+                self.assertIsNotNone(page['next'])
+        oversized = self.client.get('/api/products/', {'page_size': 100000}).json()
+        self.assertEqual(len(oversized['results']), min(Product.objects.count(), 100))
+        self.assertEqual(self.client.get('/api/products/tag-search/', {'query': 'zzz'}).json()['results'], [])
+
+    def test_malformed_cursors_are_not_found(self):
+        for values in [['a', 'b'], [None, 1], [1], {'id': 1}]:
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+            with self.subTest(values=values):
+                self.assertEqual(self.client.get('/api/products/', {'cursor': cursor}).status_code, 404)
+        self.assertEqual(self.client.get('/api/products/', {'cursor': '!!'}).status_code, 404)
+
+
+class ProductSearchTests(TestCase):
+    """Free-text product search: ranked full-text search on PostgreSQL, keyword matching elsewhere."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.desk_lamp, cls.bulb, cls.rug, cls.floor_lamp = Product.objects.bulk_create([
+            Product(name='Desk Lamp', category='Home Goods', price=30, ai_tags='desk, furniture'),
+            Product(name='Warm Bulb', category='Home Goods', price=5, ai_tags='lamp, lighting'),
+            Product(name='Rug', category='Home Goods', price=90, ai_tags='floor, textile'),
+            Product(name='Floor Lamp', category='Home Goods', price=80, ai_tags='lamp, lighting'),
+        ])
+        refresh_search_vectors(Product.objects.all())
+
+    def catalog(self):
+        # Leaves out products seeded by data migrations
+        return Product.objects.filter(pk__in=[self.desk_lamp.pk, self.bulb.pk, self.rug.pk, self.floor_lamp.pk])
+
+    def ids(self, queryset):
+        return list(queryset.values_list('id', flat=True))
+
+    def test_keyword_fallback_ranks_tag_matches_first(self):
+        results = keyword_search_products(self.catalog(), 'the lamp')
+        # Tag hits rank above name-only hits; ties keep id order
+        self.assertEqual(self.ids(results), [self.bulb.pk, self.floor_lamp.pk, self.desk_lamp.pk])
+        self.assertEqual([product.relevance_score for product in results], [1, 1, 0])
+        self.assertEqual(self.ids(keyword_search_products(self.catalog(), 'RUG')), [self.rug.pk])
+
+    def test_keyword_fallback_needs_a_meaningful_word(self):
+        self.assertIsNone(keyword_search_products(self.catalog(), 'the best of'))
+
+    @skipUnless(full_text_search_available(), 'full-text search needs PostgreSQL')
+    def test_full_text_search_stems_and_weights_name_matches(self):
+        results = search_products(self.catalog(), 'lamps')
+        # Name (weight A) beats AI tags (weight C), and "lamps" matches "lamp"
+        self.assertEqual(self.ids(results)[:2], [self.floor_lamp.pk, self.desk_lamp.pk])
+        self.assertEqual(set(self.ids(results)), {self.desk_lamp.pk, self.bulb.pk, self.floor_lamp.pk})
+        scores = [product.relevance_score for product in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        # websearch syntax: a leading minus excludes a term
+        self.assertEqual(set(self.ids(search_products(self.catalog(), 'lamp -desk'))),
+                         {self.floor_lamp.pk, self.bulb.pk})
+
+
+class ProductTagTests(TestCase):
+    """ProductTag rows mirror each product's comma-separated ai_tags."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lamp, cls.rug = Product.objects.bulk_create([
+            Product(name='Lamp', category='Home Goods', price=20, ai_tags='Lamp, lighting ,,lamp'),
+            Product(name='Rug', category='Home Goods', price=90, ai_tags='rug'),
+        ])
+
+    def tags(self, product):
+        return set(ProductTag.objects.filter(product=product).values_list('name', flat=True))
+
+    def test_parse_tags_normalizes_and_deduplicates(self):
+        self.assertEqual(parse_tags(' Lamp, lighting ,,lamp, LIGHTING '), ['lamp', 'lighting'])
+        self.assertEqual(parse_tags(''), [])
+        self.assertEqual(parse_tags(None), [])
+        self.assertEqual(parse_tags('x' * (MAX_TAG_LENGTH + 10)), ['x' * MAX_TAG_LENGTH])
+
+    def test_sync_writes_only_the_difference(self):
+        sync_product_tags(self.lamp)
+        self.assertEqual(self.tags(self.lamp), {'lamp', 'lighting'})
+        with self.assertNumQueries(1):
+            sync_product_tags(self.lamp)
+        self.lamp.ai_tags = 'lamp, desk'
+        sync_product_tags(self.lamp)
+        self.assertEqual(self.tags(self.lamp), {'lamp', 'desk'})
+
+    def test_bulk_sync_matches_per_product_sync(self):
+        ProductTag.objects.create(product=self.rug, name='stale')
+        self.lamp.ai_tags = 'lamp, desk'
+        with self.assertNumQueries(5):  # SELECT, then DELETE and INSERT in a savepoint
+            sync_tags_for_products([self.lamp, self.rug])
+        self.assertEqual((self.tags(self.lamp), self.tags(self.rug)), ({'lamp', 'desk'}, {'rug'}))
+
+    def test_backfill_command_syncs_every_product(self):
+        ProductTag.objects.create(product=self.rug, name='stale')
+        call_command('sync_product_tags', stdout=io.StringIO())
+        self.assertEqual((self.tags(self.lamp), self.tags(self.rug)), ({'lamp', 'lighting'}, {'rug'}))
+
+    def test_gemini_reply_parser_skips_bad_entries(self):
+        content = '```json\n{"12": " Wireless, Audio ", "ID 7": "lamp", "3": "", "4": ["rug"], "5": "rug"}\n```'
+        self.assertEqual(parse_ai_tag_response(content), {12: 'wireless, audio', 5: 'rug'})
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CoPurchaseMatrixTests(TestCase):
+    """build_copurchase_matrix stores each product's top-K neighbours by cosine similarity of their orders."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lamp, cls.bulb, cls.shade, cls.rug = Product.objects.bulk_create([
+            Product(name=name, category='Home Goods', price=10, ai_tags=name.lower())
+            for name in ['Lamp', 'Bulb', 'Shade', 'Rug']
+        ])
+        user = User.objects.create_user(username='buyer', password='pass')
+        # The lamp is in 4 orders, the bulb in 2, the shade and rug in 1 each.
+        # The lamp appears twice in the first order, which still counts once.
+        for basket in [[cls.lamp, cls.bulb, cls.lamp], [cls.lamp, cls.bulb], [cls.lamp, cls.rug], [cls.lamp, cls.shade]]:
+            order = Order.objects.create(user=user, total_amount=0, shipping_info={})
+            OrderItem.objects.bulk_create([OrderItem(order=order, product=product, quantity=1, price=10)
+                                           for product in basket])
+
+    def neighbours(self, product):
+        return [(entry.neighbor_id, round(entry.score, 4))
+                for entry in ProductNeighbor.objects.filter(product=product).order_by('rank')]
+
+    def test_similarity_and_ranking(self):
+        call_command('build_copurchase_matrix', stdout=io.StringIO())
+        # cosine = shared orders / sqrt(orders(a) * orders(b)); equal scores rank by product ID
+        self.assertEqual(self.neighbours(self.lamp),
+                         [(self.bulb.pk, 0.7071), (self.shade.pk, 0.5), (self.rug.pk, 0.5)])
+        self.assertEqual(self.neighbours(self.bulb), [(self.lamp.pk, 0.7071)])
+        self.assertEqual(self.neighbours(self.rug), [(self.lamp.pk, 0.5)])
+
+    def test_top_k_cuts_ties_by_product_id(self):
+        call_command('build_copurchase_matrix', '--top-k', '2', stdout=io.StringIO())
+        self.assertEqual(self.neighbours(self.lamp), [(self.bulb.pk, 0.7071), (self.shade.pk, 0.5)])
+
+    def test_min_support_drops_rare_pairs(self):
+        call_command('build_copurchase_matrix', '--min-support', '2', stdout=io.StringIO())
+        self.assertEqual(self.neighbours(self.lamp), [(self.bulb.pk, 0.7071)])
+        self.assertEqual(self.neighbours(self.rug), [])
+
+    def test_copurchase_mode_serves_the_stored_neighbours(self):
+        call_command('build_copurchase_matrix', stdout=io.StringIO())
+        response = APIClient().get(f'/api/products/{self.lamp.pk}/recommendations/', {'mode': 'copurchase'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product['id'] for product in response.json()],
+                         [self.bulb.pk, self.shade.pk, self.rug.pk])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SamplingTests(TestCase):
+    """Random and tie-shuffled samples read only the rows, and columns, they return."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.lamps = Product.objects.bulk_create([
+            Product(name=f'Lamp {i}', category='Sampling Lamps', price=10 + i, ai_tags='lamp') for i in range(6)
+        ])
+        Product.objects.create(name='Rug', category='Sampling Rugs', price=90, ai_tags='rug')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_category_sample_is_drawn_from_the_cached_ids(self):
+        excluded = self.lamps[0].pk
+        with self.assertNumQueries(2):
+            sample = sample_category_products('Sampling Lamps', 3, exclude_ids=[str(excluded)])
+        self.assertEqual(len(sample), 3)
+        self.assertEqual(len({product.pk for product in sample}), 3)
+        self.assertTrue({product.pk for product in sample} <= {lamp.pk for lamp in self.lamps[1:]})
+        self.assertTrue({'ai_tags', 'search_vector'} <= sample[0].get_deferred_fields())
+        # The ID list is cached, so later samples only fetch the chosen rows
+        with self.assertNumQueries(1):
+            everything = sample_category_products('Sampling Lamps', 10)
+        self.assertEqual({product.pk for product in everything}, {lamp.pk for lamp in self.lamps})
+
+    def test_ranked_sample_keeps_score_order_and_shuffles_ties(self):
+        scored = Product.objects.filter(category='Sampling Lamps').annotate(
+            relevance_score=Case(When(price__lt=13, then=Value(2)), default=Value(1))
+        )
+        with mock.patch('api.sampling.random.shuffle', side_effect=lambda group: group.reverse()), \
+                self.assertNumQueries(1):
+            sample = take_ranked_sample(scored, 4, oversample=1)
+        # Score 2 (the first three lamps, ties reversed) comes before score 1, cut at k
+        self.assertEqual([product.pk for product in sample],
+                         [self.lamps[2].pk, self.lamps[1].pk, self.lamps[0].pk, self.lamps[3].pk])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, VECTOR_INDEX_IN_PROCESS=False)
+class RecommendationCacheTests(TestCase):
+    """Cached recommendations are dropped per category, and only when category or tags change."""
+
+    def setUp(self):
+        cache.clear()
+        # AI tags are preset so the save signal doesn't call out to Gemini
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lamp = Product.objects.create(name='Lamp', category='Home Goods', price=20, stock_quantity=5,
+                                               ai_tags='lamp, lighting')
+            self.rug = Product.objects.create(name='Rug', category='Home Goods', price=90, ai_tags='rug, floor')
+            self.novel = Product.objects.create(name='Novel', category='Books', price=12, ai_tags='fiction')
+        self.client = APIClient()
+        for product in (self.lamp, self.novel):
+            self.assertEqual(self.client.get(f'/api/products/{product.pk}/recommendations/').status_code, 200)
+
+    def cached(self, product):
+        return get_cached_recommendation_ids(Product.objects.get(pk=product.pk)) is not None
+
+    def save(self, product, **changes):
+        for field, value in changes.items():
+            setattr(product, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+
+    def test_stock_only_saves_keep_the_cache(self):
+        self.save(self.lamp, stock_quantity=4)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rug.stock_quantity = 0
+            self.rug.save(update_fields=['stock_quantity'])
+        self.assertTrue(self.cached(self.lamp))
+        self.assertTrue(self.cached(self.novel))
+
+    def test_tag_change_drops_only_its_category(self):
+        self.save(self.rug, ai_tags='rug, lighting')
+        self.assertFalse(self.cached(self.lamp))
+        self.assertTrue(self.cached(self.novel))
+
+    def test_category_move_drops_both_categories(self):
+        self.save(self.rug, category='Books')
+        self.assertFalse(self.cached(self.lamp))
+        self.assertFalse(self.cached(self.novel))
+
+
+# ETags come from version counters in the cache, so these need a working one without Redis
+@override_settings(CACHES=LOCMEM_CACHES, VECTOR_INDEX_IN_PROCESS=False)
+class CatalogConditionalGetTests(TestCase):
+    """Catalog reads carry ETags and answer a matching If-None-Match with 304."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # AI tags are preset so the save signal doesn't call out to Gemini
+        cls.product = Product.objects.create(
+            name='Lamp', category='Home Goods', price=20, stock_quantity=3, ai_tags='lamp, lighting',
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_unchanged_catalog_returns_304(self):
+        for url in ['/api/products/', f'/api/products/{self.product.pk}/', '/api/categories/']:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+
+    def test_product_save_changes_the_etag(self):
+        url = f'/api/products/{self.product.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = 25
+            self.product.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since_follows_catalog_changes(self):
+        url = f'/api/products/{self.product.pk}/'
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['Last-Modified'], last_modified)
+        # If-None-Match takes precedence, so a stale ETag still gets the full response
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified, HTTP_IF_NONE_MATCH='"stale"').status_code, 200,
+        )
+        with mock.patch('api.caching.time.time', return_value=time.time() + 60), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.product.price = 25
+            self.product.save()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['Last-Modified'], last_modified)
+
+    def test_public_cache_control_only_on_success(self):
+        for url, params, status_code in [
+            ('/api/products/', {'public': 'true'}, 200),
+            ('/api/products/', {'public': 'true', 'min_price': 'cheap'}, 400),
+            (f'/api/products/{self.product.pk + 1000}/', {'public': 'true'}, 404),
+        ]:
+            with self.subTest(url=url, params=params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, status_code)
+                self.assertEqual('public' in response.get('Cache-Control', ''), status_code == 200)
+
+    def test_etag_differs_per_query_and_user(self):
+        anonymous = self.client.get('/api/products/')['ETag']
+        self.assertNotEqual(anonymous, self.client.get('/api/products/', {'category': 'Books'})['ETag'])
+        self.client.force_authenticate(User.objects.create_user(username='viewer', password='pass'))
+        self.assertNotEqual(anonymous, self.client.get('/api/products/')['ETag'])
+
+    def test_bestseller_snapshot_rebuild_changes_the_etag(self):
+        url = '/api/products/bestsellers/?window=all'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A sale recorded without a catalog edit, picked up by the periodic rebuild
+        Product.objects.filter(pk=self.product.pk).update(total_sold=3)
+        bestsellers.refresh_bestseller_snapshot('all')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product['id'] for product in response.json()], [self.product.pk])
+
+    def test_maintenance_commands_change_the_etag(self):
+        OrderItem.objects.create(
+            order=Order.objects.create(user=User.objects.create_user('buyer'), total_amount=40, shipping_info={}),
+            product=self.product, quantity=2, price=20,
+        )
+        for command in ['rebuild_total_sold', 'build_copurchase_matrix']:
+            with self.subTest(command=command):
+                etag = self.client.get('/api/products/')['ETag']
+                call_command(command, stdout=io.StringIO())
+                self.assertEqual(self.client.get('/api/products/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PublicCatalogTests(TestCase):
+    """`?public=true` payloads are user-independent; per-user state comes from the overlay."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='shopper', password='pass')
+        cls.products = Product.objects.bulk_create([
+            Product(name=f'Product {i}', category='Books', price=10 + i, stock_quantity=5) for i in range(3)
+        ])
+        LikedProduct.objects.create(user=cls.user, product=cls.products[0])
+        cart = UserCart.objects.create(user=cls.user)
+        CartItem.objects.create(cart=cart, product=cls.products[1], quantity=2,
+                                price_at_addition=11, stock_at_update=5)
+
+    def test_public_payload_is_the_same_for_every_user(self):
+        client = APIClient()
+        anonymous = client.get('/api/products/', {'public': 'true'})
+        client.force_authenticate(self.user)
+        signed_in = client.get('/api/products/', {'public': 'true'})
+        self.assertEqual(anonymous.json(), signed_in.json())
+        self.assertEqual(anonymous['ETag'], signed_in['ETag'])
+        self.assertNotIn('is_liked', signed_in.json()['results'][0])
+        self.assertIn('public', signed_in['Cache-Control'])
+
+    def test_overlay_returns_likes_and_cart_quantities(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        ids = ','.join(str(p.pk) for p in self.products)
+        response = client.get('/api/products/overlay/', {'ids': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'liked': [self.products[0].pk],
+            'cart': {str(self.products[1].pk): 2},
+        })
+        self.assertEqual(client.get('/api/products/overlay/', {'ids': 'x'}).status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, VECTOR_INDEX_IN_PROCESS=False)
+class CatalogQueryCountTests(TestCase):
+    """
+    Catalog reads for a signed-in user with likes run a fixed number of
+    queries, however many products the response carries.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='shopper', password='pass')
+        self.cart = UserCart.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_products(self, count):
+        products = Product.objects.bulk_create([
+            Product(name=f'Desk Lamp {i}', category='Home Goods', price=20 + i, stock_quantity=5,
+                    total_sold=i, ai_tags='lamp, lighting')
+            for i in range(count)
+        ])
+        sync_tags_for_products(products)
+        LikedProduct.objects.bulk_create([LikedProduct(user=self.user, product=product) for product in products])
+        CartItem.objects.bulk_create([
+            CartItem(cart=self.cart, product=product, quantity=1, price_at_addition=product.price,
+                     stock_at_update=5)
+            for product in products
+        ])
+        return products
+
+    def query_counts(self, urls):
+        counts = {}
+        for url in urls:
+            # Every measurement starts cold, so cache fills are counted alike
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            counts[url] = len(queries)
+        return counts
+
+    def test_query_counts_do_not_grow_with_the_catalog(self):
+        target = self.add_products(5)[0]
+        urls = [
+            '/api/products/',
+            '/api/products/tag-search/?query=lamp',
+            '/api/products/bestsellers/?window=all',
+            f'/api/products/{target.pk}/recommendations/',
+            '/api/products/liked/',
+            '/api/cart/',
+        ]
+        small = self.query_counts(urls)
+        self.add_products(5)
+        self.assertEqual(self.query_counts(urls), small)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CategoryFacetTests(TestCase):
+    """The facet index reports counts and a price range per category."""
+
+    def test_prices_use_the_product_price_format(self):
+        Product.objects.bulk_create([
+            Product(name='Globe', category='Facet Test', price='15.99', stock_quantity=0),
+            Product(name='Atlas', category='Facet Test', price=40, stock_quantity=2),
+        ])
+        facets = {facet['category']: facet for facet in APIClient().get('/api/categories/facets/').json()}
+        self.assertEqual(facets['Facet Test'], {
+            'category': 'Facet Test', 'product_count': 2, 'in_stock_count': 1,
+            'min_price': '15.99', 'max_price': '40.00',
+        })
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_only_facet_changes_invalidate_the_cache(self):
+        product = Product.objects.create(name='Globe', category='Facet Test', price=20,
+                                         stock_quantity=3, ai_tags='globe')
+        with mock.patch('api.vector_db.index_products'):
+            for change, update_fields, invalidates in [
+                ({'stock_quantity': 2}, ['stock_quantity'], False),
+                ({'name': 'World Globe'}, None, False),
+                ({'price': Decimal('25.00')}, None, True),
+                ({'stock_quantity': 0}, ['stock_quantity'], True),
+                ({'category': 'Maps'}, None, True),
+            ]:
+                with self.subTest(change=change):
+                    get_category_facets()
+                    for field, value in change.items():
+                        setattr(product, field, value)
+                    with self.captureOnCommitCallbacks(execute=True):
+                        product.save(update_fields=update_fields)
+                    self.assertEqual(cache.get(FACETS_CACHE_KEY) is None, invalidates)
+
+
+class ProductFastPathParityTests(TestCase):
+    """ProductReadSerializer.fast_data must render byte-identical JSON to the serializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='shopper', password='pass')
+        cls.products = Product.objects.bulk_create([
+            Product(name='Lamp', category='Home Goods', price='19.90', stock_quantity=3,
+                    description='Warm light', image_url='https://cdn.example.com/lamp.jpg', seo_keywords='lamp'),
+            Product(name='Novel', category='Books', price=12, stock_quantity=0, description='   ',
+                    image_file='products/novel.jpg'),
+            Product(name='Mug', category='Home Goods', price='7.5', stock_quantity=10),
+            Product(name='Atlas', category='Books', price=40, stock_quantity=1, description='Maps. ' * 100),
+        ])
+        LikedProduct.objects.create(user=cls.user, product=cls.products[0])
+
+    def assert_parity(self, params, user=None):
+        request = Request(APIRequestFactory().get('/api/products/', params))
+        request.user = user or AnonymousUser()
+        queryset = ProductReadSerializer.list_queryset(Product.objects.order_by('id'), request)
+        expected = JSONRenderer().render(
+            ProductReadSerializer(queryset, many=True, context={'request': request}).data
+        )
+        for products in (queryset, list(queryset)):
+            self.assertEqual(JSONRenderer().render(ProductReadSerializer.fast_data(products, request)), expected)
+
+    def test_parity(self):
+        for params in [{}, {'fields': 'id,price,image'}, {'public': 'true'}, {'expand': 'reviews'},
+                       {'excerpt': 'true'}, {'fields': 'id,description', 'excerpt': 'true'},
+                       {'fields': 'bogus'}]:
+            for user in (None, self.user):
+                with self.subTest(params=params, user=user):
+                    self.assert_parity(params, user)
+
+    def test_unknown_fields_are_ignored(self):
+        client = APIClient()
+        full = client.get('/api/products/').json()['results']
+        self.assertEqual(client.get('/api/products/', {'fields': 'bogus'}).json()['results'], full)
+        narrowed = client.get('/api/products/', {'fields': 'id,bogus'}).json()['results']
+        self.assertEqual(narrowed, [{'id': product['id']} for product in full])
+
+
+class FastJSONRendererParityTests(TestCase):
+    """FastJSONRenderer renders what DRF's JSONRenderer does, through orjson where it can."""
+
+    def test_output_matches_drf(self):
+        for data in [
+            {'text': 'line\u2028separator\u2029paragraph', 'price': Decimal('12.50'), 'ok': None},
+            {'id': 2 ** 70, 'nested': [{'big': -(2 ** 64)}]},
+            [{'name': 'Ünïcode ✓', 'when': timezone.now(), 'score': 0.25}],
+        ]:
+            with self.subTest(data=data):
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_non_finite_floats_render_as_null(self):
+        self.assertEqual(FastJSONRenderer().render({'score': float('nan'), 'rank': float('inf')}),
+                         b'{"score":null,"rank":null}')
+
+    def test_product_lists_take_the_orjson_path(self):
+        Product.objects.bulk_create([
+            Product(name=f'Product {i}', category='Books', price=10 + i, description=None) for i in range(50)
+        ])
+        request = Request(APIRequestFactory().get('/api/products/'))
+        request.user = AnonymousUser()
+        data = ProductReadSerializer.fast_data(Product.objects.order_by('id'), request)
+        with mock.patch.object(JSONRenderer, 'render', side_effect=AssertionError('stdlib renderer used')):
+            rendered = FastJSONRenderer().render(data)
+        self.assertIn(b'null', rendered)
+        self.assertEqual(rendered, JSONRenderer().render(data))
+
+
+class ProductListColumnTests(TestCase):
+    """List querysets only fetch the columns the requested representation reads."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.bulk_create([
+            Product(name='Atlas', category='Books', price=40, stock_quantity=1, description='Maps. ' * 100),
+        ])
+
+    def list_sql(self, params):
+        request = Request(APIRequestFactory().get('/api/products/', params))
+        request.user = AnonymousUser()
+        queryset = ProductReadSerializer.list_queryset(Product.objects.order_by('-total_sold', '-id'), request)
+        return str(queryset.query), ProductReadSerializer.fast_data(queryset, request)
+
+    def test_large_columns_are_not_selected(self):
+        sql, _ = self.list_sql({})
+        self.assertNotIn('"ai_tags"', sql)
+        self.assertNotIn('"search_vector"', sql)
+
+    def test_excerpt_fetches_a_truncated_description(self):
+        sql, data = self.list_sql({'excerpt': 'true'})
+        # The column only appears inside the Left()/SUBSTR() projection
+        self.assertIn('AS "description_excerpt"', sql)
+        self.assertEqual(sql.count('"description"'), 1)
+        self.assertTrue(data[0]['description'].endswith('…'))
+        self.assertLessEqual(len(data[0]['description']), settings.PRODUCT_DESCRIPTION_EXCERPT_LENGTH + 1)
+
+    def test_unrequested_description_is_not_selected(self):
+        sql, data = self.list_sql({'fields': 'id,name,price'})
+        self.assertNotIn('description', sql)
+        self.assertEqual(list(data[0]), ['id', 'name', 'price'])
+
+
+TEST_MEDIA_ROOT = tempfile.mkdtemp()
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class ImageVariantTests(TestCase):
+    """Uploaded images get resized JPEG/WebP derivatives exposed in the payload."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.addClassCleanup(shutil.rmtree, TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (2000, 1000), 'teal').save(buffer, 'JPEG')
+        self.product = Product.objects.bulk_create([Product(name='Poster', category='Home Goods', price=15)])[0]
+        self.product.image_file.save('poster.jpg', ContentFile(buffer.getvalue()), save=False)
+        Product.objects.filter(pk=self.product.pk).update(image_file=self.product.image_file.name)
+
+    def test_variants_are_generated_and_serialized(self):
+        variants = generate_image_variants(self.product.pk)
+        storage = self.product.image_file.storage
+        with storage.open(variants['thumbnail']['webp']) as thumbnail:
+            self.assertEqual(Image.open(thumbnail).size, (320, 160))
+        with storage.open(variants['large']['jpeg']) as large:
+            self.assertEqual(Image.open(large).size, (1600, 800))
+
+        request = Request(APIRequestFactory().get('/api/products/'))
+        request.user = AnonymousUser()
+        product = Product.objects.get(pk=self.product.pk)
+        images = ProductReadSerializer(product, context={'request': request}).data['images']
+        self.assertEqual(set(images), {'thumbnail', 'medium', 'large'})
+        self.assertTrue(images['thumbnail']['webp'].startswith('http://testserver/media/'))
+        self.assertEqual(ProductReadSerializer.fast_data([product], request)[0]['images'], images)
+
+    def test_stale_variants_are_hidden_after_a_new_upload(self):
+        generate_image_variants(self.product.pk)
+        Product.objects.filter(pk=self.product.pk).update(image_file='products/other.jpg')
+        request = Request(APIRequestFactory().get('/api/products/'))
+        request.user = AnonymousUser()
+        self.assertIsNone(ProductReadSerializer.fast_data(Product.objects.all(), request)[0]['images'])
+
+
+@mock.patch('api.importer.enqueue_vector_index')
+@mock.patch('api.importer.generate_ai_tags', return_value={})
+class ProductImportTests(TestCase):
+    """Bulk imports write in batches, checkpoint progress and can be resumed."""
+
+    CSV = (
+        'id,name,category,price,stock_quantity,ai_tags\n'
+        ',Desk Lamp,Home Goods,25.00,4,"lighting, desk"\n'
+        ',Broken Row,Home Goods,not-a-price,1,\n'
+        ',Notebook,Books,3.50,,"paper, stationery"\n'
+        ',Kettle,Home Goods,40.00,2,kitchen\n'
+    )
+
+    def make_job(self, content, file_format='csv'):
+        handle = tempfile.NamedTemporaryFile('w', suffix=f'.{file_format}', delete=False, encoding='utf-8')
+        with handle:
+            handle.write(content)
+        self.addCleanup(lambda: os.remove(handle.name))
+        return ProductImportJob.objects.create(source_path=handle.name, file_format=file_format)
+
+    def test_csv_import_creates_products_and_runs_followups(self, generate_ai_tags, enqueue_vector_index):
+        job = run_import(self.make_job(self.CSV), batch_size=2)
+
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.rows_processed, job.created_count, job.failed_count), (4, 3, 1))
+        self.assertEqual(job.errors[0]['row'], 2)
+        self.assertIn('price', job.errors[0]['errors'])
+        self.assertEqual(job.pending_followup_ids, [])
+        self.assertEqual(Product.objects.get(name='Notebook').stock_quantity, 0)
+        self.assertEqual(
+            set(ProductTag.objects.values_list('name', flat=True)),
+            {'lighting', 'desk', 'paper', 'stationery', 'kitchen'},
+        )
+        # Queued for the vector-index worker once per batch, never per row
+        self.assertEqual(enqueue_vector_index.call_count, 2)
+        self.assertEqual(enqueue_vector_index.call_args.args[0], 'product')
+        generate_ai_tags.assert_not_called()
+
+    def test_rows_with_an_id_update_existing_products(self, generate_ai_tags, enqueue_vector_index):
+        product = Product.objects.bulk_create([Product(name='Mug', category='Home Goods', price=8, ai_tags='mug')])[0]
+        job = run_import(self.make_job(
+            f'{{"id": {product.id}, "price": "9.50", "ai_tags": "mug, ceramic"}}\n'
+            '{"id": 999999, "price": "1.00"}\n'
+            'not json\n',
+            file_format='jsonl',
+        ))
+
+        self.assertEqual((job.updated_count, job.failed_count), (1, 2))
+        product.refresh_from_db()
+        self.assertEqual((product.name, str(product.price)), ('Mug', '9.50'))
+        self.assertEqual(set(product.tags.values_list('name', flat=True)), {'mug', 'ceramic'})
+
+    def test_resume_continues_after_the_checkpoint(self, generate_ai_tags, enqueue_vector_index):
+        job = self.make_job(self.CSV)
+        job.rows_processed = 2
+        job.save()
+
+        job = run_import(job, batch_size=10)
+
+        self.assertEqual(job.created_count, 2)
+        names = set(Product.objects.filter(name__in=['Desk Lamp', 'Notebook', 'Kettle']).values_list('name', flat=True))
+        self.assertEqual(names, {'Notebook', 'Kettle'})
+
+    def test_uploads_are_stored_privately_and_deleted_on_completion(self, generate_ai_tags, enqueue_vector_index):
+        import_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, import_root)
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('importer', password='x', is_staff=True))
+        upload = SimpleUploadedFile('catalog.csv', self.CSV.encode())
+        with override_settings(PRODUCT_IMPORT_ROOT=import_root), mock.patch('api.views.schedule_import'):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post('/api/admin/product-imports/', {'file': upload}, format='multipart')
+            self.assertEqual(response.status_code, 202)
+            job = ProductImportJob.objects.get(pk=response.json()['id'])
+            self.assertEqual(os.path.dirname(job.source_path), os.path.abspath(import_root))
+            self.assertTrue(os.path.exists(job.source_path))
+
+            run_import(job)
+            self.assertFalse(os.path.exists(job.source_path))
+
+
+class AdminExportTests(TestCase):
+    """Admin exports stream every row in primary key order."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('exporter', password='x', is_staff=True)
+        product = Product.objects.bulk_create([Product(name='Globe', category='Home Goods', price='12.50')])[0]
+        order = Order.objects.create(user=cls.admin, total_amount='25.00', shipping_info={'city': 'Pune'}, payment_method='card')
+        OrderItem.objects.create(order=order, product=product, quantity=2, price='12.50')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def read(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_products_ndjson_and_csv_match_the_table(self):
+        records = [json.loads(line) for line in self.read('/api/admin/exports/products.ndjson').splitlines()]
+        self.assertEqual([record['id'] for record in records], list(Product.objects.order_by('pk').values_list('id', flat=True)))
+        self.assertEqual(records[-1]['price'], '12.50')
+
+        rows = list(csv.DictReader(io.StringIO(self.read('/api/admin/exports/products.csv'))))
+        self.assertEqual(len(rows), len(records))
+        self.assertEqual(rows[-1]['name'], 'Globe')
+
+    def test_orders_and_items_export(self):
+        order = json.loads(self.read('/api/admin/exports/orders.ndjson'))
+        self.assertEqual((order['username'], order['shipping_info']), ('exporter', {'city': 'Pune'}))
+        item = next(csv.DictReader(io.StringIO(self.read('/api/admin/exports/order_items.csv'))))
+        self.assertEqual((item['product_name'], item['quantity']), ('Globe', '2'))
+
+    def test_exports_are_admin_only(self):
+        self.client.force_authenticate(User.objects.create_user('shopper', password='x'))
+        self.assertEqual(self.client.get('/api/admin/exports/orders.csv').status_code, 403)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get('/api/admin/exports/users.csv').status_code, 404)
+
+    async def test_asgi_export_streams_chunk_by_chunk(self):
+        token = await sync_to_async(AccessToken.for_user)(self.admin)
+        response = await self.async_client.get(
+            '/api/admin/exports/products.ndjson', headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        # An async iterator, so daphne doesn't build the whole export in memory first
+        self.assertTrue(response.is_async)
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        ids = [json.loads(line)['id'] for line in body.splitlines()]
+        self.assertEqual(ids, await sync_to_async(list)(Product.objects.order_by('pk').values_list('id', flat=True)))
+
+        # The CSV header goes out with the first row
+        chunks = [chunk async for chunk in aiter_export('products', 'csv', chunk_size=1)]
+        self.assertEqual(len(chunks), len(ids))
+
+
+@override_settings(VECTOR_INDEX_IN_PROCESS=False)
+class VectorIndexOutboxTests(TestCase):
+    """Saves queue vector indexing after commit; the worker embeds coalesced batches."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lamp = Product.objects.create(name='Lamp', category='Home Goods', price=20, ai_tags='lamp')
+            self.rug = Product.objects.create(name='Rug', category='Home Goods', price=90, ai_tags='rug')
+
+    def test_repeated_saves_coalesce_into_one_task(self):
+        for price in (21, 22, 23):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.lamp.price = price
+                self.lamp.save()
+        self.assertEqual(VectorIndexTask.objects.filter(kind='product', object_id=self.lamp.pk).count(), 1)
+
+        lamp_id = self.lamp.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lamp.delete()
+        self.assertEqual(VectorIndexTask.objects.get(object_id=lamp_id).action, 'delete')
+
+    @mock.patch('api.vector_db.delete_products_from_index')
+    @mock.patch('api.vector_db.index_products')
+    def test_worker_embeds_the_queue_in_one_batch(self, index_products, delete_products):
+        rug_id = self.rug.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rug.delete()
+
+        self.assertEqual(drain_vector_index(), 2)
+
+        index_products.assert_called_once()
+        self.assertEqual([product.name for product in index_products.call_args.args[0]], ['Lamp'])
+        delete_products.assert_called_once_with([rug_id])
+        self.assertFalse(VectorIndexTask.objects.exists())
+
+    @skipUnless(connection.features.has_select_for_update_skip_locked, 'needs SELECT ... FOR UPDATE SKIP LOCKED')
+    @mock.patch('api.vector_db.delete_products_from_index')
+    @mock.patch('api.vector_db.index_products')
+    def test_batches_are_claimed_with_skip_locked(self, index_products, delete_products):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(drain_vector_index(batch_size=1), 2)
+        claims = [query['sql'] for query in queries if query['sql'].startswith('SELECT') and 'api_vectorindextask' in query['sql']]
+        self.assertEqual(len(claims), 3)
+        for sql in claims:
+            self.assertIn('FOR UPDATE SKIP LOCKED', sql)
+
+    @mock.patch('api.vector_db.delete_products_from_index')
+    @mock.patch('api.vector_db.index_products')
+    def test_claimed_tasks_are_skipped_and_requeues_survive_processing(self, index_products, delete_products):
+        # Claimed by another worker a moment ago, so this drain leaves it alone
+        VectorIndexTask.objects.filter(object_id=self.rug.pk).update(claimed_at=timezone.now(), claimed_by=uuid.uuid4())
+
+        def save_lamp_meanwhile(products):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.lamp.price = 30
+                self.lamp.save()
+        index_products.side_effect = save_lamp_meanwhile
+
+        self.assertEqual(drain_vector_index(), 1)
+        self.assertEqual([product.name for product in index_products.call_args.args[0]], ['Lamp'])
+        # The lamp changed mid-batch, so it's queued again and no longer claimed
+        lamp_task = VectorIndexTask.objects.get(object_id=self.lamp.pk)
+        self.assertIsNone(lamp_task.claimed_by)
+        self.assertEqual(VectorIndexTask.objects.get(object_id=self.rug.pk).attempts, 0)
+
+        with override_settings(VECTOR_INDEX_CLAIM_TIMEOUT=0):
+            index_products.side_effect = None
+            self.assertEqual(drain_vector_index(), 2)
+        self.assertFalse(VectorIndexTask.objects.exists())
+
+    @mock.patch('api.vector_db.index_products', side_effect=RuntimeError('model offline'))
+    def test_failed_tasks_are_kept_for_retry(self, index_products):
+        self.assertEqual(drain_vector_index(), 2)
+        self.assertEqual(
+            list(VectorIndexTask.objects.values_list('attempts', 'last_error').distinct()), [(1, 'model offline')]
+        )
+
+
+class EmbeddingCacheTests(TestCase):
+    """Only text the cache hasn't seen reaches the embedding model."""
+
+    class FakeModel:
+        def __init__(self):
+            self.calls = []
+
+        def encode(self, texts):
+            self.calls.append(list(texts))
+            return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'embeddings.sqlite3')
+        self.model = self.FakeModel()
+
+    def test_unchanged_text_is_not_re_embedded(self):
+        cache = EmbeddingCache(self.path, 'model-a')
+        first = cache.encode(self.model, ['lamp', 'rug'])
+        second = cache.encode(self.model, ['rug', 'lamp', 'sofa', 'sofa'])
+
+        self.assertEqual(self.model.calls, [['lamp', 'rug'], ['sofa']])
+        np.testing.assert_array_equal(second[:2], first[::-1])
+        self.assertEqual(second.shape, (4, 2))
+        self.assertEqual(cache.stats(), {'hits': 3, 'misses': 3, 'hit_ratio': 0.5})
+
+        # Persisted on disk, but never shared with another model
+        EmbeddingCache(self.path, 'model-a').encode(self.model, ['lamp'])
+        EmbeddingCache(self.path, 'model-b').encode(self.model, ['lamp'])
+        self.assertEqual(self.model.calls[2:], [['lamp']])
+
+
+class QueryEmbeddingCacheTests(TestCase):
+    """Identical search queries are encoded once, even when they arrive concurrently."""
+
+    class SlowModel:
+        def __init__(self):
+            self.calls = []
+            self.lock = threading.Lock()
+
+        def encode(self, text):
+            with self.lock:
+                self.calls.append(text)
+            time.sleep(0.05)
+            return np.array([len(text), 1.0], dtype=np.float32)
+
+    def test_concurrent_and_repeated_queries_encode_once(self):
+        model, cache = self.SlowModel(), QueryEmbeddingCache(max_size=10)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            vectors = list(pool.map(lambda query: cache.get(model, query), ['Return policy', ' return  POLICY'] * 4))
+
+        self.assertEqual(model.calls, ['return policy'])
+        self.assertTrue(all(vector == [13.0, 1.0] for vector in vectors))
+        self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (7, 1))
+
+    def test_least_recently_used_query_is_evicted(self):
+        model, cache = self.SlowModel(), QueryEmbeddingCache(max_size=2)
+        for query in ['lamp', 'rug', 'lamp', 'sofa', 'lamp', 'rug']:
+            cache.get(model, query)
+        self.assertEqual(model.calls, ['lamp', 'rug', 'sofa', 'rug'])
+
+
+class ReindexVectorDBTests(TestCase):
+    """Bulk reindexing streams products in fixed-size batches and resumes from its checkpoint."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Product.objects.all().delete()
+        cls.products = Product.objects.bulk_create([
+            Product(name=f'Item {i}', category='Books', price=i + 1) for i in range(5)
+        ])
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.checkpoint = os.path.join(directory, 'checkpoint.json')
+        self.batches = []
+
+    def record(self, products):
+        self.batches.append([product.name for product in products])
+        return len(products)
+
+    def reindex(self, *args):
+        call_command(
+            'reindex_vectordb', '--products', '--batch-size', '2', '--checkpoint', self.checkpoint,
+            *args, stdout=io.StringIO(),
+        )
+
+    def test_products_are_indexed_in_batches(self):
+        with mock.patch('api.vector_db.index_products', side_effect=self.record):
+            self.reindex()
+        self.assertEqual(self.batches, [['Item 0', 'Item 1'], ['Item 2', 'Item 3'], ['Item 4']])
+        with open(self.checkpoint) as handle:
+            self.assertEqual(json.load(handle), {})
+
+    def test_interrupted_run_resumes_after_the_last_batch(self):
+        def fail_on_second_batch(products):
+            if self.batches:
+                raise RuntimeError('chroma went away')
+            return self.record(products)
+
+        with mock.patch('api.vector_db.index_products', side_effect=fail_on_second_batch):
+            with self.assertRaises(CommandError):
+                self.reindex()
+        with mock.patch('api.vector_db.index_products', side_effect=self.record):
+            self.reindex('--resume')
+        self.assertEqual(self.batches, [['Item 0', 'Item 1'], ['Item 2', 'Item 3'], ['Item 4']])
+
+    def test_since_only_indexes_recently_updated_products(self):
+        Product.objects.filter(pk__in=[p.pk for p in self.products[:3]]).update(
+            updated_at=timezone.now() - datetime.timedelta(days=30)
+        )
+        since = (timezone.now() - datetime.timedelta(days=1)).isoformat()
+        with mock.patch('api.vector_db.index_products', side_effect=self.record):
+            self.reindex('--since', since)
+        self.assertEqual(self.batches, [['Item 3', 'Item 4']])
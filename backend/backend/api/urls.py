@@ -5,13 +5,16 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     CreateUserView, MyTokenObtainPairView, ProductViewSet,
-    ProductReviewDetailView, CategoryListView, LikedProductView,
+    ProductReviewDetailView, CategoryListView, CategoryFacetView, LikedProductView,
     LikedProductListView, OrderListCreateView, AdminDashboardView,
     ChatThreadView, CreatePaymentIntentView
 )
 from .views import AdminChatbotView
 
 from .views import CartView ,ChatbotView# Import the new view
+from .views import ProductOverlayView
+from .views import ProductImportView, ProductImportDetailView, ProductImportResumeView
+from .views import AdminExportView
 from .views import PolicyDocumentViewSet
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
@@ -25,8 +28,10 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     # --- CATEGORIES & LIKES ---
     path('categories/', CategoryListView.as_view(), name='category-list'),
+    path('categories/facets/', CategoryFacetView.as_view(), name='category-facets'),
     path('products/like/', LikedProductView.as_view(), name='product-like-toggle'),
     path('products/liked/', LikedProductListView.as_view(), name='liked-product-list'),
+    path('products/overlay/', ProductOverlayView.as_view(), name='product-overlay'),
     # --- REVIEWS (DETAIL VIEW ONLY) ---
     path('reviews/<int:pk>/', ProductReviewDetailView.as_view(), name='product-review-detail'),
     # --- ORDERS & CHECKOUT ---
@@ -37,6 +42,10 @@ urlpatterns = [
     # --- ADMIN ---
     path('admin/dashboard/', AdminDashboardView.as_view(), name='admin-dashboard'),
     path('admin-chatbot/', AdminChatbotView.as_view(), name='admin-chatbot'),
+    path('admin/product-imports/', ProductImportView.as_view(), name='product-import-list'),
+    path('admin/product-imports/<int:pk>/', ProductImportDetailView.as_view(), name='product-import-detail'),
+    path('admin/product-imports/<int:pk>/resume/', ProductImportResumeView.as_view(), name='product-import-resume'),
+    path('admin/exports/<str:dataset>.<str:export_format>', AdminExportView.as_view(), name='admin-export'),
 
     path('cart/', CartView.as_view(), name='user-cart'), # <-- ADD THIS LINE
     path('chatbot/', ChatbotView.as_view(), name='chatbot'), # <-- ADD THIS LINE
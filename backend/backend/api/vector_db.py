@@ -1,11 +1,13 @@
 # api/vector_db.py
 
-import chromadb
-from sentence_transformers import SentenceTransformer
+import threading
+import time
 from .models import Order, PolicyDocument, Product
 import logging
 from pypdf import PdfReader
 import io
+from django.conf import settings
+from .embedding_cache import QueryEmbeddingCache, encode_documents
 
 logger = logging.getLogger(__name__)
 
@@ -16,76 +18,234 @@ EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
 DOCUMENTS_COLLECTION_NAME = "documents"
 PRODUCTS_COLLECTION_NAME = "products"
 
-# --- Initialize ChromaDB Client and Sentence Transformer Model ---
-try:
-    client = chromadb.PersistentClient(path=CHROMA_PATH)
-    embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME)
-    collection = client.get_or_create_collection(
-        name=COLLECTION_NAME,
-        metadata={"hnsw:space": "cosine"}
-    )
-    documents_collection = client.get_or_create_collection(
-        name=DOCUMENTS_COLLECTION_NAME,
-        metadata={"hnsw:space": "cosine"}
-    )
-    products_collection = client.get_or_create_collection(name=PRODUCTS_COLLECTION_NAME)
-    print("ChromaDB and Sentence Transformer model initialized successfully.")
-except Exception as e:
-    logger.error(f"Failed to initialize ChromaDB or Sentence Transformer: {e}")
-    collection = None
-    embedding_model = None
-    documents_collection = None
-    products_collection = None
+# Rows embedded and upserted together by the bulk reindexers
+DEFAULT_REINDEX_BATCH_SIZE = 256
+
+# Metadata each collection is created with
+COLLECTION_METADATA = {
+    COLLECTION_NAME: {"hnsw:space": "cosine"},
+    DOCUMENTS_COLLECTION_NAME: {"hnsw:space": "cosine"},
+    PRODUCTS_COLLECTION_NAME: None,
+}
+
+# ==========================================================
+# --- LAZY INITIALIZATION ---
+# ==========================================================
+# chromadb, sentence-transformers (torch) and the model weights take seconds
+# and hundreds of MB to load, so nothing is loaded at import time: every
+# process that never touches the vector DB (migrate, most management
+# commands, tests) skips the cost. Each resource is built on first use, once
+# per process; a failure is logged and remembered as None, as before.
+
+_resources = {}
+_resources_lock = threading.RLock()
+
+
+def _lazy(name, factory):
+    resource = _resources.get(name)
+    if resource is not None or name in _resources:
+        return resource
+    with _resources_lock:
+        if name not in _resources:
+            try:
+                _resources[name] = factory()
+            except Exception as e:
+                logger.error(f"Failed to initialize {name} for the vector DB: {e}")
+                _resources[name] = None
+    return _resources[name]
+
+
+def _create_client():
+    import chromadb
+    return chromadb.PersistentClient(path=CHROMA_PATH)
+
+
+def _create_embedding_model():
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    logger.info(f"Sentence Transformer model '{EMBEDDING_MODEL_NAME}' loaded.")
+    return model
+
+
+def get_client():
+    """The ChromaDB client, or None if it couldn't be opened."""
+    return _lazy('client', _create_client)
+
+
+def get_embedding_model():
+    """The Sentence Transformer model, or None if it couldn't be loaded."""
+    return _lazy('embedding_model', _create_embedding_model)
+
+
+def _get_collection(name):
+    def create():
+        client = get_client()
+        if client is None:
+            raise Exception("ChromaDB client is not available.")
+        metadata = COLLECTION_METADATA[name]
+        if metadata:
+            return client.get_or_create_collection(name=name, metadata=metadata)
+        return client.get_or_create_collection(name=name)
+    return _lazy(f'collection:{name}', create)
+
 
+def get_orders_collection():
+    return _get_collection(COLLECTION_NAME)
 
-def index_all_orders():
+
+def get_documents_collection():
+    return _get_collection(DOCUMENTS_COLLECTION_NAME)
+
+
+def get_products_collection():
+    return _get_collection(PRODUCTS_COLLECTION_NAME)
+
+
+def reset_collections():
+    """Forgets the cached collection handles, e.g. after they were deleted, so the next use recreates them."""
+    with _resources_lock:
+        for name in COLLECTION_METADATA:
+            _resources.pop(f'collection:{name}', None)
+
+
+def warm_up():
+    """Loads the model and opens every collection now rather than on the first request."""
+    start = time.perf_counter()
+    get_embedding_model()
+    for name in COLLECTION_METADATA:
+        _get_collection(name)
+    logger.info(f"Vector DB warmed up in {time.perf_counter() - start:.2f}s.")
+
+
+def warm_up_in_background():
+    """Warm-up hook for web workers: loads everything on a daemon thread so startup isn't blocked."""
+    thread = threading.Thread(target=warm_up, name='vector-db-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+_query_embeddings = None
+_query_embeddings_lock = threading.Lock()
+
+
+def embed_query(query: str):
     """
-    Fetches all orders from the database, creates a descriptive text for each,
-    generates an embedding, and stores it in ChromaDB.
+    The embedding of a search query, from a bounded LRU shared by every search
+    function, so repeated (or concurrent) searches for the same text encode it
+    once. Compute it up front and pass it as `query_embedding` when running
+    several searches for one query.
     """
-    if not collection:
+    global _query_embeddings
+    embedding_model = get_embedding_model()
+    if not embedding_model:
+        raise Exception("Embedding model not available. Cannot embed query.")
+    with _query_embeddings_lock:
+        if _query_embeddings is None:
+            _query_embeddings = QueryEmbeddingCache(settings.QUERY_EMBEDDING_CACHE_SIZE)
+    return _query_embeddings.get(embedding_model, query)
+
+
+def _embed_documents(embedding_model, documents):
+    """Embeddings for documents being indexed; unchanged text is served from the embedding cache."""
+    return encode_documents(embedding_model, documents, EMBEDDING_MODEL_NAME)
+
+
+def _order_document(order: Order):
+    """The text embedded for an order, and the metadata stored alongside it."""
+    product_list = ", ".join([f"{item.quantity} x {item.product.name}" for item in order.items.all()])
+    document_text = (
+        f"Order ID {order.id} was placed on {order.created_at.strftime('%B %d, %Y')}. "
+        f"It contained the products: {product_list}. "
+        f"The total price was ${order.total_amount}."
+    )
+    # --- FIX: Convert ALL metadata values to strings to ensure they are saved ---
+    metadata = {
+        "order_id": str(order.id),
+        "user_id": str(order.user_id),
+        "date": order.created_at.isoformat(),
+        "total_amount": str(int(order.total_amount * 100)), # Store cents as a string
+        "products": product_list
+    }
+    return document_text, metadata
+
+
+def index_orders(orders):
+    """
+    Indexes or updates a batch of orders (with their items and products
+    prefetched) with one embedding call and one upsert. Returns the number indexed.
+    """
+    collection, embedding_model = get_orders_collection(), get_embedding_model()
+    if not collection or not embedding_model:
         raise Exception("ChromaDB collection is not available. Cannot index orders.")
 
-    orders = Order.objects.prefetch_related('items', 'items__product').all()
     documents, metadatas, ids = [], [], []
-
     for order in orders:
-        product_list = ", ".join([f"{item.quantity} x {item.product.name}" for item in order.items.all()])
-        document_text = (
-            f"Order ID {order.id} was placed on {order.created_at.strftime('%B %d, %Y')}. "
-            f"It contained the products: {product_list}. "
-            f"The total price was ${order.total_amount}."
-        )
+        document_text, metadata = _order_document(order)
         documents.append(document_text)
-        
-        # --- FIX: Convert ALL metadata values to strings to ensure they are saved ---
-        metadatas.append({
-            "order_id": str(order.id),
-            "user_id": str(order.user.id),
-            "date": order.created_at.isoformat(),
-            "total_amount": str(int(order.total_amount * 100)), # Store cents as a string
-            "products": product_list
-        })
-        
+        metadatas.append(metadata)
         ids.append(str(order.id))
 
     if not documents:
-        logger.info("No orders found to index.")
         return 0
-    
-    collection.upsert(embeddings=embedding_model.encode(documents).tolist(), documents=documents, metadatas=metadatas, ids=ids)
-    logger.info(f"Successfully indexed {len(documents)} orders into ChromaDB.")
+
+    collection.upsert(embeddings=_embed_documents(embedding_model, documents).tolist(), documents=documents, metadatas=metadatas, ids=ids)
     return len(documents)
 
 
-def search_orders(query: str, user_id: int, n_results: int = 1):
+def index_in_batches(queryset, indexer, batch_size=DEFAULT_REINDEX_BATCH_SIZE, start_after=None, progress=None):
+    """
+    Streams `queryset` in primary key order and hands it to `indexer` in
+    batches of `batch_size`: one embedding call and one upsert per batch, so
+    memory stays flat and a failure loses at most one batch. Rows up to
+    `start_after` (a checkpointed pk) are skipped. After each batch
+    `progress(last_pk, indexed_so_far)` is called. Returns the number indexed.
+    """
+    queryset = queryset.order_by('pk')
+    if start_after is not None:
+        queryset = queryset.filter(pk__gt=start_after)
+
+    indexed, batch = 0, []
+    for obj in queryset.iterator(chunk_size=batch_size):
+        batch.append(obj)
+        if len(batch) == batch_size:
+            indexed += indexer(batch)
+            if progress:
+                progress(batch[-1].pk, indexed)
+            batch = []
+    if batch:
+        indexed += indexer(batch)
+        if progress:
+            progress(batch[-1].pk, indexed)
+    return indexed
+
+
+def index_all_orders(batch_size=DEFAULT_REINDEX_BATCH_SIZE, since=None, start_after=None, progress=None):
+    """
+    Fetches all orders (or those created since `since`) from the database,
+    creates a descriptive text for each, generates an embedding, and stores
+    it in ChromaDB, batch by batch (see index_in_batches).
+    """
+    orders = Order.objects.prefetch_related('items', 'items__product')
+    if since:
+        orders = orders.filter(created_at__gte=since)
+    count = index_in_batches(orders, index_orders, batch_size, start_after, progress)
+    if not count:
+        logger.info("No orders found to index.")
+        return 0
+    logger.info(f"Successfully indexed {count} orders into ChromaDB.")
+    return count
+
+
+def search_orders(query: str, user_id: int, n_results: int = 1, query_embedding=None):
     """
     Searches for the most relevant order for a given user query using RAG.
     """
-    if not collection or not embedding_model:
+    collection = get_orders_collection()
+    if not collection or (query_embedding is None and not get_embedding_model()):
         raise Exception("ChromaDB or embedding model not available. Cannot search.")
 
-    query_embedding = embedding_model.encode(query).tolist()
+    if query_embedding is None:
+        query_embedding = embed_query(query)
     
     # --- FIX: The value in the 'where' filter must also be a string to match storage format ---
     results = collection.query(
@@ -101,95 +261,91 @@ def index_single_order(order: Order):
     """
     Indexes or updates a single order in ChromaDB.
     """
+    collection, embedding_model = get_orders_collection(), get_embedding_model()
     if not collection or not embedding_model:
         logger.error(f"ChromaDB not available. Cannot index order ID: {order.id}")
         return
 
     try:
-        product_list = ", ".join([f"{item.quantity} x {item.product.name}" for item in order.items.all()])
-        document_text = (
-            f"Order ID {order.id} was placed on {order.created_at.strftime('%B %d, %Y')}. "
-            f"It contained: {product_list}. Total price was ${order.total_amount}."
-        )
-        
-        # --- FIX: Convert ALL metadata values to strings to ensure they are saved ---
-        metadata = {
-            "order_id": str(order.id), 
-            "user_id": str(order.user.id),
-            "date": order.created_at.isoformat(), 
-            "total_amount": str(int(order.total_amount * 100)),
-            "products": product_list
-        }
-        
-        embedding = embedding_model.encode(document_text).tolist()
-        collection.upsert(
-            embeddings=[embedding],
-            documents=[document_text],
-            metadatas=[metadata],
-            ids=[str(order.id)]
-        )
+        index_orders([order])
         logger.info(f"Successfully upserted order ID: {order.id}")
     except Exception as e:
         logger.error(f"Failed to upsert order ID {order.id}: {e}")
 
 
-def index_all_products():
+def delete_orders_from_index(order_ids):
+    """Deletes orders from the 'orders' collection by ID."""
+    if not order_ids:
+        return
+    collection = get_orders_collection()
+    if not collection:
+        return
+    collection.delete(ids=[str(order_id) for order_id in order_ids])
+
+
+def _product_document(product: Product):
+    """The text embedded for a product, and the metadata stored alongside it."""
+    document_text = (
+        f"Product Name: {product.name}. Category: {product.category}. Price: ${product.price}. "
+        f"Description: {product.description or 'N/A'}."
+    )
+    # --- FIX: Convert ALL metadata values to strings ---
+    metadata = {
+        "product_id": str(product.id),
+        "name": product.name,
+        "category": product.category,
+        "price": str(int(product.price * 100)) # Store cents as a string
+    }
+    return document_text, metadata
+
+
+def index_products(products):
     """
-    Fetches all products from the database, creates a rich text document for each,
-    generates an embedding, and stores it in the 'products' collection.
+    Indexes or updates a batch of products with one embedding call and one
+    upsert. Returns the number of products indexed.
     """
-    if not products_collection:
+    products_collection, embedding_model = get_products_collection(), get_embedding_model()
+    if not products_collection or not embedding_model:
         raise Exception("ChromaDB 'products' collection is not available.")
 
-    all_products = Product.objects.all()
     documents, metadatas, ids = [], [], []
-
-    for product in all_products:
-        document_text = (
-            f"Product Name: {product.name}. Category: {product.category}. Price: ${product.price}. "
-            f"Description: {product.description or 'N/A'}."
-        )
+    for product in products:
+        document_text, metadata = _product_document(product)
         documents.append(document_text)
-        
-        # --- FIX: Convert ALL metadata values to strings ---
-        metadatas.append({
-            "product_id": str(product.id),
-            "name": product.name,
-            "category": product.category,
-            "price": str(int(product.price * 100)) # Store cents as a string
-        })
-        
+        metadatas.append(metadata)
         ids.append(str(product.id))
 
     if not documents:
         return 0
 
-    products_collection.upsert(ids=ids, embeddings=embedding_model.encode(documents).tolist(), documents=documents, metadatas=metadatas)
-    logger.info(f"Successfully indexed {len(documents)} products.")
+    products_collection.upsert(ids=ids, embeddings=_embed_documents(embedding_model, documents).tolist(), documents=documents, metadatas=metadatas)
     return len(documents)
 
 
+def index_all_products(batch_size=DEFAULT_REINDEX_BATCH_SIZE, since=None, start_after=None, progress=None):
+    """
+    Fetches all products (or those updated since `since`) from the database,
+    creates a rich text document for each, generates an embedding, and stores
+    it in the 'products' collection, batch by batch (see index_in_batches).
+    """
+    products = Product.objects.only('id', 'name', 'category', 'price', 'description')
+    if since:
+        products = products.filter(updated_at__gte=since)
+    count = index_in_batches(products, index_products, batch_size, start_after, progress)
+    logger.info(f"Successfully indexed {count} products.")
+    return count
+
+
 def index_single_product(product: Product):
     """
     Indexes or updates a single product in the 'products' collection.
     """
+    products_collection, embedding_model = get_products_collection(), get_embedding_model()
     if not products_collection or not embedding_model:
         return
 
     try:
-        document_text = (
-            f"Product Name: {product.name}. Category: {product.category}. Price: ${product.price}. "
-            f"Description: {product.description or 'N/A'}."
-        )
-        # --- FIX: Convert ALL metadata values to strings ---
-        metadata = {
-            "product_id": str(product.id), 
-            "name": product.name,
-            "category": product.category, 
-            "price": str(int(product.price * 100))
-        }
-        embedding = embedding_model.encode(document_text).tolist()
-        products_collection.upsert(ids=[str(product.id)], embeddings=[embedding], documents=[document_text], metadatas=[metadata])
+        index_products([product])
         logger.info(f"Successfully indexed/updated product ID: {product.id}")
     except Exception as e:
         logger.error(f"Failed to index/update product ID {product.id}: {e}")
@@ -216,6 +372,7 @@ def index_document(document: PolicyDocument):
     Reads a PolicyDocument, splits its text into chunks, creates embeddings,
     and adds them to the 'documents' collection in ChromaDB.
     """
+    documents_collection, embedding_model = get_documents_collection(), get_embedding_model()
     if not documents_collection or not embedding_model:
         raise Exception("ChromaDB document collection not available.")
     text = extract_text_from_file(document.file)
@@ -227,40 +384,56 @@ def index_document(document: PolicyDocument):
         return
     chunk_ids = [f"doc{document.id}_chunk{i}" for i, _ in enumerate(chunks)]
     metadatas = [{"document_id": document.id, "document_title": document.title, "chunk_index": i} for i, _ in enumerate(chunks)]
-    documents_collection.upsert(ids=chunk_ids, embeddings=embedding_model.encode(chunks).tolist(), documents=chunks, metadatas=metadatas)
+    documents_collection.upsert(ids=chunk_ids, embeddings=_embed_documents(embedding_model, chunks).tolist(), documents=chunks, metadatas=metadatas)
     logger.info(f"Successfully indexed/updated {len(chunks)} chunks for document: {document.title}")
 
 def delete_document_from_index(document_id: int):
     """Deletes all chunks associated with a document ID from ChromaDB."""
+    documents_collection = get_documents_collection()
     if not documents_collection:
         return
     documents_collection.delete(where={"document_id": document_id})
     logger.info(f"Successfully deleted chunks for document ID: {document_id}")
 
 
-def search_documents(query: str, n_results: int = 3):
+def search_documents(query: str, n_results: int = 3, query_embedding=None):
     """Searches the 'documents' collection for the most relevant text chunks."""
-    if not documents_collection or not embedding_model:
+    documents_collection = get_documents_collection()
+    if not documents_collection or (query_embedding is None and not get_embedding_model()):
         return []
-    query_embedding = embedding_model.encode(query).tolist()
+    if query_embedding is None:
+        query_embedding = embed_query(query)
     results = documents_collection.query(query_embeddings=[query_embedding], n_results=n_results)
     return results.get('documents', [[]])[0]
 
 def delete_product_from_index(product_id: int):
     """Deletes a product from the 'products' collection by its ID."""
+    products_collection = get_products_collection()
     if not products_collection:
         return
     products_collection.delete(ids=[str(product_id)])
     logger.info(f"Successfully deleted product ID: {product_id} from index.")
 
 
-def search_products(query: str, n_results: int = 3):
+def delete_products_from_index(product_ids):
+    """Deletes several products from the 'products' collection in one call."""
+    if not product_ids:
+        return
+    products_collection = get_products_collection()
+    if not products_collection:
+        return
+    products_collection.delete(ids=[str(product_id) for product_id in product_ids])
+
+
+def search_products(query: str, n_results: int = 3, query_embedding=None):
     """
     Performs a semantic search on the 'products' collection.
     Returns the full text document of the most relevant products.
     """
-    if not products_collection or not embedding_model:
+    products_collection = get_products_collection()
+    if not products_collection or (query_embedding is None and not get_embedding_model()):
         return []
-    query_embedding = embedding_model.encode(query).tolist()
+    if query_embedding is None:
+        query_embedding = embed_query(query)
     results = products_collection.query(query_embeddings=[query_embedding], n_results=n_results)
     return results.get('documents', [[]])[0]
\ No newline at end of file
@@ -23,7 +23,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 
 # --- Local Application Imports ---
 from .models import (
-    Product, LikedProduct, Order, OrderItem, ChatThread, ProductReview
+    Product, LikedProduct, Order, OrderItem, ChatThread, ProductReview, ProductNeighbor
 )
 from .serializers import (
     ChatMessageSerializer,
@@ -34,9 +34,22 @@ from .serializers import (
     OrderCreateSerializer,
     ChatThreadSerializer,
     MyTokenObtainPairSerializer,
-    ProductReviewSerializer
+    ProductReviewSerializer,
+    LIST_COLUMNS,
 )
 from .permissions import IsAuthorOrAdminOrReadOnly
+from .pagination import KeysetCursorPagination
+from .filters import ProductFilterBackend
+from .search import search_products
+from .bestsellers import BESTSELLER_WINDOWS, bestseller_etag_version, get_bestseller_ids
+from .sampling import sample_category_products, take_ranked_sample
+from .facets import get_category_facets, get_category_names
+from .conditional import conditional_catalog_get
+from .caching import (
+    get_cached_recommendation_ids,
+    set_cached_recommendation_ids,
+    get_recommendation_cache_stats,
+)
 from django.shortcuts import get_object_or_404 # A slightly more direct import
 
 # ==========================================================
@@ -221,19 +234,14 @@ from PIL import Image
 import io
 
 from rest_framework import status
-from functools import reduce
-from django.db.models import Q, Count
-from django.db.models import Case, When, IntegerField
+from django.db.models import Count
 import logging
-# The 'reduce' function is great for this kind of operation
-from functools import reduce 
 import operator
 
 logger = logging.getLogger(__name__)
 # import google.generativeai as genai
 import json
 # genai.configure(api_key=settings.GEMINI_API_KEY)
-from django.db.models.functions import Coalesce
  
 from .moderation import moderate_text_with_gemini # Your new Gemini moderation function
 
@@ -243,21 +251,36 @@ class ProductViewSet(viewsets.ModelViewSet):
     """
     # queryset = Product.objects.all().order_by('id')
     parser_classes = (MultiPartParser, FormParser, JSONParser)
+    pagination_class = KeysetCursorPagination
+    filter_backends = [ProductFilterBackend]
+    # Catalog filters narrow the list endpoints only; single-product lookups
+    # (retrieve, update, destroy, reviews, recommendations) ignore them.
+    filtered_actions = ('list', 'tag_search')
 
     def get_queryset(self):
         """
         Overrides the default queryset to sort ALL products by sales volume.
         Products that have sold the most will appear first.
         """
-        # Annotate every product with its total sales count.
-        # Coalesce ensures that products never sold are treated as having 0 sales.
-        queryset = Product.objects.annotate(
-            total_sold=Coalesce(Sum('orderitem__quantity'), 0)
-        )
-        
-        # Sort the entire list by the new 'total_sold' field (descending),
-        # with a secondary sort by ID to ensure consistent ordering for items with equal sales.
-        return queryset.order_by('-total_sold', '-id')
+        # 'total_sold' is a persisted rollup kept current by order creation,
+        # so this is an index scan rather than an aggregate over OrderItem.
+        # The secondary sort by ID keeps ordering consistent for items with equal sales.
+        return Product.objects.order_by('-total_sold', '-id')
+
+    def filter_queryset(self, queryset):
+        if self.action not in self.filtered_actions:
+            return queryset
+        return super().filter_queryset(queryset)
+
+    # Read actions answer `If-None-Match` with 304 while the catalog (or, for a
+    # single product, that product) hasn't changed; see api/conditional.py.
+    @conditional_catalog_get
+    def list(self, request, *args, **kwargs):
+        return self.get_paginated_product_response(self.filter_queryset(self.get_queryset()))
+
+    @conditional_catalog_get(per_product=True)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     from langchain_google_genai import ChatGoogleGenerativeAI  # Updated import
 
@@ -368,66 +391,28 @@ class ProductViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)   
         
     @action(detail=False, methods=['get'], url_path='bestsellers')
+    @conditional_catalog_get(extra_version=bestseller_etag_version)
     def bestsellers(self, request):
         """
-        Calculates and returns a list of bestseller products, enhanced by AI tags.
-        
-        Logic:
-        1. Identify the top 5 products with the highest sales volume (sum of quantity in OrderItem).
-        2. Collect all unique AI tags from these top 5 products.
-        3. Find other products (up to 10) that share these "trending" tags.
-        4. Rank these other products by how many trending tags they match.
-        5. Return a combined list, with the actual bestsellers first, followed by
-           the AI-recommended similar products.
-        """
-        try:
-            # 1. Identify the top 5 best-selling products by quantity sold
-            top_products = Product.objects.annotate(
-                total_sold=Sum('orderitem__quantity')
-            ).filter(
-                total_sold__gt=0
-            ).order_by('-total_sold')[:5]
-
-            top_product_ids = [p.id for p in top_products]
-
-            # 2. Collect unique AI tags from these bestsellers
-            trending_tags = set()
-            for product in top_products:
-                if product.ai_tags:
-                    tags = [tag.strip() for tag in product.ai_tags.split(',') if tag.strip()]
-                    trending_tags.update(tags)
-
-            if not trending_tags:
-                # If no bestsellers have tags, just return the bestsellers themselves
-                serializer = self.get_serializer(top_products, many=True)
-                return Response(serializer.data, status=status.HTTP_200_OK)
+        Returns the bestseller products, enhanced by AI tags: the top 5 sellers
+        within the sales window followed by products sharing their tags.
 
-            # 3. Find other products matching these trending tags
-            query_filter = Q()
-            for tag in trending_tags:
-                query_filter |= Q(ai_tags__icontains=tag)
+        The list comes from a cached snapshot rebuilt at most once per
+        BESTSELLER_SNAPSHOT_TTL by a single worker (see api/bestsellers.py), so
+        this endpoint does not aggregate OrderItem per request.
+        `?window=7|30|all` picks the sales window (default BESTSELLER_WINDOW).
+        """
+        window = request.query_params.get('window', settings.BESTSELLER_WINDOW)
+        if window not in BESTSELLER_WINDOWS:
+            return Response(
+                {"error": f"window must be one of: {', '.join(BESTSELLER_WINDOWS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-            # 4. Rank them by relevance (how many trending tags they match)
-            relevance_conditions = [
-                Case(When(ai_tags__icontains=tag, then=1), default=0, output_field=IntegerField())
-                for tag in trending_tags
-            ]
-            
-            ai_recommended_products = Product.objects.filter(
-                query_filter
-            ).exclude(
-                id__in=top_product_ids # Exclude the original bestsellers
-            ).annotate(
-                relevance_score=sum(relevance_conditions)
-            ).filter(
-                relevance_score__gt=0
-            ).order_by('-relevance_score', '?')[:10] # Order by score, then randomize
-
-            # 5. Combine the lists
-            final_product_list = list(top_products) + list(ai_recommended_products)
-            
-            # Ensure uniqueness just in case, and limit total size
-            final_products = list({p.id: p for p in final_product_list}.values())[:12]
+        try:
+            bestseller_ids = get_bestseller_ids(window)
+            products_by_id = Product.objects.only(*LIST_COLUMNS).in_bulk(bestseller_ids)
+            final_products = [products_by_id[pid] for pid in bestseller_ids if pid in products_by_id]
 
             serializer = self.get_serializer(final_products, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -441,32 +426,29 @@ class ProductViewSet(viewsets.ModelViewSet):
 
     # --- 1. AI SEARCH ENDPOINT FOR USERS ---
     @action(detail=False, methods=['get'], url_path='tag-search')
+    @conditional_catalog_get
     def tag_search(self, request):
         query = request.query_params.get('query', None)
         if not query or len(query.strip()) < 3:
-            products = Product.objects.all().order_by('id')
-            serializer = self.get_serializer(products, many=True)
-            return Response(serializer.data)
-
-        stop_words = {'a', 'an', 'the', 'is', 'in', 'it', 'of', 'for', 'on', 'i', 'want', 'with', 'and', 'best'}
-        keywords = [word for word in query.lower().split() if word not in stop_words]
+            products = self.filter_queryset(Product.objects.all().order_by('id'))
+            return self.get_paginated_product_response(products)
 
-        if not keywords:
-             return Response(self.get_serializer(Product.objects.none(), many=True).data)
+        # Full-text search with stemming and weighted ranking on PostgreSQL,
+        # keyword matching elsewhere (see api/search.py)
+        results = search_products(self.filter_queryset(Product.objects.all()), query)
+        if results is None:
+            results = Product.objects.none().order_by('id')
 
-        query_filter = Q()
-        for keyword in keywords:
-            query_filter |= Q(name__icontains=keyword) | Q(ai_tags__icontains=keyword)
+        return self.get_paginated_product_response(results)
 
-        relevance_conditions = [Q(ai_tags__icontains=kw) for kw in keywords]
-        relevance = Count('id', filter=reduce(lambda a, b: a | b, relevance_conditions))
-
-        results = Product.objects.filter(query_filter).annotate(
-            relevance_score=relevance
-        ).order_by('-relevance_score', 'id')
-
-        serializer = self.get_serializer(results, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    def get_paginated_product_response(self, queryset):
+        """
+        Serializes one keyset page of the queryset (see api/pagination.py).
+        Uses ProductReadSerializer's .values()-based fast path, which renders the same output.
+        """
+        queryset = ProductReadSerializer.list_queryset(queryset, self.request)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(ProductReadSerializer.fast_data(page, request=self.request))
 
     # --- 2. AI CONTENT GENERATION ENDPOINT FOR ADMINS ---
     # Improved generate_content method for your ProductViewSet
@@ -639,39 +621,54 @@ class ProductViewSet(viewsets.ModelViewSet):
     #     except Exception as e:
     #         return Response({"error": "Could not generate recommendations."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     @action(detail=True, methods=['get'], url_path='recommendations')
+    @conditional_catalog_get
     def recommendations(self, request, pk=None):
         """
         Generates a hybrid list of up to 10 product recommendations.
         It combines up to 10 products from the same category with up to 10
         products that are semantically similar based on AI tags.
+
+        With `?mode=copurchase`, returns the precomputed "frequently bought together"
+        neighbours instead (see the `build_copurchase_matrix` command), falling back
+        to the hybrid list for products that have none yet.
         """
         try:
+            if request.query_params.get('mode') == 'copurchase':
+                neighbors = ProductNeighbor.objects.filter(
+                    product_id=pk
+                ).select_related('neighbor').order_by('rank')[:10]
+                copurchase_recs = [entry.neighbor for entry in neighbors]
+                if copurchase_recs:
+                    serializer = self.get_serializer(copurchase_recs, many=True)
+                    return Response(serializer.data, status=status.HTTP_200_OK)
+
             target_product = self.get_object()
+
+            cached_ids = get_cached_recommendation_ids(target_product)
+            if cached_ids is not None:
+                products_by_id = Product.objects.only(*LIST_COLUMNS).in_bulk(cached_ids)
+                cached_recs = [products_by_id[rec_id] for rec_id in cached_ids if rec_id in products_by_id]
+                serializer = self.get_serializer(cached_recs, many=True)
+                return Response(serializer.data, status=status.HTTP_200_OK)
             
             # --- 1. Get Recommendations from the Same Category ---
             category_recs = []
             if target_product.category:
-                category_recs = list(Product.objects.filter(
-                    category=target_product.category
-                ).exclude(pk=pk).order_by('?')[:10]) # Get 10 random products
+                # Get 10 random products, sampled from the cached category ID list
+                category_recs = sample_category_products(
+                    target_product.category, 10, exclude_ids=[target_product.pk]
+                )
 
             # --- 2. Get Recommendations from Similar AI Tags ---
             tag_recs = []
-            if target_product.ai_tags:
-                target_tags = [tag.strip() for tag in target_product.ai_tags.split(',') if tag.strip()]
-                if target_tags:
-                    tag_query_filter = Q()
-                    for tag in target_tags:
-                        tag_query_filter |= Q(ai_tags__icontains=tag)
-                    
-                    relevance_conditions = [Q(ai_tags__icontains=tag) for tag in target_tags]
-                    relevance = Count('id', filter=reduce(lambda a, b: a | b, relevance_conditions))
-                    
-                    tag_recs = list(Product.objects.filter(
-                        tag_query_filter
-                    ).exclude(pk=pk).distinct().annotate(
-                        relevance_score=relevance
-                    ).order_by('-relevance_score', '?')[:10]) # Get top 10 most similar
+            target_tags = list(target_product.tags.values_list('name', flat=True))
+            if target_tags:
+                # Rank by number of shared tags with an indexed join on ProductTag
+                tag_recs = take_ranked_sample(Product.objects.filter(
+                    tags__name__in=target_tags
+                ).exclude(pk=target_product.pk).annotate(
+                    relevance_score=Count('tags')
+                ).only(*LIST_COLUMNS), 10) # Get top 10 most similar, ties shuffled
 
             # --- 3. Combine and De-duplicate the Lists ---
             # We use a dictionary to ensure each product appears only once.
@@ -686,6 +683,7 @@ class ProductViewSet(viewsets.ModelViewSet):
             
             # Convert back to a list and ensure we have a max of 10
             final_recommendations = list(combined_recs.values())[:10]
+            set_cached_recommendation_ids(target_product, [p.id for p in final_recommendations])
 
             serializer = self.get_serializer(final_recommendations, many=True)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -704,6 +702,12 @@ class ProductViewSet(viewsets.ModelViewSet):
     def get_serializer_context(self):
         return {'request': self.request}
 
+    def get_serializer(self, *args, **kwargs):
+        # Load nested relations (e.g. ?expand=reviews) in bulk rather than per product
+        if args and self.get_serializer_class() is ProductReadSerializer:
+            args = (ProductReadSerializer.prefetch_for(args[0], self.request),) + args[1:]
+        return super().get_serializer(*args, **kwargs)
+
     def get_permissions(self):
         # Updated to allow public access to all necessary 'read' and 'search' actions
         if self.action in ['list', 'retrieve', 'tag_search', 'recommendations','bestsellers'] or \
@@ -738,6 +742,7 @@ class ProductViewSet(viewsets.ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=True, methods=['get', 'post'], url_path='reviews')
+    @conditional_catalog_get(per_product=True)
     def reviews(self, request, pk=None):
         """
         Handles listing (GET) and creating (POST) reviews for a specific product,
@@ -779,9 +784,20 @@ class ProductReviewDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 class CategoryListView(APIView):
     permission_classes = [permissions.AllowAny]
+    @conditional_catalog_get
+    def get(self, request, *args, **kwargs):
+        return Response(get_category_names())
+
+
+class CategoryFacetView(APIView):
+    """
+    Per-category product counts, in-stock counts and price ranges for the
+    storefront filters. Served from the cached category index.
+    """
+    permission_classes = [permissions.AllowAny]
+    @conditional_catalog_get
     def get(self, request, *args, **kwargs):
-        categories = Product.objects.values_list('category', flat=True).distinct().order_by('category')
-        return Response(categories)
+        return Response(get_category_facets())
 
 class LikedProductView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -803,7 +819,8 @@ class LikedProductListView(generics.ListAPIView):
     def get_queryset(self):
         user = self.request.user
         liked_product_ids = LikedProduct.objects.filter(user=user).values_list('product_id', flat=True)
-        return Product.objects.filter(id__in=liked_product_ids)
+        queryset = Product.objects.filter(id__in=liked_product_ids)
+        return ProductReadSerializer.prefetch_for(queryset, self.request)
 
 # ==========================================================
 # --- ORDER VIEWS ---
@@ -815,7 +832,12 @@ class OrderListCreateView(generics.ListCreateAPIView):
             return OrderCreateSerializer
         return OrderHistorySerializer
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user).order_by('-created_at')
+        return (
+            Order.objects.filter(user=self.request.user)
+            .select_related('user')
+            .prefetch_related('items__product')
+            .order_by('-created_at')
+        )
     def get_serializer_context(self):
         return {'request': self.request}
 
@@ -952,11 +974,7 @@ class AdminDashboardView(APIView):
         problematic_inventory_insights.sort(key=lambda x: status_order.get(x['ai_status'], 99))
         
         # --- Sales by Category & Recent Transactions Widgets (Unchanged) ---
-        all_categories = list(
-            Product.objects.filter(category__isnull=False, category__gt='')
-                           .values_list('category', flat=True)
-                           .distinct().order_by('category')
-        )
+        all_categories = [name for name in get_category_names() if name]
         category_sales_query = OrderItem.objects.values('product__category').annotate(
             total_revenue=Sum(F('quantity') * F('price'))
         )
@@ -1028,6 +1046,8 @@ class AdminDashboardView(APIView):
             .order_by('-avg_response')[:10]
         )
 
+        data['recommendation_cache'] = get_recommendation_cache_stats()
+
         # Add the new performance data to the main response dictionary
         data['performance_metrics'] = {
             'total_requests': perf_metrics.count(),
@@ -1131,12 +1151,15 @@ class CartView(APIView):
         """
         cart, created = UserCart.objects.get_or_create(user=request.user)
         
+        cart_items = list(cart.items.select_related('product'))
+        products = ProductReadSerializer.prefetch_for([item.product for item in cart_items], request)
+        products_data = ProductReadSerializer(products, many=True, context={'request': request}).data
+
         cart_items_data = []
-        for item in cart.items.all():
-            product_data = ProductReadSerializer(item.product, context={'request': request}).data
+        for item, product_data in zip(cart_items, products_data):
             product_data['quantity'] = item.quantity
             cart_items_data.append(product_data)
-            
+
         return Response(cart_items_data)
 
     def post(self, request, *args, **kwargs):
@@ -1185,7 +1208,139 @@ class CartView(APIView):
         except Exception as e:
             logger.error(f"Cart synchronization failed for user {request.user.id}: {e}", exc_info=True)
             return Response({"error": "Failed to synchronize cart state due to an internal error."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
+
+
+# Upper bound on ?ids= for the overlay endpoint, roughly a few pages of products
+MAX_OVERLAY_IDS = 500
+
+class ProductOverlayView(APIView):
+    """
+    The current user's state for a batch of products, to merge into the
+    shared `?public=true` catalog payloads on the client:
+
+        GET /api/products/overlay/?ids=1,2,3
+        -> {"liked": [2], "cart": {"3": 1}}
+
+    Two indexed queries regardless of how many IDs are asked for.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        raw_ids = [part.strip() for part in request.query_params.get('ids', '').split(',') if part.strip()]
+        if not raw_ids:
+            return Response({"error": "The 'ids' query parameter is required."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(raw_ids) > MAX_OVERLAY_IDS:
+            return Response({"error": f"At most {MAX_OVERLAY_IDS} product IDs per request."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            product_ids = {int(part) for part in raw_ids}
+        except ValueError:
+            return Response({"error": "Product IDs must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        liked = LikedProduct.objects.filter(
+            user=request.user, product_id__in=product_ids
+        ).values_list('product_id', flat=True)
+        cart = CartItem.objects.filter(
+            cart__user=request.user, product_id__in=product_ids
+        ).values_list('product_id', 'quantity')
+
+        response = Response({
+            'liked': sorted(liked),
+            'cart': {str(product_id): quantity for product_id, quantity in cart},
+        })
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+# ==========================================================
+# --- BULK PRODUCT IMPORT (ADMIN) ---
+# ==========================================================
+
+from .models import ProductImportJob
+from .serializers import ProductImportJobSerializer
+from .importer import infer_format, save_import_upload, schedule_import
+
+class ProductImportView(APIView):
+    """
+    Starts a bulk import from an uploaded CSV or JSON Lines file, or lists
+    recent imports. The import runs in the background; poll the job for progress.
+
+        POST /api/admin/product-imports/   (multipart: file, optional format)
+        -> 202 {"id": 7, "status": "pending", "rows_processed": 0, ...}
+    """
+    permission_classes = [permissions.IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def get(self, request, *args, **kwargs):
+        jobs = ProductImportJob.objects.all()[:20]
+        return Response(ProductImportJobSerializer(jobs, many=True).data)
+
+    def post(self, request, *args, **kwargs):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Upload the file to import as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = request.data.get('format') or infer_format(upload.name)
+        if file_format not in ('csv', 'jsonl'):
+            return Response({"error": "Only CSV and JSON Lines files can be imported."}, status=status.HTTP_400_BAD_REQUEST)
+
+        job = ProductImportJob.objects.create(
+            source_path=save_import_upload(upload), file_format=file_format, created_by=request.user
+        )
+        transaction.on_commit(lambda: schedule_import(job))
+        return Response(ProductImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+class ProductImportDetailView(generics.RetrieveAPIView):
+    """Progress of one import: rows processed, counts and the first rejected rows."""
+    permission_classes = [permissions.IsAdminUser]
+    queryset = ProductImportJob.objects.all()
+    serializer_class = ProductImportJobSerializer
+
+class ProductImportResumeView(APIView):
+    """
+    Continues a failed or interrupted import (e.g. one left 'running' by a
+    restart) from its last committed batch.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(ProductImportJob, pk=pk)
+        if job.status == 'completed':
+            return Response({"error": "This import has already completed."}, status=status.HTTP_409_CONFLICT)
+        job.status = 'pending'
+        job.save(update_fields=['status', 'updated_at'])
+        transaction.on_commit(lambda: schedule_import(job))
+        return Response(ProductImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+# ==========================================================
+# --- DATA EXPORT (ADMIN) ---
+# ==========================================================
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from .exports import EXPORT_DATASETS, EXPORT_FORMATS, aiter_export, iter_export
+
+class AdminExportView(APIView):
+    """
+    Streams a whole table as NDJSON or CSV without holding it in memory:
+
+        GET /api/admin/exports/products.csv
+        GET /api/admin/exports/orders.ndjson
+        GET /api/admin/exports/order_items.csv
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, dataset, export_format, *args, **kwargs):
+        if dataset not in EXPORT_DATASETS or export_format not in EXPORT_FORMATS:
+            return Response({"error": "Unknown export."}, status=status.HTTP_404_NOT_FOUND)
+        # Under ASGI (daphne) a sync iterator would be buffered whole before the first byte
+        export = aiter_export if isinstance(request._request, ASGIRequest) else iter_export
+        response = StreamingHttpResponse(
+            export(dataset, export_format), content_type=EXPORT_FORMATS[export_format]
+        )
+        filename = f"{dataset}-{timezone.now():%Y%m%d}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
 
 from .vector_db import search_orders # <-- Import the RAG search function
 
@@ -1261,7 +1416,7 @@ class PolicyDocumentViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAdminUser] # Only admins can manage documents
 
 
-from .vector_db import search_orders, search_documents
+from .vector_db import embed_query, search_orders, search_documents
 import asyncio
 
 from rest_framework.views import APIView
@@ -1333,11 +1488,14 @@ class ChatbotView(APIView):
         # Create async-safe versions of our synchronous search functions
         search_orders_async = sync_to_async(search_orders, thread_sensitive=False)
         search_docs_async = sync_to_async(search_documents, thread_sensitive=False)
-        
+
+        # Embed the query once and share the vector between both searches
+        query_embedding = await sync_to_async(embed_query, thread_sensitive=False)(user_query)
+
         # Run both searches at the same time and wait for them to complete
         relevant_orders, relevant_docs = await asyncio.gather(
-            search_orders_async(query=user_query, user_id=user.id, n_results=3),
-            search_docs_async(query=user_query, n_results=3)
+            search_orders_async(query=user_query, user_id=user.id, n_results=3, query_embedding=query_embedding),
+            search_docs_async(query=user_query, n_results=3, query_embedding=query_embedding)
         )
         
         # --- BUILD COMBINED CONTEXT ---
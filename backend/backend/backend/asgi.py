@@ -5,6 +5,13 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 django_asgi_app = get_asgi_application()
 
+# Load the embedding model and Chroma in the background so the first chatbot
+# or search request doesn't pay for it (see api/vector_db.py)
+from django.conf import settings
+if settings.VECTOR_DB_WARMUP:
+    from api.vector_db import warm_up_in_background
+    warm_up_in_background()
+
 # Import your new middleware
 from channels.routing import ProtocolTypeRouter, URLRouter
 from api.middleware import TokenAuthMiddleware # <<< IMPORT THIS
@@ -35,6 +35,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.compression_middleware.ThresholdGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'api.performance_middleware.PerformanceMonitoringMiddleware',  # <-- ADD THIS LINE
     'corsheaders.middleware.CorsMiddleware',
@@ -87,6 +88,31 @@ CHANNEL_LAYERS = {
         },
     },
 }
+# Shared cache (recommendations, etc.). Override CACHE_BACKEND, e.g. with
+# 'django.core.cache.backends.locmem.LocMemCache', to run without Redis.
+CACHES = {
+    "default": {
+        "BACKEND": env('CACHE_BACKEND', default='django.core.cache.backends.redis.RedisCache'),
+        "LOCATION": REDIS_URL,
+    },
+}
+
+# Backstop lifetime (seconds) of cached product recommendations
+RECOMMENDATION_CACHE_TTL = env.int('RECOMMENDATION_CACHE_TTL', default=60 * 60)
+
+# Bestsellers: default sales window ('7', '30' or 'all') and how long (seconds)
+# a snapshot is served before one worker rebuilds it
+BESTSELLER_WINDOW = env('BESTSELLER_WINDOW', default='30')
+BESTSELLER_SNAPSHOT_TTL = env.int('BESTSELLER_SNAPSHOT_TTL', default=5 * 60)
+
+# Backstop lifetime (seconds) of the cached category facets; product saves and
+# deletes drop the cache as soon as they commit
+CATEGORY_FACETS_TTL = env.int('CATEGORY_FACETS_TTL', default=60 * 60)
+
+# max-age (seconds) for `?public=true` catalog responses; shared caches
+# revalidate with the ETag after that
+PUBLIC_CATALOG_MAX_AGE = env.int('PUBLIC_CATALOG_MAX_AGE', default=60)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -151,8 +177,48 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.MultiPartParser',  # For file uploads
         'rest_framework.parsers.FormParser',       # For form data
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        # orjson-backed JSON (stdlib fallback), see api/renderers.py
+        'api.renderers.FastJSONRenderer' if env.bool('FAST_JSON_RENDERER', default=True)
+        else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
+# Responses at least this large (bytes) are gzipped for clients that accept it
+RESPONSE_COMPRESSION_MIN_BYTES = env.int('RESPONSE_COMPRESSION_MIN_BYTES', default=1024)
+
+# Default page size for keyset-paginated product endpoints (?cursor= / ?page_size=)
+PRODUCT_PAGE_SIZE = env.int('PRODUCT_PAGE_SIZE', default=24)
+
+# Characters of description returned by product lists with ?excerpt=true
+PRODUCT_DESCRIPTION_EXCERPT_LENGTH = env.int('PRODUCT_DESCRIPTION_EXCERPT_LENGTH', default=160)
+
+# Worker threads that render product image thumbnails/WebP variants after upload
+IMAGE_PIPELINE_WORKERS = env.int('IMAGE_PIPELINE_WORKERS', default=2)
+
+# Vector-index outbox (api/indexing.py). By default each web process drains it on
+# a background thread; set VECTOR_INDEX_IN_PROCESS=False when `run_vector_indexer` runs instead.
+VECTOR_INDEX_IN_PROCESS = env.bool('VECTOR_INDEX_IN_PROCESS', default=True)
+VECTOR_INDEX_BATCH_SIZE = env.int('VECTOR_INDEX_BATCH_SIZE', default=64)
+# Delay before draining, so a burst of saves is embedded as one batch
+VECTOR_INDEX_COALESCE_SECONDS = env.float('VECTOR_INDEX_COALESCE_SECONDS', default=1.0)
+VECTOR_INDEX_POLL_SECONDS = env.float('VECTOR_INDEX_POLL_SECONDS', default=30.0)
+VECTOR_INDEX_MAX_ATTEMPTS = env.int('VECTOR_INDEX_MAX_ATTEMPTS', default=5)
+# A claim older than this is taken to belong to a worker that died mid-batch
+VECTOR_INDEX_CLAIM_TIMEOUT = env.int('VECTOR_INDEX_CLAIM_TIMEOUT', default=10 * 60)
+
+# Web workers (asgi.py/wsgi.py) load the embedding model and Chroma on a background
+# thread at startup; everything else loads them on first use only
+VECTOR_DB_WARMUP = env.bool('VECTOR_DB_WARMUP', default=True)
+
+# On-disk cache of document embeddings keyed by a hash of their text (api/embedding_cache.py);
+# kept next to the Chroma store. Set to an empty string to disable.
+EMBEDDING_CACHE_PATH = env('EMBEDDING_CACHE_PATH', default=str(BASE_DIR / 'chroma_db' / 'embedding_cache.sqlite3'))
+
+# Search-query embeddings kept in memory per process (LRU), shared by all vector searches
+QUERY_EMBEDDING_CACHE_SIZE = env.int('QUERY_EMBEDDING_CACHE_SIZE', default=1024)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -162,6 +228,9 @@ SIMPLE_JWT = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploaded bulk-import files wait here for their job; kept outside MEDIA_ROOT so they're never served
+PRODUCT_IMPORT_ROOT = env('PRODUCT_IMPORT_ROOT', default=str(BASE_DIR / 'private' / 'imports'))
+
 # Stripe keys from .env
 STRIPE_PUBLISHABLE_KEY = env('STRIPE_PUBLISHABLE_KEY')
 STRIPE_SECRET_KEY = env('STRIPE_SECRET_KEY')
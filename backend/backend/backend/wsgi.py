@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Load the embedding model and Chroma in the background (see api/vector_db.py)
+from django.conf import settings
+if settings.VECTOR_DB_WARMUP:
+    from api.vector_db import warm_up_in_background
+    warm_up_in_background()
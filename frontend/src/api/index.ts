@@ -12,6 +12,7 @@ import type {
   OrderPayload,
   Review, // Import the Review type for the new functions
   PolicyDocument,
+  PaginatedResponse,
   ApiChatMessage // <-- IMPORT THE NEW TYPE
 
 } from './types';
@@ -48,12 +49,16 @@ export const generateProductContentAPI = (name: string, category: string): Promi
   return api.post('/products/generate-content/', { name, category });
 };
 
-export const searchProductsByTagsAPI = (query: string): Promise<AxiosResponse<Product[]>> => {
-  return api.get(`/products/tag-search/`, { params: { query } });
+// Both list endpoints return one page at a time (the server caps page_size at 100);
+// pass a page's `next` URL to get the following one.
+export const PRODUCT_PAGE_SIZE = 100;
+
+export const searchProductsByTagsAPI = (query: string): Promise<AxiosResponse<PaginatedResponse<Product>>> => {
+  return api.get(`/products/tag-search/`, { params: { query, page_size: PRODUCT_PAGE_SIZE } });
 };
 
-export const fetchProductsAPI = (): Promise<AxiosResponse<Product[]>> => {
-  return api.get('/products/');
+export const fetchProductsAPI = (nextUrl?: string | null): Promise<AxiosResponse<PaginatedResponse<Product>>> => {
+  return nextUrl ? api.get(nextUrl) : api.get('/products/', { params: { page_size: PRODUCT_PAGE_SIZE } });
 };
 
 // --- THIS FUNCTION WAS MISSING ---
@@ -59,9 +59,29 @@ export interface Product {
   // ---
   stock_quantity: number;
   image: string | null;
+  // Resized JPEG/WebP copies of an uploaded image; null until they've been generated
+  images?: ImageVariants | null;
   is_liked: boolean;
 }
 
+// One keyset page from the product list endpoints; follow `next` for the rest
+export interface PaginatedResponse<T> {
+  next: string | null;
+  first: string;
+  results: T[];
+}
+
+export interface ImageVariant {
+  jpeg: string;
+  webp: string;
+}
+
+export interface ImageVariants {
+  thumbnail: ImageVariant;
+  medium: ImageVariant;
+  large: ImageVariant;
+}
+
 export interface CartItem extends Product {
   quantity: number;
 }
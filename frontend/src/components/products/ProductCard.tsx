@@ -35,11 +35,15 @@ const ProductCard: React.FC<ProductCardProps> = ({
       <Link to={`/products/${product.id}`} className="product-image-link">
         {/* This container is key. It will be styled to have a consistent shape. */}
         <div className="product-image-container">
-          <img 
-            src={product.image || placeholderImage} 
-            alt={product.name} 
-            className="product-image" 
-          />
+          <picture>
+            {product.images && <source srcSet={product.images.thumbnail.webp} type="image/webp" />}
+            <img 
+              src={product.images?.thumbnail.jpeg || product.image || placeholderImage} 
+              alt={product.name} 
+              className="product-image" 
+              loading="lazy"
+            />
+          </picture>
         </div>
       </Link>
       <div className="product-info">
@@ -14,11 +14,15 @@ const RecommendedProductCard: React.FC<RecCardProps> = ({ product }) => {
   return (
     <Link to={`/products/${product.id}`} className="rec-product-card">
       <div className="rec-image-wrapper">
-        <img
-          src={product.image || placeholderImage}
-          alt={product.name}
-          className="rec-product-image"
-        />
+        <picture>
+          {product.images && <source srcSet={product.images.thumbnail.webp} type="image/webp" />}
+          <img
+            src={product.images?.thumbnail.jpeg || product.image || placeholderImage}
+            alt={product.name}
+            className="rec-product-image"
+            loading="lazy"
+          />
+        </picture>
       </div>
       <div className="rec-product-info">
         <p className="rec-product-category">{product.category}</p>
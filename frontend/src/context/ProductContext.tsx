@@ -7,7 +7,8 @@ import React, {
   useRef,
   type ReactNode
 } from 'react';
-import type { Product } from '../api/types';
+import type { PaginatedResponse, Product } from '../api/types';
+import { PRODUCT_PAGE_SIZE } from '../api';
 import useApi from '../hooks/useApi';
 
 // --- Context Type ---
@@ -16,6 +17,9 @@ interface ProductContextType {
   loading: boolean;
   error: string | null;
   fetchProducts: () => Promise<void>;
+  // The list endpoint is paginated; these load the catalog one page at a time
+  hasMore: boolean;
+  loadMoreProducts: () => Promise<void>;
 }
 
 // --- Create Context ---
@@ -26,31 +30,39 @@ export const ProductProvider: React.FC<{ children: ReactNode }> = ({ children })
   const [products, setProducts] = useState<Product[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [nextUrl, setNextUrl] = useState<string | null>(null);
   const api = useApi();
   
   // Add ref to prevent multiple simultaneous fetches
   const isFetchingRef = useRef(false);
 
-  const fetchProducts = useCallback(async () => {
+  // Fetches the first page when pageUrl is null, else appends the page it points to
+  const fetchPage = useCallback(async (pageUrl: string | null) => {
     // Prevent multiple simultaneous fetches
     if (isFetchingRef.current) {
       return;
     }
 
     isFetchingRef.current = true;
-    setLoading(true);
+    // Only a refetch from the first page shows the full loading state
+    if (!pageUrl) {
+      setLoading(true);
+    }
     setError(null);
     
     try {
-      // Cache-busting URL
-      const urlWithCacheBuster = `/products/?_=${new Date().getTime()}`;
-      const response = await api.get<Product[]>(urlWithCacheBuster);
+      // Cache-busting URL for the first page; `next` links carry the same parameters
+      const response = await api.get<PaginatedResponse<Product>>(
+        pageUrl ?? `/products/?page_size=${PRODUCT_PAGE_SIZE}&_=${new Date().getTime()}`
+      );
       
       // Validate response data
-      if (Array.isArray(response.data)) {
-        setProducts(response.data);
+      if (Array.isArray(response.data?.results)) {
+        const page = response.data.results;
+        setProducts(prev => (pageUrl ? [...prev, ...page] : page));
+        setNextUrl(response.data.next);
       } else {
-        throw new Error('Invalid response format: expected array of products');
+        throw new Error('Invalid response format: expected a page of products');
       }
       
     } catch (err: any) {
@@ -76,13 +88,21 @@ export const ProductProvider: React.FC<{ children: ReactNode }> = ({ children })
     }
   }, [api]);
 
+  const fetchProducts = useCallback(() => fetchPage(null), [fetchPage]);
+
+  const loadMoreProducts = useCallback(async () => {
+    if (nextUrl) {
+      await fetchPage(nextUrl);
+    }
+  }, [fetchPage, nextUrl]);
+
   // Initial fetch
   useEffect(() => {
     fetchProducts();
   }, [fetchProducts]);
 
   return (
-    <ProductContext.Provider value={{ products, loading, error, fetchProducts }}>
+    <ProductContext.Provider value={{ products, loading, error, fetchProducts, hasMore: nextUrl !== null, loadMoreProducts }}>
       {children}
     </ProductContext.Provider>
   );
@@ -10,7 +10,7 @@ import placeholderImage from '../assets/images/product-placeholder.webp';
 import { type Product } from '../api/types';
 
 const AdminProductManagementPage: React.FC = () => {
-  const { products, loading, error, fetchProducts } = useProducts();
+  const { products, loading, error, fetchProducts, hasMore, loadMoreProducts } = useProducts();
   
   const [categories, setCategories] = useState<string[]>([]);
   const [isModalOpen, setIsModalOpen] = useState(false);
@@ -162,6 +162,13 @@ const AdminProductManagementPage: React.FC = () => {
           </tbody>
         </table>
       </div>
+      {hasMore && (
+        <div className="load-more">
+          <button onClick={loadMoreProducts} className="add-new-product-btn">
+            Load more products
+          </button>
+        </div>
+      )}
       
       <ProductFormModal
         isOpen={isModalOpen}
@@ -12,6 +12,7 @@ import { useLikedProductsStore } from '../hooks/likedProductsStore';
 // Components
 import ProductList from '../components/products/ProductList';
 import Pagination from '../components/common/Pagination';
+import Button from '../components/common/Button';
 import SearchBar from '../components/products/SearchBar';
 import Filter from '../components/products/Filter';
 
@@ -19,7 +20,8 @@ import Filter from '../components/products/Filter';
 import './HomePage.css';
 
 const HomePage: React.FC = () => {
-  const { products: allProducts, loading: initialLoading, error } = useProducts();
+  const { products: allProducts, loading: initialLoading, error, hasMore, loadMoreProducts } = useProducts();
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [displayedProducts, setDisplayedProducts] = useState<Product[]>([]);
   const { likedProductIds, setInitialLikedProducts, likeProduct, unlikeProduct } = useLikedProductsStore();
 
@@ -83,7 +85,8 @@ const HomePage: React.FC = () => {
       setIsSearching(true);
       searchProductsByTagsAPI(debouncedSearchTerm)
         .then(response => {
-          setDisplayedProducts(response.data);
+          // The best-ranked page of matches
+          setDisplayedProducts(response.data.results);
         })
         .catch(err => {
           console.error("AI Tag Search failed:", err);
@@ -97,10 +100,13 @@ const HomePage: React.FC = () => {
       // Otherwise, just display the main list of all products.
       setDisplayedProducts(allProducts);
     }
-    // Reset to page 1 whenever the displayed products change.
-    setCurrentPage(1);
   }, [debouncedSearchTerm, allProducts, initialLoading]);
 
+  // Reset to page 1 when the search changes; loading another page of products keeps the current one.
+  useEffect(() => {
+    setCurrentPage(1);
+  }, [debouncedSearchTerm]);
+
   // Like handler
   const handleProductLike = async (productId: number, currentLikeStatus: boolean) => {
     setDisplayedProducts(prevProducts =>
@@ -160,6 +166,14 @@ const HomePage: React.FC = () => {
     setCurrentPage(1);
   };
   const handleApplyFilter = () => { if (isMobile) setIsMobileFilterOpen(false); };
+  const handleLoadMore = async () => {
+    setIsLoadingMore(true);
+    try {
+      await loadMoreProducts();
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
 
   const isLoading = initialLoading || isSearching;
   
@@ -186,6 +200,14 @@ const HomePage: React.FC = () => {
               <>
                 <ProductList products={currentProducts} onLikeToggle={handleProductLike} likedProductIds={likedProductIds} />
                 <Pagination currentPage={currentPage} totalPages={totalPages} onPageChange={(page) => setCurrentPage(page)} />
+                {/* The catalog arrives a page at a time; offer the next one once the loaded products run out */}
+                {hasMore && debouncedSearchTerm.trim().length <= 2 && currentPage === totalPages && (
+                  <div className="load-more">
+                    <Button variant="secondary" onClick={handleLoadMore} disabled={isLoadingMore}>
+                      {isLoadingMore ? 'Loading...' : 'Load more products'}
+                    </Button>
+                  </div>
+                )}
               </>
             ) : (
               <div className="page-status">